@@ -0,0 +1,363 @@
+"""
+Local stand-in for the Gemini API, for load testing without spending quota.
+
+Serves the REST endpoints the google-genai client uses (generateContent,
+streamGenerateContent, countTokens and cachedContents) with configurable
+latency, streaming pace and injected errors. Point the service at it with
+LLM_BASE_URL:
+
+    python benchmarks/fake_gemini.py --port 8090 --latency lognormal:400:0.5
+    LLM_API_KEY=fake LLM_BASE_URL=http://localhost:8090 poetry run task dev
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the quick brown fox jumps over the lazy dog while a curious cat watches "
+    "from the warm windowsill and the afternoon light slowly fades away"
+).split()
+
+
+STATUS_NAMES = {
+    400: "INVALID_ARGUMENT",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+
+
+class LatencyModel:
+    """
+    A latency distribution, parsed from "kind:param:param" specs.
+
+    Supported specs, all in milliseconds:
+        constant:MS             Always MS.
+        uniform:LOW:HIGH        Uniform between LOW and HIGH.
+        normal:MEAN:STDDEV      Normal, clipped at 0.
+        lognormal:MEDIAN:SIGMA  Log-normal with the given median; a long tail
+                                for SIGMA around 0.5 to 1.
+        pareto:MIN:ALPHA        Pareto with scale MIN; heavy tail for small ALPHA.
+
+    Attributes:
+        spec (str): The spec the model was parsed from.
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        try:
+            values = [float(p) for p in params]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        samplers = {
+            "constant": (1, lambda ms: ms),
+            "uniform": (2, lambda low, high: random.uniform(low, high)),
+            "normal": (2, lambda mean, sd: max(0.0, random.gauss(mean, sd))),
+            "lognormal": (
+                2,
+                lambda median, sigma: random.lognormvariate(math.log(median), sigma),
+            ),
+            "pareto": (2, lambda low, alpha: low * random.paretovariate(alpha)),
+        }
+        if kind not in samplers or len(values) != samplers[kind][0]:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        self._sample = samplers[kind][1]
+        self._values = values
+
+    def sample(self) -> float:
+        """
+        Draw one latency.
+
+        Returns:
+            The latency in seconds
+        """
+        return self._sample(*self._values) / 1000
+
+
+def parse_errors(spec: str) -> List[Tuple[int, float]]:
+    """
+    Parse an error injection spec such as "429:0.02,503:0.01".
+
+    Args:
+        spec: Comma-separated STATUS:PROBABILITY pairs
+
+    Returns:
+        List of (status code, probability) pairs
+    """
+    errors = []
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        status, _, rate = item.partition(":")
+        errors.append((int(status), float(rate)))
+    return errors
+
+
+class FakeGemini:
+    """
+    Behaviour and counters of the fake server.
+
+    Attributes:
+        latency (LatencyModel): Time until a non-streamed response, or until the
+            first chunk of a stream.
+        chunk_latency (LatencyModel): Time between stream chunks.
+        chunks (int): Number of chunks per streamed response.
+        response_words (int): Words per response.
+        errors (List[tuple]): (status, probability) pairs of injected errors.
+        echo (bool): Whether responses start with the start of the prompt.
+    """
+
+    def __init__(
+        self,
+        latency: str = "lognormal:300:0.4",
+        chunk_latency: str = "constant:20",
+        chunks: int = 8,
+        response_words: int = 60,
+        errors: str = "",
+        echo: bool = False,
+    ):
+        self.latency = LatencyModel(latency)
+        self.chunk_latency = LatencyModel(chunk_latency)
+        self.chunks = max(1, chunks)
+        self.response_words = response_words
+        self.errors = parse_errors(errors)
+        self.echo = echo
+
+        self.requests: Dict[str, int] = {}
+        self.injected: Dict[int, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._caches = 0
+
+    def _count(self, action: str) -> None:
+        self.requests[action] = self.requests.get(action, 0) + 1
+
+    def _maybe_fail(self) -> None:
+        roll = random.random()
+        for status, rate in self.errors:
+            if roll < rate:
+                self.injected[status] = self.injected.get(status, 0) + 1
+                raise HTTPException(status_code=status, detail="Injected error")
+            roll -= rate
+
+    @staticmethod
+    def _prompt_text(body: dict) -> str:
+        return " ".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+
+    def _response_text(self, prompt: str) -> str:
+        words = [random.choice(WORDS) for _ in range(self.response_words)]
+        if self.echo:
+            words = prompt.split()[:10] + words
+        return " ".join(words)
+
+    @staticmethod
+    def _payload(text: str, model: str, prompt: str, finished: bool) -> dict:
+        payload = {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": text}]},
+                    "index": 0,
+                }
+            ],
+            "modelVersion": model,
+        }
+        if finished:
+            payload["candidates"][0]["finishReason"] = "STOP"
+            payload["usageMetadata"] = {
+                "promptTokenCount": len(prompt) // 4 + 1,
+                "candidatesTokenCount": len(text) // 4 + 1,
+                "totalTokenCount": (len(prompt) + len(text)) // 4 + 2,
+            }
+        return payload
+
+    async def generate(self, model: str, body: dict) -> dict:
+        """Answer a generateContent call after a sampled latency."""
+        self._count("generateContent")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency.sample())
+            self._maybe_fail()
+            prompt = self._prompt_text(body)
+            return self._payload(self._response_text(prompt), model, prompt, True)
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, model: str, body: dict):
+        """Answer a streamGenerateContent call as Server-Sent Events."""
+        self._count("streamGenerateContent")
+        await asyncio.sleep(self.latency.sample())
+        self._maybe_fail()
+        prompt = self._prompt_text(body)
+        words = self._response_text(prompt).split()
+        size = math.ceil(len(words) / self.chunks) or 1
+        pieces = [
+            " ".join(words[i : i + size]) + " " for i in range(0, len(words), size)
+        ]
+
+        async def events():
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                for i, piece in enumerate(pieces):
+                    if i:
+                        await asyncio.sleep(self.chunk_latency.sample())
+                    last = i == len(pieces) - 1
+                    payload = self._payload(piece, model, prompt, last)
+                    yield f"data: {json.dumps(payload)}\r\n\r\n"
+            finally:
+                self.in_flight -= 1
+
+        return events()
+
+    def count_tokens(self, body: dict) -> dict:
+        """Answer a countTokens call with a character-based estimate."""
+        self._count("countTokens")
+        text = self._prompt_text(body)
+        return {"totalTokens": len(text) // 4 + 1}
+
+    def create_cache(self, body: dict) -> dict:
+        """Pretend to create a cached content entry."""
+        self._count("cachedContents.create")
+        self._caches += 1
+        return {
+            "name": f"cachedContents/fake-{self._caches}",
+            "model": body.get("model", ""),
+            "expireTime": "2099-01-01T00:00:00Z",
+        }
+
+    def stats(self) -> dict:
+        """Get request counters."""
+        return {
+            "requests": dict(self.requests),
+            "injected_errors": {str(k): v for k, v in self.injected.items()},
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+def create_app(fake: FakeGemini) -> FastAPI:
+    """
+    Build the fake Gemini API application.
+
+    Args:
+        fake: The behaviour of the server
+
+    Returns:
+        The FastAPI application
+    """
+    app = FastAPI(title="Fake Gemini API")
+
+    @app.post("/{version}/models/{model_action}")
+    async def models(version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        body = await request.json()
+        if action == "generateContent":
+            return await fake.generate(model, body)
+        if action == "streamGenerateContent":
+            return StreamingResponse(
+                await fake.stream(model, body), media_type="text/event-stream"
+            )
+        if action == "countTokens":
+            return fake.count_tokens(body)
+        raise HTTPException(status_code=404, detail=f"Unknown action '{action}'")
+
+    @app.post("/{version}/cachedContents")
+    async def create_cache(version: str, request: Request):
+        return fake.create_cache(await request.json())
+
+    @app.patch("/{version}/cachedContents/{name}")
+    async def update_cache(version: str, name: str):
+        return {"name": f"cachedContents/{name}", "expireTime": "2099-01-01T00:00:00Z"}
+
+    @app.delete("/{version}/cachedContents/{name}")
+    async def delete_cache(version: str, name: str):
+        return {}
+
+    @app.get("/stats")
+    async def stats():
+        return fake.stats()
+
+    @app.exception_handler(HTTPException)
+    async def gemini_error(request: Request, exc: HTTPException):
+        # Mirror the Gemini error envelope so the client raises APIError.
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={
+                "error": {
+                    "code": exc.status_code,
+                    "message": exc.detail,
+                    "status": STATUS_NAMES.get(exc.status_code, "UNKNOWN"),
+                }
+            },
+        )
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:300:0.4",
+        help="Time to a response or first chunk, e.g. constant:200, "
+        "uniform:100:400, normal:300:50, lognormal:300:0.5, pareto:200:2.5",
+    )
+    parser.add_argument(
+        "--chunk-latency",
+        default="constant:20",
+        help="Time between stream chunks, same format as --latency",
+    )
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per stream")
+    parser.add_argument(
+        "--response-words", type=int, default=60, help="Words per response"
+    )
+    parser.add_argument(
+        "--errors",
+        default="",
+        help="Injected errors as STATUS:PROBABILITY pairs, e.g. 429:0.02,503:0.01",
+    )
+    parser.add_argument(
+        "--echo", action="store_true", help="Start responses with the prompt"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        fake = FakeGemini(
+            latency=args.latency,
+            chunk_latency=args.chunk_latency,
+            chunks=args.chunks,
+            response_words=args.response_words,
+            errors=args.errors,
+            echo=args.echo,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    import uvicorn
+
+    print(
+        f"Fake Gemini API on http://{args.host}:{args.port} "
+        f"(latency {args.latency}, errors {args.errors or 'none'})",
+        file=sys.stderr,
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
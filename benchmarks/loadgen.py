@@ -0,0 +1,432 @@
+"""
+Async load generator for the chat endpoints.
+
+Drives POST /api/v1/chat, /api/v1/chat/stream or /api/v1/chat/batch at a fixed
+request rate (open loop) or a fixed number of concurrent clients (closed loop),
+and reports throughput, latency percentiles and error rates as JSON:
+
+    python benchmarks/loadgen.py --rps 50 --duration 60 --output run.json
+    python benchmarks/loadgen.py --concurrency 32 --requests 2000 --endpoint stream
+    python benchmarks/loadgen.py --rps 20 --replay requests.jsonl --compare run.json
+
+In open-loop mode latency is measured from the time each request was scheduled,
+so a server that falls behind is not hidden by the generator slowing down.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+ENDPOINTS = {
+    "chat": "/api/v1/chat",
+    "stream": "/api/v1/chat/stream",
+    "batch": "/api/v1/chat/batch",
+}
+
+REQUEST_FIELDS = (
+    "text",
+    "context",
+    "system_context",
+    "bypass_cache",
+    "priority",
+    "model",
+    "session_id",
+)
+
+
+def load_payloads(path: str) -> List[dict]:
+    """
+    Load chat request payloads from a JSONL file.
+
+    Lines holding a ChatRequest (with a "text" field) are used as they are.
+    Other objects are replayed with their "body" or "title" as the text, so
+    backlog-style files such as requests.jsonl can be replayed directly.
+
+    Args:
+        path: The JSONL file
+
+    Returns:
+        The payloads, in file order
+    """
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "text" not in entry:
+                text = entry.get("body") or entry.get("title")
+                if not text:
+                    continue
+                entry = {"text": text}
+            payloads.append({k: v for k, v in entry.items() if k in REQUEST_FIELDS})
+    if not payloads:
+        raise ValueError(f"No payloads found in {path}")
+    return payloads
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Args:
+        values: The values, in any order
+        q: The percentile, between 0 and 100
+
+    Returns:
+        The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize latencies in seconds as milliseconds."""
+    if not values:
+        return {"mean": None, "p50": None, "p90": None, "p95": None, "p99": None}
+    summary = {"mean": sum(values) / len(values)}
+    for q in (50, 90, 95, 99):
+        summary[f"p{q}"] = percentile(values, q)
+    summary["max"] = max(values)
+    return {k: round(v * 1000, 3) for k, v in summary.items()}
+
+
+class Sample:
+    """
+    Outcome of one request.
+
+    Attributes:
+        status (int): HTTP status, or 0 for a transport error.
+        latency (float): Seconds until the response was complete.
+        ttfb (float): Seconds until the first stream chunk, for streams.
+        error (str): Error description, if the request failed.
+    """
+
+    __slots__ = ("status", "latency", "ttfb", "error")
+
+    def __init__(self, status=0, latency=0.0, ttfb=None, error=None):
+        self.status = status
+        self.latency = latency
+        self.ttfb = ttfb
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+
+class LoadGenerator:
+    """
+    Sends chat requests and collects their outcomes.
+
+    Attributes:
+        client (httpx.AsyncClient): Client bound to the service base URL.
+        endpoint (str): One of "chat", "stream" or "batch".
+        payloads (Iterator[dict]): Endless cycle of request payloads.
+        batch_size (int): Requests per batch call, for the batch endpoint.
+        unique (bool): Whether a sequence number is appended to every text, so
+            no two requests share a cache entry or an in-flight upstream call.
+        samples (List[Sample]): Outcomes collected so far.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        payloads: List[dict],
+        batch_size: int = 10,
+        unique: bool = False,
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.payloads: Iterator[dict] = itertools.cycle(payloads)
+        self.batch_size = batch_size
+        self.unique = unique
+        self.samples: List[Sample] = []
+        self._sequence = itertools.count()
+
+    def next_payload(self) -> dict:
+        """Get the next request payload."""
+        payload = next(self.payloads)
+        if self.unique:
+            payload = {**payload, "text": f"{payload['text']} #{next(self._sequence)}"}
+        return payload
+
+    async def send(self, scheduled: float) -> None:
+        """
+        Send one request and record its outcome.
+
+        Args:
+            scheduled: perf_counter value the request was due at; latency is
+                measured from there
+        """
+        path = ENDPOINTS[self.endpoint]
+        sample = Sample()
+        try:
+            if self.endpoint == "stream":
+                await self._send_stream(path, self.next_payload(), scheduled, sample)
+            else:
+                if self.endpoint == "batch":
+                    body = {
+                        "requests": [
+                            self.next_payload() for _ in range(self.batch_size)
+                        ]
+                    }
+                else:
+                    body = self.next_payload()
+                response = await self.client.post(path, json=body)
+                sample.status = response.status_code
+                if response.status_code >= 400:
+                    sample.error = response.text[:200]
+        except httpx.HTTPError as e:
+            sample.error = f"{type(e).__name__}: {e}"
+        sample.latency = time.perf_counter() - scheduled
+        self.samples.append(sample)
+
+    async def _send_stream(
+        self, path: str, body: dict, scheduled: float, sample: Sample
+    ) -> None:
+        async with self.client.stream("POST", path, json=body) as response:
+            sample.status = response.status_code
+            if response.status_code >= 400:
+                sample.error = (await response.aread()).decode()[:200]
+                return
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: ") :]
+                    if event == "chunk" and sample.ttfb is None:
+                        sample.ttfb = time.perf_counter() - scheduled
+                elif line.startswith("data: ") and event == "error":
+                    sample.error = line[len("data: ") :][:200]
+
+    async def run_rate(self, rps: float, duration: float, total: int) -> None:
+        """
+        Start requests at a fixed rate, regardless of how fast they finish.
+
+        Args:
+            rps: Requests started per second
+            duration: Seconds to keep starting requests, if total is not set
+            total: Number of requests to start, overrides duration
+        """
+        count = total or int(rps * duration)
+        start = time.perf_counter()
+        tasks = []
+        for i in range(count):
+            due = start + i / rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.send(due)))
+        await asyncio.gather(*tasks)
+
+    async def run_concurrency(
+        self, concurrency: int, duration: float, total: int
+    ) -> None:
+        """
+        Keep a fixed number of requests in flight.
+
+        Args:
+            concurrency: Number of concurrent clients
+            duration: Seconds to keep sending, if total is not set
+            total: Number of requests to send, overrides duration
+        """
+        stop_at = time.perf_counter() + duration
+        remaining = itertools.count()
+
+        async def worker():
+            while True:
+                if total and next(remaining) >= total:
+                    return
+                if not total and time.perf_counter() >= stop_at:
+                    return
+                await self.send(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def build_report(samples: List[Sample], elapsed: float, settings: dict) -> dict:
+    """
+    Aggregate request outcomes into a report.
+
+    Args:
+        samples: The collected outcomes
+        elapsed: Wall-clock duration of the run, in seconds
+        settings: The run parameters, copied into the report
+
+    Returns:
+        The report as a JSON-serializable dictionary
+    """
+    ok = [s for s in samples if s.ok]
+    statuses: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+        if s.ok:
+            continue
+        if not s.status:
+            key = s.error.split(":")[0]
+        elif s.status < 400:
+            key = "stream_error"
+        else:
+            key = str(s.status)
+        errors[key] = errors.get(key, 0) + 1
+    report = {
+        "settings": settings,
+        "started_at": time.time() - elapsed,
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "failed": len(samples) - len(ok),
+        "error_rate": (
+            round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0
+        ),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "status_codes": statuses,
+        "errors": errors,
+        "latency_ms": summarize([s.latency for s in ok]),
+    }
+    ttfb = [s.ttfb for s in ok if s.ttfb is not None]
+    if ttfb:
+        report["ttfb_ms"] = summarize(ttfb)
+    return report
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """
+    Describe how a report differs from a baseline report.
+
+    Args:
+        report: The new report
+        baseline: The report to compare against
+
+    Returns:
+        One line per compared figure
+    """
+
+    def line(name, new, old):
+        if new is None or old is None or not old:
+            return f"{name:<16} {old!s:>10} -> {new!s:>10}"
+        change = (new - old) / old * 100
+        return f"{name:<16} {old:>10.3f} -> {new:>10.3f} ({change:+.1f}%)"
+
+    lines = [
+        line("throughput_rps", report["throughput_rps"], baseline["throughput_rps"]),
+        line("error_rate", report["error_rate"], baseline["error_rate"]),
+    ]
+    for key in ("p50", "p95", "p99"):
+        lines.append(
+            line(
+                f"latency {key}",
+                report["latency_ms"].get(key),
+                baseline["latency_ms"].get(key),
+            )
+        )
+    return lines
+
+
+async def run(args) -> dict:
+    payloads = (
+        load_payloads(args.replay)
+        if args.replay
+        else [{"text": args.text, "bypass_cache": args.bypass_cache}]
+    )
+    if args.bypass_cache:
+        payloads = [{**p, "bypass_cache": True} for p in payloads]
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        generator = LoadGenerator(
+            client, args.endpoint, payloads, args.batch_size, args.unique
+        )
+        started = time.perf_counter()
+        if args.rps:
+            await generator.run_rate(args.rps, args.duration, args.requests)
+        else:
+            await generator.run_concurrency(
+                args.concurrency, args.duration, args.requests
+            )
+        elapsed = time.perf_counter() - started
+
+    settings = {
+        "label": args.label,
+        "url": args.url,
+        "endpoint": args.endpoint,
+        "mode": "rate" if args.rps else "concurrency",
+        "rps": args.rps,
+        "concurrency": None if args.rps else args.concurrency,
+        "duration": args.duration,
+        "requests": args.requests,
+        "replay": args.replay,
+        "payloads": len(payloads),
+        "unique": args.unique,
+        "batch_size": args.batch_size if args.endpoint == "batch" else None,
+    }
+    return build_report(generator.samples, elapsed, settings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="Open loop: requests per second")
+    mode.add_argument(
+        "--concurrency", type=int, default=10, help="Closed loop: concurrent clients"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=0,
+        help="Number of requests, overrides --duration",
+    )
+    parser.add_argument("--text", default="What is the capital of France?")
+    parser.add_argument(
+        "--replay", help="JSONL file of request payloads to cycle through"
+    )
+    parser.add_argument(
+        "--bypass-cache",
+        action="store_true",
+        help="Set bypass_cache on every request so each one reaches upstream",
+    )
+    parser.add_argument(
+        "--unique",
+        action="store_true",
+        help="Append a sequence number to every text, defeating caches and coalescing",
+    )
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--label", default="", help="Name stored in the report")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare with")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:", file=sys.stderr)
+        for line in compare(report, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
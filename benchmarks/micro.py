@@ -0,0 +1,391 @@
+"""
+Micro-benchmarks for the pieces on the request path, with regression baselines.
+
+Each benchmark is timed in several repeats of an auto-calibrated number of
+calls, and the best repeat is reported per call, as timeit recommends; slower
+repeats measure interference, not the code.
+
+    python benchmarks/micro.py run                  # print results
+    python benchmarks/micro.py run -k context       # only matching benchmarks
+    python benchmarks/micro.py save                 # store as the baseline
+    python benchmarks/micro.py compare --tolerance 0.2
+
+compare exits with status 1 if any benchmark is slower than its baseline by
+more than the tolerance, so it can gate a change. Baselines depend on the
+machine; save one on the machine that runs compare.
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "micro.json")
+
+# Benchmarks are registered as setup functions returning the callable to time.
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under a name."""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Time a callable.
+
+    The number of calls per repeat is doubled until one repeat takes at least
+    min_time seconds.
+
+    Args:
+        fn: The callable to time
+        repeat: Number of timed repeats
+        min_time: Minimum duration of one repeat, in seconds
+
+    Returns:
+        Dictionary with best_us and median_us per call, and the calls per repeat
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= min_time:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - started) / number)
+    return {
+        "best_us": round(min(timings) * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "number": number,
+    }
+
+
+# Shared fixtures, built once on first use.
+_fixtures: Dict[str, object] = {}
+
+
+def _contexts(count: int = 10000):
+    key = f"contexts-{count}"
+    if key not in _fixtures:
+        from src.context_manager import ContextManager
+
+        directory = tempfile.mkdtemp(prefix="bench-contexts-")
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        body = "### Role\nYou are a helpful assistant.\n" * 20
+        for i in range(count):
+            with open(os.path.join(directory, f"context_{i:05d}.md"), "w") as f:
+                f.write(body)
+        _fixtures[key] = ContextManager(directory, refresh_interval=0)
+    return _fixtures[key]
+
+
+def _service():
+    if "service" not in _fixtures:
+        from src.geminiservice import GeminiTextService
+
+        _fixtures["service"] = GeminiTextService(client=_StubClient())
+    return _fixtures["service"]
+
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class _StubModels:
+    def generate_content(self, model, contents, config=None):
+        return _StubResponse("Paris is the capital of France.")
+
+
+class _StubAioModels:
+    async def generate_content(self, model, contents, config=None):
+        return _StubResponse("Paris is the capital of France.")
+
+
+class _StubClient:
+    """Gemini client stand-in answering instantly, to time everything else."""
+
+    def __init__(self):
+        self.models = _StubModels()
+        self.aio = type("Aio", (), {"models": _StubAioModels()})()
+
+
+LARGE_TEXT = "The quick brown fox jumps over the lazy dog. " * 2500  # ~110 KB
+
+
+@benchmark("context.normalize_name")
+def bench_normalize_name():
+    from src.context_manager import ContextManager
+
+    return lambda: ContextManager.normalize_name("  My Helpful -- Tutor (v2)  ")
+
+
+@benchmark("context.list_contexts[10k]")
+def bench_list_contexts():
+    manager = _contexts()
+    return manager.list_contexts
+
+
+@benchmark("context.list_contexts_page[10k]")
+def bench_list_contexts_page():
+    manager = _contexts()
+    return lambda: manager.list_contexts("context_05", "context_05100", 100)
+
+
+@benchmark("context.get_context_content[10k]")
+def bench_get_context_content():
+    manager = _contexts()
+    return lambda: manager.get_context_content("context_05000")
+
+
+@benchmark("context.refresh_unchanged[10k]")
+def bench_refresh():
+    manager = _contexts()
+    return manager.refresh
+
+
+@benchmark("types.chat_request_validate[110KB]")
+def bench_request_validate():
+    from src.types.chat import ChatRequest
+
+    body = json.dumps(
+        {"text": LARGE_TEXT, "context": LARGE_TEXT[:10000], "system_context": "x"}
+    )
+    return lambda: ChatRequest.model_validate_json(body)
+
+
+@benchmark("types.chat_response_dump[110KB]")
+def bench_response_dump():
+    from src.types.chat import ChatResponse, Message, Output, ResponseMetadata
+
+    response = ChatResponse(
+        output=[
+            Output(
+                type="message",
+                role="assistant",
+                system_context="default",
+                content=Message(text=LARGE_TEXT),
+            )
+        ],
+        metadata=ResponseMetadata(
+            model="gemini-2.5-flash-lite", attempts=1, cached=False, latency_ms=1.0
+        ),
+    )
+    return response.model_dump_json
+
+
+@benchmark("cache.similarity_key[2000 words]")
+def bench_similarity_key():
+    from src.similarity_cache import SimilarityCache
+
+    cache = SimilarityCache()
+    words = LARGE_TEXT.split()[:1000]
+    text = " ".join(f"{word}{i % 97}" for i, word in enumerate(words * 2))
+    return lambda: cache.make_key("scope", text)
+
+
+@benchmark("service.prepare_request")
+def bench_prepare_request():
+    service = _service()
+    system_context = "### Role\nYou are a helpful assistant.\n" * 20
+    return lambda: service._prepare_request(
+        "What is the capital of France?", "Geography lesson.", system_context
+    )
+
+
+@benchmark("service.truncate[110KB]")
+def bench_truncate():
+    from src.geminiservice import truncate
+
+    return lambda: truncate(LARGE_TEXT)
+
+
+def _route(method: str, path: str, body: dict = None):
+    import httpx
+    from src.routes import chat_routes
+
+    key = chat_routes.service.pool.keys[0]
+    key.client = chat_routes.service.client = _StubClient()
+    import main
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app), base_url="http://bench"
+    )
+
+    def call():
+        response = loop.run_until_complete(client.request(method, path, json=body))
+        assert response.status_code == 200, response.text
+
+    return call
+
+
+@benchmark("route.health")
+def bench_route_health():
+    return _route("GET", "/health")
+
+
+@benchmark("route.chat[stubbed upstream]")
+def bench_route_chat():
+    return _route(
+        "POST",
+        "/api/v1/chat",
+        {"text": "What is the capital of France?", "bypass_cache": True},
+    )
+
+
+def run(pattern: str = None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Run the registered benchmarks.
+
+    Args:
+        pattern: Only run benchmarks whose name contains this string
+        repeat: Timed repeats per benchmark
+        min_time: Minimum duration of one repeat, in seconds
+
+    Returns:
+        Report with machine details and per-benchmark results
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        result = measure(setup(), repeat, min_time)
+        results[name] = result
+        print(
+            f"{name:<40} {result['best_us']:>12.3f} us  "
+            f"(median {result['median_us']:.3f} us, {result['number']} calls)",
+            file=sys.stderr,
+        )
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "created_at": time.time(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Find benchmarks that got slower than their baseline.
+
+    Args:
+        report: The new report
+        baseline: The stored baseline report
+        tolerance: Allowed slowdown as a fraction, e.g. 0.2 for 20%
+
+    Returns:
+        One line per regression; empty if there are none
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<40} no baseline", file=sys.stderr)
+            continue
+        change = result["best_us"] / base["best_us"] - 1
+        flag = "REGRESSION" if change > tolerance else "ok"
+        line = (
+            f"{name:<40} {base['best_us']:>12.3f} -> {result['best_us']:>12.3f} us "
+            f"({change:+.1%}) {flag}"
+        )
+        print(line, file=sys.stderr)
+        if change > tolerance:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["run", "save", "compare", "list"])
+    parser.add_argument("-k", dest="pattern", help="Only run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Minimum seconds per repeat"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown before compare fails, as a fraction",
+    )
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(BENCHMARKS))
+        return
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    os.environ.setdefault("LLM_API_KEY", "benchmark")
+    logging.disable(logging.WARNING)
+
+    report = run(args.pattern, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.command == "save":
+        if args.pattern and os.path.exists(args.baseline):
+            # Keep the baselines of benchmarks that were not run.
+            with open(args.baseline) as f:
+                report["results"] = {
+                    **json.load(f)["results"],
+                    **report["results"],
+                }
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    elif args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != report["machine"]:
+            print(
+                "Warning: the baseline was recorded on a different machine",
+                file=sys.stderr,
+            )
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(
+                f"{len(regressions)} benchmark(s) regressed beyond "
+                f"{args.tolerance:.0%}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from fastapi import FastAPI
-from src.routes import context_routes, chat_routes
+from src.config import Config
+from src.metrics import MetricsMiddleware
+from src.routes import context_routes, chat_routes, debug_routes, metrics_routes
+from src.tracing import TracingMiddleware
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -8,6 +11,12 @@ logger = logging.getLogger(__name__)
 app = FastAPI()
 app.include_router(context_routes.router)
 app.include_router(chat_routes.router)
+if Config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_routes.router)
+if Config.TRACE_ENABLED:
+    app.add_middleware(TracingMiddleware)
+    app.include_router(debug_routes.router)
 
 
 @app.get("/health")
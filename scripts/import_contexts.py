@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+
+# Add the project root to the python path so we can import src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.context_store import SQLiteContextStore, import_directory
+
+
+def main():
+    """Imports the .md context files of a directory into a SQLite context store"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--source", default="contexts", help="Directory holding the .md files"
+    )
+    parser.add_argument(
+        "--database",
+        default=os.path.join("contexts", "contexts.sqlite3"),
+        help="SQLite database to import into (see CONTEXT_STORE_PATH)",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace contexts that already exist with different content",
+    )
+    args = parser.parse_args()
+
+    store = SQLiteContextStore(args.database)
+    try:
+        counts = import_directory(store, args.source, overwrite=args.overwrite)
+    finally:
+        store.close()
+
+    print(
+        f"Imported {counts['imported']} contexts into {args.database}"
+        f" ({counts['unchanged']} unchanged, {counts['skipped']} skipped)"
+    )
+
+
+if __name__ == "__main__":
+    main()
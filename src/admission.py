@@ -0,0 +1,269 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted.
+
+    Attributes:
+        status_code (int): 429 when the client exceeded its rate limit, 503 when
+            the service is overloaded.
+        detail (str): Human readable reason.
+        retry_after (int): Suggested number of seconds before retrying.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class _TokenBucket:
+    """Per-client token bucket refilled continuously at the configured rate."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class AdmissionController:
+    """
+    Admission control in front of the chat endpoints.
+
+    At most max_active requests are processed at once. Further requests wait in
+    a bounded queue ordered by priority class (high, normal, low) and arrival
+    time. A request is rejected immediately with 503 when the queue is full or
+    when its estimated wait, based on the observed service time, exceeds
+    queue_timeout; a request that has waited queue_timeout without being
+    admitted is rejected the same way. Each client is additionally limited by a
+    token bucket and rejected with 429 when it runs dry.
+
+    All state is only touched from the event loop, so no locking is needed.
+    Queued requests are removed from the queue as soon as they time out or are
+    cancelled, so the queue only ever holds live waiters.
+
+    Attributes:
+        max_active (int): Maximum number of requests processed concurrently.
+            0 or less disables the limit (and thus queueing).
+        max_queue (int): Maximum number of waiting requests.
+        queue_timeout (float): Longest a request may wait for admission, in seconds.
+        rate (float): Requests per second allowed per client. 0 or less disables
+            rate limiting.
+        burst (float): Token bucket capacity per client.
+        max_clients (int): Number of client buckets kept; least recently seen
+            clients are forgotten first.
+    """
+
+    def __init__(
+        self,
+        max_active: int = 128,
+        max_queue: int = 512,
+        queue_timeout: float = 10,
+        rate: float = 0,
+        burst: float = 20,
+        max_clients: int = 10000,
+    ):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+
+        self._active = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+        self._avg_service = 1.0
+
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.avg_wait = 0.0
+        self.max_wait = 0.0
+
+    @staticmethod
+    def priority_of(name: str = None) -> int:
+        """
+        Map a priority class name to its queue rank.
+
+        Args:
+            name: "high", "normal" or "low"; anything else counts as "normal"
+
+        Returns:
+            The rank, lower is served first
+        """
+        return PRIORITIES.get((name or "normal").lower(), PRIORITIES["normal"])
+
+    def _check_rate(self, client_id: str) -> None:
+        if self.rate <= 0:
+            return
+
+        now = time.monotonic()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = _TokenBucket(self.burst, now)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * self.rate
+            )
+            bucket.updated = now
+
+        if bucket.tokens < 1:
+            self.rate_limited += 1
+            raise AdmissionRejected(
+                429,
+                f"Rate limit exceeded for client '{client_id}'",
+                (1 - bucket.tokens) / self.rate,
+            )
+        bucket.tokens -= 1
+
+    def _estimated_wait(self, rank: int) -> float:
+        ahead = sum(1 for entry in self._queue if entry[0] <= rank)
+        return (ahead + 1) * self._avg_service / self.max_active
+
+    def _record_wait(self, waited: float) -> None:
+        self.avg_wait += (waited - self.avg_wait) * 0.1
+        self.max_wait = max(self.max_wait, waited)
+
+    async def acquire(self, client_id: str, priority: str = None) -> float:
+        """
+        Wait until the request may be processed.
+
+        Args:
+            client_id: Identifies the client for rate limiting
+            priority: Priority class name of the request
+
+        Returns:
+            The admission timestamp, to be passed to release
+
+        Raises:
+            AdmissionRejected: If the request is rate limited or shed
+        """
+        self._check_rate(client_id)
+
+        if self.max_active <= 0 or (self._active < self.max_active and not self._queue):
+            self._active += 1
+            self.admitted += 1
+            return time.monotonic()
+
+        rank = self.priority_of(priority)
+        if len(self._queue) >= self.max_queue:
+            self.shed += 1
+            raise AdmissionRejected(503, "Server is overloaded", self._avg_service)
+
+        estimate = self._estimated_wait(rank)
+        if estimate > self.queue_timeout:
+            self.shed += 1
+            raise AdmissionRejected(503, "Server is overloaded", estimate)
+
+        enqueued = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (rank, next(self._sequence), waiter)
+        heapq.heappush(self._queue, entry)
+
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release(enqueued)
+            else:
+                self._dequeue(entry)
+            raise
+
+        if not waiter.done():
+            self._dequeue(entry)
+            self.timed_out += 1
+            raise AdmissionRejected(
+                503, "Timed out waiting for admission", self._avg_service
+            )
+
+        self._record_wait(time.monotonic() - enqueued)
+        self.admitted += 1
+        return time.monotonic()
+
+    def _dequeue(self, entry: tuple) -> None:
+        entry[2].cancel()
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def release(self, admitted_at: float) -> None:
+        """
+        Release a slot and hand it to the next waiting request, if any.
+
+        Args:
+            admitted_at: The timestamp returned by acquire
+        """
+        service_time = time.monotonic() - admitted_at
+        self._avg_service += (service_time - self._avg_service) * 0.1
+
+        if self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            waiter.set_result(None)
+            return
+        self._active -= 1
+
+    @contextlib.asynccontextmanager
+    async def admit(self, client_id: str, priority: str = None):
+        """
+        Hold an admission slot for the duration of a block.
+
+        Args:
+            client_id: Identifies the client for rate limiting
+            priority: Priority class name of the request
+
+        Raises:
+            AdmissionRejected: If the request is rate limited or shed
+        """
+        admitted_at = await self.acquire(client_id, priority)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def stats(self) -> Dict:
+        """
+        Get admission counters and queue statistics.
+
+        Returns:
+            Dictionary with active, queued, queued_by_priority, admitted,
+            rate_limited, shed, timed_out, avg_wait_ms, max_wait_ms and
+            avg_service_ms
+        """
+        queued_by_priority = {name: 0 for name in PRIORITIES}
+        names = {rank: name for name, rank in PRIORITIES.items()}
+        for rank, _, _ in self._queue:
+            queued_by_priority[names[rank]] += 1
+
+        return {
+            "active": self._active,
+            "queued": sum(queued_by_priority.values()),
+            "queued_by_priority": queued_by_priority,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.avg_wait * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_service_ms": round(self._avg_service * 1000, 3),
+        }
@@ -0,0 +1,365 @@
+import contextlib
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List
+from src.config import Config
+from src.cutoff import TextCutoff
+from src.session_store import SessionStore, Turn
+from src.tokens import estimate_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationResult:
+    """
+    A generated response together with how it was produced.
+
+    Attributes:
+        text (str): The generated text.
+        backend (str): Name of the backend that answered, e.g. "gemini".
+        model (str): The model that answered, or None for a cache hit.
+        tier (str): The routing tier chosen for the request, or None when
+            routing is disabled or a model was forced.
+        api_key (str): Label of the pool key that answered, or None for a cache hit.
+        attempts (int): Upstream attempts made, including retries and hedges.
+        cached (bool): Whether the text was served from a response cache.
+        latency_ms (float): Time spent producing the response, in milliseconds.
+        history_turns (int): Session history turns sent along with the request.
+        truncated (bool): Whether generation was stopped early at a sentence or
+            character limit.
+    """
+
+    __slots__ = (
+        "text",
+        "backend",
+        "model",
+        "tier",
+        "api_key",
+        "attempts",
+        "cached",
+        "latency_ms",
+        "history_turns",
+        "truncated",
+    )
+
+    def __init__(
+        self,
+        text: str = "",
+        model: str = None,
+        tier: str = None,
+        api_key: str = None,
+        attempts: int = 0,
+        cached: bool = False,
+        latency_ms: float = 0.0,
+        history_turns: int = 0,
+        backend: str = None,
+        truncated: bool = False,
+    ):
+        self.text = text
+        self.backend = backend
+        self.model = model
+        self.tier = tier
+        self.api_key = api_key
+        self.attempts = attempts
+        self.cached = cached
+        self.latency_ms = latency_ms
+        self.history_turns = history_turns
+        self.truncated = truncated
+
+    def update(self, other: "GenerationResult") -> None:
+        """Copy every field of another result into this one."""
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+
+class LLMBackend(ABC):
+    """
+    Interface of a text generation backend.
+
+    A backend answers chat requests synchronously, asynchronously and as a
+    stream of text chunks. Server-side conversation sessions are handled here,
+    so every backend continues the same sessions; pass one SessionStore to all
+    backends to share them.
+
+    Subclasses set name and must implement models, generate_response,
+    agenerate and astream_response. astream_response fills in the model fields of its result
+    once the upstream stream is open, so a stream closed early by
+    astream_until still reports them.
+
+    Attributes:
+        name (str): Name of the backend, as used in LLM_BACKEND and CONTEXT_BACKENDS.
+        sessions (SessionStore): Recent turns of server-side conversation sessions.
+        session_token_budget (int): Estimated tokens of session history sent with
+            a request; older turns are left out. 0 or less sends all kept turns.
+    """
+
+    name = ""
+
+    def __init__(self, sessions: SessionStore = None, session_token_budget: int = None):
+        if sessions is None:
+            sessions = SessionStore(
+                max_turns=Config.SESSION_MAX_TURNS,
+                max_sessions=Config.SESSION_MAX_SESSIONS,
+                max_bytes=Config.SESSION_MAX_BYTES,
+                idle_ttl=Config.SESSION_IDLE_TTL,
+            )
+        if session_token_budget is None:
+            session_token_budget = Config.SESSION_HISTORY_TOKEN_BUDGET
+        self.sessions = sessions
+        self.session_token_budget = session_token_budget
+
+    @property
+    @abstractmethod
+    def models(self) -> List[str]:
+        """Models a request may force with its model field."""
+
+    @abstractmethod
+    def generate_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> str:
+        """
+        Generate a response, blocking the current thread.
+
+        Args:
+            text: The main input text or question
+            context: Additional context to prepend to the text
+            system_context: System-level instructions for the model
+            system_context_name: Machine name of the system context
+            use_cache: Set to False to skip any response caches
+            model: Model to use instead of the backend's default
+            session_id: Conversation session to continue
+            generation: Generation settings of the system context, such as
+                max_output_tokens, temperature, top_p, stop_sequences and
+                thinking_budget (see ContextSettings.generation); backends
+                ignore the ones they do not support
+
+        Returns:
+            The generated text
+        """
+
+    @abstractmethod
+    async def agenerate(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> GenerationResult:
+        """
+        Generate a response without blocking the event loop.
+
+        Takes the same arguments as generate_response.
+
+        Returns:
+            The generated text and how it was produced
+        """
+
+    async def agenerate_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> str:
+        """
+        Same as agenerate, returning only the generated text.
+
+        Returns:
+            The generated text
+        """
+        result = await self.agenerate(
+            text,
+            context,
+            system_context,
+            system_context_name,
+            use_cache,
+            model,
+            session_id,
+            generation,
+        )
+        return result.text
+
+    @abstractmethod
+    def astream_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+        result: GenerationResult = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response chunk by chunk.
+
+        Takes the same arguments as generate_response, plus result, which is
+        filled in with the assembled text once the stream completes.
+
+        Yields:
+            Successive pieces of the generated text
+        """
+
+    async def acount_tokens(self, text: str, model: str = None) -> int:
+        """
+        Count the input tokens of a text for a model.
+
+        Backends without access to their tokenizer return the local estimate.
+
+        Args:
+            text: The text to count
+            model: The model the text is sent to, or None for the default
+
+        Returns:
+            The token count
+        """
+        return estimate_tokens(text)
+
+    async def astream_until(
+        self,
+        cutoff: TextCutoff,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+        result: GenerationResult = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response that stops at a sentence or character limit.
+
+        Chunks of astream_response pass through cutoff. Once its limit is
+        reached, the text ends at a clean boundary and the upstream stream is
+        closed, which stops generation instead of waiting for the model to
+        finish. A response stopped this way is marked truncated, is not
+        cached, and is recorded in the session as it was cut.
+
+        Takes the same arguments as astream_response, plus cutoff.
+
+        Yields:
+            Successive pieces of the generated text, up to the limit
+        """
+        if result is None:
+            result = GenerationResult()
+        started = time.monotonic()
+        stream = self.astream_response(
+            text,
+            context,
+            system_context,
+            system_context_name,
+            use_cache,
+            model,
+            session_id,
+            generation,
+            result,
+        )
+        async with contextlib.aclosing(stream):
+            async for chunk in stream:
+                piece = cutoff.feed(chunk)
+                if piece:
+                    yield piece
+                if cutoff.reached:
+                    break
+
+        if not cutoff.reached:
+            rest = cutoff.finish()
+            if rest:
+                yield rest
+            return
+
+        result.text = cutoff.text
+        result.truncated = True
+        result.latency_ms = round((time.monotonic() - started) * 1000, 3)
+        self._session_record(session_id, text, context, result.text)
+
+    async def agenerate_until(
+        self,
+        cutoff: TextCutoff,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> GenerationResult:
+        """
+        Generate a response that stops at a sentence or character limit.
+
+        Runs astream_until and collects the text, so the call returns as soon
+        as the limit is reached.
+
+        Returns:
+            The generated text and how it was produced
+        """
+        result = GenerationResult()
+        async for _ in self.astream_until(
+            cutoff,
+            text,
+            context,
+            system_context,
+            system_context_name,
+            use_cache,
+            model,
+            session_id,
+            generation,
+            result,
+        ):
+            pass
+        return result
+
+    def invalidate_context(self, context_name: str) -> None:
+        """
+        Drop anything derived from a system context that changed.
+
+        Args:
+            context_name: The machine name of the changed context
+        """
+
+    @staticmethod
+    def _build_prompt(text: str, context: str = None) -> str:
+        return f"{context}\n{text}" if context else text
+
+    def _session_history(self, session_id: str) -> list:
+        """
+        Get the session turns to send with a request, trimmed to the token budget.
+
+        Returns:
+            list: The turns, oldest first; empty without a session.
+        """
+        if not session_id:
+            return []
+        return self.sessions.history(session_id, self.session_token_budget)
+
+    def _session_record(
+        self, session_id: str, text: str, context: str, response_text: str
+    ) -> None:
+        if session_id and response_text:
+            self.sessions.append(
+                session_id,
+                Turn("user", self._build_prompt(text, context)),
+                Turn("model", response_text),
+            )
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import AsyncIterator, List
+from src.backends.base import GenerationResult, LLMBackend
+from src.session_store import SessionStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EchoBackend(LLMBackend):
+    """
+    Deterministic in-process backend for offline testing.
+
+    Answers every request with its prompt (the context followed by the text),
+    so the same request always gets the same response and no network or API
+    key is needed. Streams yield the response in chunks of chunk_words words.
+    Sessions are recorded like any other backend.
+
+    Attributes:
+        chunk_words (int): Words per streamed chunk.
+        delay (float): Seconds to wait before answering, to simulate latency.
+    """
+
+    name = "echo"
+
+    def __init__(
+        self,
+        chunk_words: int = 4,
+        delay: float = 0.0,
+        sessions: SessionStore = None,
+        session_token_budget: int = None,
+    ):
+        super().__init__(sessions, session_token_budget)
+        self.chunk_words = max(1, chunk_words)
+        self.delay = delay
+
+    @property
+    def models(self) -> List[str]:
+        """The single "echo" model."""
+        return ["echo"]
+
+    def _respond(self, text: str, context: str, session_id: str):
+        history = self._session_history(session_id)
+        response_text = self._build_prompt(text, context)
+        self._session_record(session_id, text, context, response_text)
+        return response_text, history
+
+    def generate_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> str:
+        """
+        Echo the prompt back.
+
+        Returns:
+            The context followed by the text
+        """
+        if self.delay:
+            time.sleep(self.delay)
+        return self._respond(text, context, session_id)[0]
+
+    async def agenerate(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> GenerationResult:
+        """
+        Echo the prompt back.
+
+        Returns:
+            The context followed by the text, from the "echo" model
+        """
+        started = time.monotonic()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        response_text, history = self._respond(text, context, session_id)
+        return GenerationResult(
+            response_text,
+            backend=self.name,
+            model="echo",
+            attempts=1,
+            history_turns=len(history),
+            latency_ms=round((time.monotonic() - started) * 1000, 3),
+        )
+
+    async def astream_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+        result: GenerationResult = None,
+    ) -> AsyncIterator[str]:
+        """
+        Echo the prompt back in chunks of chunk_words words.
+
+        Like the other backends, the turn is recorded in the session only once
+        the whole response has been streamed.
+
+        Yields:
+            Successive pieces of the echoed prompt
+        """
+        started = time.monotonic()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        history = self._session_history(session_id)
+        response_text = self._build_prompt(text, context)
+        if result is None:
+            result = GenerationResult()
+        result.update(
+            GenerationResult(
+                response_text,
+                backend=self.name,
+                model="echo",
+                attempts=1,
+                history_turns=len(history),
+            )
+        )
+
+        words = response_text.split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[i : i + self.chunk_words])
+            yield piece if i + self.chunk_words >= len(words) else piece + " "
+
+        result.latency_ms = round((time.monotonic() - started) * 1000, 3)
+        self._session_record(session_id, text, context, response_text)
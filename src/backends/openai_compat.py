@@ -0,0 +1,313 @@
+import json
+import time
+from typing import AsyncIterator, Dict, List
+import httpx
+from src.backends.base import GenerationResult, LLMBackend
+from src.metrics import UPSTREAM_DURATION, record_tokens
+from src.session_store import SessionStore
+from src.tracing import record_span, span
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Context generation settings and their chat completions parameter names.
+GENERATION_PARAMETERS = {
+    "max_output_tokens": "max_tokens",
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "stop_sequences": "stop",
+}
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Backend for servers implementing the OpenAI chat completions API.
+
+    Targets self-hosted servers such as llama.cpp's llama-server or vLLM,
+    typically on the same host, for latency-critical or high-volume contexts.
+    Requests go to POST {base_url}/chat/completions over pooled keep-alive
+    connections, so no connection setup is paid per request. Streams use the
+    server-sent "data:" lines of the same endpoint.
+
+    The system context is sent as a system message and session history as
+    earlier user/assistant messages. There is no response cache, retry or
+    failover here: a local server either answers or the error is returned.
+
+    Attributes:
+        base_url (str): Base URL of the API, e.g. "http://127.0.0.1:8080/v1".
+        model (str): Model name sent with every request.
+        timeout (float): Timeout of one request in seconds.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str = None,
+        timeout: float = 60,
+        max_connections: int = 100,
+        sessions: SessionStore = None,
+        session_token_budget: int = None,
+    ):
+        super().__init__(sessions, session_token_budget)
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client = httpx.Client(
+            base_url=self.base_url, headers=headers, timeout=timeout, limits=limits
+        )
+        self._aclient = httpx.AsyncClient(
+            base_url=self.base_url, headers=headers, timeout=timeout, limits=limits
+        )
+
+    @property
+    def models(self) -> List[str]:
+        """The configured model."""
+        return [self.model]
+
+    def _payload(
+        self,
+        text: str,
+        context: str,
+        system_context: str,
+        history: list,
+        model: str,
+        generation: dict = None,
+        stream: bool = False,
+    ) -> Dict:
+        messages = []
+        if system_context:
+            messages.append({"role": "system", "content": system_context})
+        for turn in history:
+            role = "assistant" if turn.role == "model" else turn.role
+            messages.append({"role": role, "content": turn.text})
+        messages.append({"role": "user", "content": self._build_prompt(text, context)})
+
+        payload = {"model": model or self.model, "messages": messages}
+        for name, value in (generation or {}).items():
+            if name in GENERATION_PARAMETERS:
+                payload[GENERATION_PARAMETERS[name]] = value
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    @staticmethod
+    def _record_usage(data: Dict, model_name: str, context_name: str) -> None:
+        usage = data.get("usage") or {}
+        record_tokens(
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens"),
+            model_name,
+            context_name,
+        )
+
+    def _observe(self, model_name: str, started: float, error: bool) -> None:
+        UPSTREAM_DURATION.observe(
+            time.monotonic() - started,
+            model=model_name,
+            outcome="error" if error else "ok",
+        )
+
+    def _complete(self, data: Dict, started: float, model_name: str) -> str:
+        try:
+            return data["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            self._observe(model_name, started, True)
+            raise ValueError(f"Unexpected chat completion response: {data}")
+
+    def generate_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> str:
+        """
+        Generate a response, blocking the current thread.
+
+        Args:
+            text: The main input text or question
+            context: Additional context to prepend to the text
+            system_context: System-level instructions, sent as a system message
+            system_context_name: Machine name of the system context
+            use_cache: Ignored; this backend has no response cache
+            model: Model to send instead of the configured one
+            session_id: Conversation session to continue
+            generation: Generation settings; thinking_budget is not supported
+
+        Returns:
+            The generated text
+
+        Raises:
+            httpx.HTTPError: If the server cannot be reached or returns an error
+        """
+        history = self._session_history(session_id)
+        payload = self._payload(
+            text, context, system_context, history, model, generation
+        )
+        started = time.monotonic()
+        with span("upstream", backend=self.name, model=payload["model"]):
+            try:
+                response = self._client.post("/chat/completions", json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                self._observe(payload["model"], started, True)
+                raise
+        data = response.json()
+        response_text = self._complete(data, started, payload["model"])
+        self._observe(payload["model"], started, False)
+        self._record_usage(data, payload["model"], system_context_name)
+        self._session_record(session_id, text, context, response_text)
+        return response_text
+
+    async def agenerate(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> GenerationResult:
+        """
+        Generate a response without blocking the event loop.
+
+        Takes the same arguments as generate_response.
+
+        Returns:
+            The generated text and how it was produced
+
+        Raises:
+            httpx.HTTPError: If the server cannot be reached or returns an error
+        """
+        history = self._session_history(session_id)
+        payload = self._payload(
+            text, context, system_context, history, model, generation
+        )
+        started = time.monotonic()
+        with span("upstream", backend=self.name, model=payload["model"]):
+            try:
+                response = await self._aclient.post("/chat/completions", json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                self._observe(payload["model"], started, True)
+                raise
+        data = response.json()
+        response_text = self._complete(data, started, payload["model"])
+        self._observe(payload["model"], started, False)
+        self._record_usage(data, payload["model"], system_context_name)
+        self._session_record(session_id, text, context, response_text)
+        return GenerationResult(
+            response_text,
+            backend=self.name,
+            model=data.get("model") or payload["model"],
+            attempts=1,
+            history_turns=len(history),
+            latency_ms=round((time.monotonic() - started) * 1000, 3),
+        )
+
+    async def astream_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+        result: GenerationResult = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the server chunk by chunk.
+
+        Takes the same arguments as generate_response, plus result, which is
+        filled in with the assembled text once the stream completes.
+
+        Yields:
+            Successive pieces of the generated text
+
+        Raises:
+            httpx.HTTPError: If the server cannot be reached or returns an error
+        """
+        history = self._session_history(session_id)
+        payload = self._payload(
+            text, context, system_context, history, model, generation, True
+        )
+        started = time.monotonic()
+        request = self._aclient.build_request("POST", "/chat/completions", json=payload)
+        with span("upstream", backend=self.name, model=payload["model"], stream="open"):
+            try:
+                response = await self._aclient.send(request, stream=True)
+                response.raise_for_status()
+            except httpx.HTTPStatusError:
+                await response.aclose()
+                self._observe(payload["model"], started, True)
+                raise
+            except httpx.HTTPError:
+                self._observe(payload["model"], started, True)
+                raise
+
+        if result is not None:
+            result.update(
+                GenerationResult(
+                    backend=self.name,
+                    model=payload["model"],
+                    attempts=1,
+                    history_turns=len(history),
+                )
+            )
+        chunks = []
+        usage = {}
+        streamed = time.perf_counter()
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                usage = event.get("usage") or usage
+                for choice in event.get("choices") or []:
+                    piece = (choice.get("delta") or {}).get("content")
+                    if piece:
+                        chunks.append(piece)
+                        yield piece
+        except Exception:
+            self._observe(payload["model"], started, True)
+            raise
+        finally:
+            await response.aclose()
+        self._observe(payload["model"], started, False)
+        record_span("stream", streamed, backend=self.name, model=payload["model"])
+
+        self._record_usage({"usage": usage}, payload["model"], system_context_name)
+        response_text = "".join(chunks)
+        self._session_record(session_id, text, context, response_text)
+        if result is not None:
+            result.update(
+                GenerationResult(
+                    response_text,
+                    backend=self.name,
+                    model=payload["model"],
+                    attempts=1,
+                    history_turns=len(history),
+                    latency_ms=round((time.monotonic() - started) * 1000, 3),
+                )
+            )
@@ -0,0 +1,124 @@
+from typing import Dict, List
+from src.backends.base import LLMBackend
+from src.backends.echo import EchoBackend
+from src.backends.openai_compat import OpenAICompatibleBackend
+from src.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BackendRegistry:
+    """
+    The available backends and which one answers each system context.
+
+    Attributes:
+        backends (Dict[str, LLMBackend]): Backends by name.
+        default (str): Backend used by contexts without a preference.
+        context_backends (Dict[str, str]): Preferred backend per context machine name.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, LLMBackend],
+        default: str,
+        context_backends: Dict[str, str] = None,
+    ):
+        self.backends = dict(backends)
+        self.default = default
+        self.context_backends = dict(context_backends or {})
+
+        for name in [default, *self.context_backends.values()]:
+            if name not in self.backends:
+                raise ValueError(
+                    f"Unknown LLM backend '{name}', expected one of: "
+                    f"{', '.join(self.backends)}"
+                )
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the available backends."""
+        return list(self.backends)
+
+    def get(self, name: str) -> LLMBackend:
+        """
+        Get a backend by name.
+
+        Args:
+            name: The backend name
+
+        Returns:
+            The backend
+
+        Raises:
+            KeyError: If no backend has that name
+        """
+        return self.backends[name]
+
+    def for_context(
+        self, context_name: str = None, preferred: str = None
+    ) -> LLMBackend:
+        """
+        Get the backend that answers requests using a system context.
+
+        Args:
+            context_name: The machine name of the system context
+            preferred: Backend named by the context's own settings, which takes
+                precedence over context_backends when it exists
+
+        Returns:
+            The backend the context prefers, or the default backend
+        """
+        if preferred:
+            if preferred in self.backends:
+                return self.backends[preferred]
+            logger.warning(
+                f"Ignoring unknown backend '{preferred}' of context '{context_name}'"
+            )
+        return self.backends[self.context_backends.get(context_name, self.default)]
+
+    def invalidate_context(self, context_name: str) -> None:
+        """
+        Forward a context change to every backend.
+
+        Args:
+            context_name: The machine name of the changed context
+        """
+        for backend in self.backends.values():
+            backend.invalidate_context(context_name)
+
+
+def create_backends(gemini: LLMBackend) -> BackendRegistry:
+    """
+    Build the backend registry from Config.
+
+    The Gemini service is built by the caller, as the stats endpoints need it
+    directly. The other backends share its session store, so a conversation
+    continues across backends.
+
+    Args:
+        gemini: The Gemini backend
+
+    Returns:
+        The registry with the gemini, openai and echo backends
+
+    Raises:
+        ValueError: If LLM_BACKEND or CONTEXT_BACKENDS name an unknown backend
+    """
+    backends = {
+        gemini.name: gemini,
+        OpenAICompatibleBackend.name: OpenAICompatibleBackend(
+            base_url=Config.OPENAI_BASE_URL,
+            model=Config.OPENAI_MODEL,
+            api_key=Config.OPENAI_API_KEY,
+            timeout=Config.OPENAI_TIMEOUT,
+            max_connections=Config.OPENAI_MAX_CONNECTIONS,
+            sessions=gemini.sessions,
+            session_token_budget=gemini.session_token_budget,
+        ),
+        EchoBackend.name: EchoBackend(
+            sessions=gemini.sessions,
+            session_token_budget=gemini.session_token_budget,
+        ),
+    }
+    return BackendRegistry(backends, Config.LLM_BACKEND, Config.CONTEXT_BACKENDS)
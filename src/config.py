@@ -4,6 +4,39 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def parse_mapping(value: str) -> dict:
+    """
+    Parse a "key=value,key=value" environment string into a dictionary.
+
+    Args:
+        value (str): The raw environment value. Empty or None yields an empty dict.
+
+    Returns:
+        dict: Mapping of stripped keys to stripped string values.
+    """
+    mapping = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        key, _, val = item.partition("=")
+        if key.strip():
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
+def parse_list(value: str) -> list:
+    """
+    Parse a comma-separated environment string into a list.
+
+    Args:
+        value (str): The raw environment value. Empty or None yields an empty list.
+
+    Returns:
+        list: The stripped, non-empty items in order.
+    """
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
 class Config:
     """
     Configuration class for the chat response service.
@@ -20,11 +53,381 @@ class Config:
             Defaults to "gemini-2.5-flash-lite" if not specified.
             Loaded from the LLM_MODEL environment variable.
 
+        LLM_API_KEYS (list): Pool of Gemini API keys requests are balanced over.
+            Comma-separated. Defaults to LLM_API_KEY alone.
+            Loaded from the LLM_API_KEYS environment variable.
+
+        LLM_MODELS (list): Models in failover order; the first is the primary.
+            Comma-separated. Defaults to LLM_MODEL alone.
+            Loaded from the LLM_MODELS environment variable.
+
+        LLM_BASE_URL (str): Base URL of the Gemini API, e.g. a local fake server
+            for load testing. Defaults to None, which uses the public endpoint.
+            Loaded from the LLM_BASE_URL environment variable.
+
+        LLM_BACKEND (str): Backend answering requests by default: "gemini", "openai"
+            (an OpenAI-compatible server such as llama.cpp or vLLM) or "echo" (a
+            deterministic in-process echo for offline testing). Defaults to "gemini".
+            Loaded from the LLM_BACKEND environment variable.
+
+        CONTEXT_BACKENDS (dict): Preferred backend per system context, as
+            "context=backend" pairs, e.g. "autocomplete=openai".
+            Loaded from the CONTEXT_BACKENDS environment variable.
+
+        OPENAI_BASE_URL (str): Base URL of the OpenAI-compatible API.
+            Defaults to "http://127.0.0.1:8080/v1".
+            Loaded from the OPENAI_BASE_URL environment variable.
+
+        OPENAI_API_KEY (str): Bearer token for the OpenAI-compatible API, if it
+            needs one. Loaded from the OPENAI_API_KEY environment variable.
+
+        OPENAI_MODEL (str): Model name sent to the OpenAI-compatible API.
+            Defaults to "local". Loaded from the OPENAI_MODEL environment variable.
+
+        OPENAI_TIMEOUT (float): Timeout of one OpenAI-compatible request in
+            seconds. Defaults to 60. Loaded from the OPENAI_TIMEOUT environment variable.
+
+        OPENAI_MAX_CONNECTIONS (int): Pooled connections to the OpenAI-compatible
+            server. Defaults to 100.
+            Loaded from the OPENAI_MAX_CONNECTIONS environment variable.
+
+        LLM_POOL_BENCH_SECONDS (float): How long a key is skipped for a model after
+            a quota (429) error. Defaults to 60.
+            Loaded from the LLM_POOL_BENCH_SECONDS environment variable.
+
+        LLM_POOL_MAX_IN_FLIGHT (int): Concurrent calls per key and model before that
+            pair counts as saturated and traffic moves on. 0 means unlimited.
+            Defaults to 0. Loaded from the LLM_POOL_MAX_IN_FLIGHT environment variable.
+
+        LLM_MODEL_TIERS (dict): Model routing tiers, cheapest first, as
+            "tier=model" pairs, e.g. "fast=gemini-2.5-flash-lite,strong=gemini-2.5-pro".
+            Tier models join the upstream pool. Empty disables routing.
+            Loaded from the LLM_MODEL_TIERS environment variable.
+
+        CONTEXT_TIERS (dict): Minimum routing tier per system context, as
+            "context=tier" pairs. Loaded from the CONTEXT_TIERS environment variable.
+
+        LLM_ROUTER_CHAR_THRESHOLDS (list): Prompt sizes in characters (text plus
+            context) at which a request moves up one tier. Defaults to "2000,8000".
+            Loaded from the LLM_ROUTER_CHAR_THRESHOLDS environment variable.
+
+        LLM_ROUTER_MAX_ERROR_RATE (float): Error rate above which the router skips
+            a model for the next tier up. Defaults to 0.5.
+            Loaded from the LLM_ROUTER_MAX_ERROR_RATE environment variable.
+
+        LLM_ROUTER_LATENCY_SLO (float): Observed latency in seconds above which the
+            router skips a model for the next tier up. 0 disables the check.
+            Defaults to 0. Loaded from the LLM_ROUTER_LATENCY_SLO environment variable.
+
+        SESSION_MAX_TURNS (int): Turns kept per conversation session; older turns
+            fall off. Defaults to 20. Loaded from the SESSION_MAX_TURNS environment variable.
+
+        SESSION_MAX_SESSIONS (int): Maximum number of sessions kept in memory; least
+            recently used sessions are evicted first. Defaults to 10000.
+            Loaded from the SESSION_MAX_SESSIONS environment variable.
+
+        SESSION_MAX_BYTES (int): Approximate memory cap over all sessions, in bytes.
+            Defaults to 64 MiB. Loaded from the SESSION_MAX_BYTES environment variable.
+
+        SESSION_IDLE_TTL (float): Seconds after which an unused session is dropped.
+            Defaults to 3600. Loaded from the SESSION_IDLE_TTL environment variable.
+
+        SESSION_HISTORY_TOKEN_BUDGET (int): Estimated tokens of session history sent
+            with a request; the oldest turns are left out first. 0 sends every kept
+            turn. Defaults to 4000.
+            Loaded from the SESSION_HISTORY_TOKEN_BUDGET environment variable.
+
+        CONTEXT_TOKEN_BUDGET (int): Input token budget of a request's text and
+            context. A context that does not fit is trimmed before the call,
+            keeping its first and newest lines and dropping the middle; a text
+            that alone exceeds the budget is rejected with 413. 0 disables the
+            budget. Defaults to 0.
+            Loaded from the CONTEXT_TOKEN_BUDGET environment variable.
+
+        CONTEXT_TOKEN_BUDGETS (dict): Per-context budget overrides, as
+            "context=tokens" pairs. Loaded from the CONTEXT_TOKEN_BUDGETS environment variable.
+
+        TOKEN_COUNT_EXACT (bool): Whether a context whose estimated size is close
+            to its budget is counted exactly with the Gemini count-tokens API
+            before deciding to trim it. Defaults to False.
+            Loaded from the TOKEN_COUNT_EXACT environment variable.
+
+        TOKEN_COUNT_MARGIN (float): How close to the budget, as a fraction of it,
+            an estimate must be to be counted exactly. Defaults to 0.25.
+            Loaded from the TOKEN_COUNT_MARGIN environment variable.
+
+        TOKEN_COUNT_CACHE_SIZE (int): Maximum number of exact token counts cached.
+            Defaults to 4096. Loaded from the TOKEN_COUNT_CACHE_SIZE environment variable.
+
+        METRICS_ENABLED (bool): Whether request metrics are collected and exposed
+            on /metrics in the Prometheus text format. Defaults to True.
+            Loaded from the METRICS_ENABLED environment variable.
+
+        TRACE_ENABLED (bool): Whether requests are traced. Traced responses carry
+            Server-Timing and X-Trace-Id headers. Defaults to True.
+            Loaded from the TRACE_ENABLED environment variable.
+
+        TRACE_SLOW_THRESHOLD (float): Request duration in seconds from which a
+            trace is kept in the slow trace log. Defaults to 1.0.
+            Loaded from the TRACE_SLOW_THRESHOLD environment variable.
+
+        TRACE_RING_SIZE (int): Number of slow traces kept; the oldest is dropped
+            first. Defaults to 100. Loaded from the TRACE_RING_SIZE environment variable.
+
+        LLM_MAX_CONCURRENCY (int): Maximum number of upstream Gemini calls that
+            may be in flight at once from the async code path. Additional requests
+            wait for a free slot. A value of 0 or less disables the cap.
+            Defaults to 64. Loaded from the LLM_MAX_CONCURRENCY environment variable.
+
+        LLM_COALESCE_REQUESTS (bool): Whether identical requests that arrive while
+            one is already in flight wait for its result instead of issuing their
+            own upstream call. Works independently of the response caches.
+            Defaults to True. Loaded from the LLM_COALESCE_REQUESTS environment variable.
+
+        LLM_REQUEST_TIMEOUT (float): Time budget of one chat request in seconds,
+            including retries. No retry is started that would exceed it, and async
+            attempts are cancelled when it runs out. 0 disables the budget.
+            Defaults to 30. Loaded from the LLM_REQUEST_TIMEOUT environment variable.
+
+        LLM_RETRY_MAX_ATTEMPTS (int): Attempts per upstream call, including the first,
+            for transient errors (429, 5xx, timeouts, connection errors).
+            Defaults to 3. Loaded from the LLM_RETRY_MAX_ATTEMPTS environment variable.
+
+        LLM_RETRY_BASE_DELAY (float): Base of the exponential retry backoff in seconds.
+            Defaults to 0.25. Loaded from the LLM_RETRY_BASE_DELAY environment variable.
+
+        LLM_RETRY_MAX_DELAY (float): Cap of the retry backoff in seconds.
+            Defaults to 4. Loaded from the LLM_RETRY_MAX_DELAY environment variable.
+
+        LLM_BREAKER_FAILURE_THRESHOLD (int): Consecutive transient failures that open
+            the circuit breaker. Defaults to 5.
+            Loaded from the LLM_BREAKER_FAILURE_THRESHOLD environment variable.
+
+        LLM_BREAKER_RESET_TIMEOUT (float): Seconds the circuit breaker stays open
+            before letting trial calls through. Defaults to 30.
+            Loaded from the LLM_BREAKER_RESET_TIMEOUT environment variable.
+
+        LLM_BREAKER_HALF_OPEN_CALLS (int): Concurrent trial calls allowed while the
+            breaker is half-open. Defaults to 1.
+            Loaded from the LLM_BREAKER_HALF_OPEN_CALLS environment variable.
+
+        LLM_HEDGE_ENABLED (bool): Whether slow async upstream calls are hedged with
+            an identical backup call, taking whichever finishes first.
+            Defaults to False. Loaded from the LLM_HEDGE_ENABLED environment variable.
+
+        LLM_HEDGE_QUANTILE (float): Observed latency quantile per model after which
+            a call is hedged. Defaults to 0.95.
+            Loaded from the LLM_HEDGE_QUANTILE environment variable.
+
+        LLM_HEDGE_BUDGET (float): Maximum fraction of calls that may be hedged.
+            Defaults to 0.05. Loaded from the LLM_HEDGE_BUDGET environment variable.
+
+        LLM_HEDGE_MIN_DELAY (float): Minimum hedge delay in seconds.
+            Defaults to 0.05. Loaded from the LLM_HEDGE_MIN_DELAY environment variable.
+
+        GEMINI_CONTEXT_CACHE_ENABLED (bool): Whether large system contexts are
+            uploaded once as Gemini cached content and referenced by name instead of
+            being re-sent with every request. Defaults to False.
+            Loaded from the GEMINI_CONTEXT_CACHE_ENABLED environment variable.
+
+        GEMINI_CONTEXT_CACHE_TTL (int): Lifetime of Gemini cached content in seconds.
+            Handles are refreshed shortly before they expire. Defaults to 3600.
+            Loaded from the GEMINI_CONTEXT_CACHE_TTL environment variable.
+
+        GEMINI_CONTEXT_CACHE_MIN_CHARS (int): System contexts shorter than this are
+            always sent inline, since Gemini requires a minimum token count for
+            cached content. Defaults to 4096.
+            Loaded from the GEMINI_CONTEXT_CACHE_MIN_CHARS environment variable.
+
+        ADMISSION_MAX_ACTIVE (int): Maximum number of chat requests processed at
+            once; further requests wait in the admission queue. 0 or less disables
+            admission queueing. Defaults to 128.
+            Loaded from the ADMISSION_MAX_ACTIVE environment variable.
+
+        ADMISSION_MAX_QUEUE (int): Maximum number of chat requests waiting for
+            admission before new ones are rejected with 503. Defaults to 512.
+            Loaded from the ADMISSION_MAX_QUEUE environment variable.
+
+        ADMISSION_QUEUE_TIMEOUT (float): Longest a request may wait for admission,
+            in seconds. Requests whose estimated wait is longer are rejected right
+            away with 503 and Retry-After. Defaults to 10.
+            Loaded from the ADMISSION_QUEUE_TIMEOUT environment variable.
+
+        ADMISSION_RATE_LIMIT (float): Chat requests per second allowed per client
+            (X-Client-Id header, or the client address). 0 disables rate limiting.
+            Defaults to 0. Loaded from the ADMISSION_RATE_LIMIT environment variable.
+
+        ADMISSION_RATE_BURST (float): Burst size of the per-client rate limit.
+            Defaults to 20. Loaded from the ADMISSION_RATE_BURST environment variable.
+
+        CONTEXT_REFRESH_INTERVAL (float): How often, in seconds, the contexts
+            directory is checked for files changed outside of the API. Contexts
+            are otherwise served from memory. A value of 0 disables the watcher.
+            Defaults to 2. Loaded from the CONTEXT_REFRESH_INTERVAL environment variable.
+
+        CONTEXT_TEMPLATE_CACHE_SIZE (int): Maximum number of rendered variants
+            memoized per context template. Defaults to 256.
+            Loaded from the CONTEXT_TEMPLATE_CACHE_SIZE environment variable.
+
+        CONTEXT_STORE (str): Where contexts are kept: "file" for one Markdown
+            file each in the contexts directory, or "sqlite" for a SQLite
+            database. A new database is seeded with the existing files.
+            Defaults to "file". Loaded from the CONTEXT_STORE environment variable.
+
+        CONTEXT_STORE_PATH (str): Path of the SQLite database. Defaults to
+            contexts/contexts.sqlite3. Loaded from the CONTEXT_STORE_PATH environment variable.
+
+        CONTEXT_LIST_PAGE_SIZE (int): Contexts listed per page when a request
+            passes a cursor but no limit. Requests with neither are not paged.
+            Defaults to 100.
+            Loaded from the CONTEXT_LIST_PAGE_SIZE environment variable.
+
+        RESPONSE_CACHE_ENABLED (bool): Whether identical requests are answered
+            from an in-memory response cache. Defaults to False.
+            Loaded from the RESPONSE_CACHE_ENABLED environment variable.
+
+        RESPONSE_CACHE_MAX_ENTRIES (int): Maximum number of cached responses.
+            Defaults to 10000. Loaded from the RESPONSE_CACHE_MAX_ENTRIES environment variable.
+
+        RESPONSE_CACHE_MAX_BYTES (int): Maximum total size of cached responses in bytes.
+            Defaults to 67108864 (64 MiB). Loaded from the RESPONSE_CACHE_MAX_BYTES
+            environment variable.
+
+        RESPONSE_CACHE_TTL (float): Lifetime of a cached response in seconds.
+            Defaults to 300. Loaded from the RESPONSE_CACHE_TTL environment variable.
+
+        RESPONSE_CACHE_CONTEXT_TTLS (dict): Per-context TTL overrides in seconds,
+            given as "context=seconds,other=seconds". A TTL of 0 disables caching
+            for that context. Loaded from the RESPONSE_CACHE_CONTEXT_TTLS environment variable.
+
+        SIMILARITY_CACHE_ENABLED (bool): Whether prompts that only differ in
+            casing, punctuation, emoji or filler words are answered from a
+            near-duplicate cache. Uses RESPONSE_CACHE_TTL and
+            RESPONSE_CACHE_CONTEXT_TTLS for expiry. Defaults to False.
+            Loaded from the SIMILARITY_CACHE_ENABLED environment variable.
+
+        SIMILARITY_CACHE_MAX_DISTANCE (int): Largest Hamming distance between
+            64-bit prompt fingerprints that still counts as a match. Lower is
+            stricter; 0 only matches identical normalized prompts. Defaults to 3.
+            Loaded from the SIMILARITY_CACHE_MAX_DISTANCE environment variable.
+
+        SIMILARITY_CACHE_MAX_ENTRIES (int): Maximum number of near-duplicate entries.
+            Defaults to 100000. Loaded from the SIMILARITY_CACHE_MAX_ENTRIES environment variable.
+
+        SIMILARITY_CACHE_MAX_BYTES (int): Maximum total size of responses held by the
+            near-duplicate cache in bytes. Defaults to 67108864 (64 MiB).
+            Loaded from the SIMILARITY_CACHE_MAX_BYTES environment variable.
+
+        CHAT_BATCH_CONCURRENCY (int): Maximum number of items of a single batch
+            request that are generated concurrently. Defaults to 8.
+            Loaded from the CHAT_BATCH_CONCURRENCY environment variable.
+
+        CHAT_BATCH_MAX_SIZE (int): Maximum number of requests accepted in one batch.
+            Defaults to 100. Loaded from the CHAT_BATCH_MAX_SIZE environment variable.
+
     Example:
         Environment variables in .env file:
             LLM_API_KEY=your_api_key_here
             LLM_MODEL=gemini-2.5-flash-lite
+            LLM_MAX_CONCURRENCY=64
     """
 
     LLM_API_KEY = os.getenv("LLM_API_KEY")
     LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash-lite")
+    LLM_API_KEYS = parse_list(os.getenv("LLM_API_KEYS")) or (
+        [LLM_API_KEY] if LLM_API_KEY else []
+    )
+    LLM_MODELS = parse_list(os.getenv("LLM_MODELS")) or [LLM_MODEL]
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    CONTEXT_BACKENDS = parse_mapping(os.getenv("CONTEXT_BACKENDS"))
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:8080/v1")
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "local")
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    LLM_POOL_BENCH_SECONDS = float(os.getenv("LLM_POOL_BENCH_SECONDS", "60"))
+    LLM_POOL_MAX_IN_FLIGHT = int(os.getenv("LLM_POOL_MAX_IN_FLIGHT", "0"))
+    LLM_MODEL_TIERS = parse_mapping(os.getenv("LLM_MODEL_TIERS"))
+    CONTEXT_TIERS = parse_mapping(os.getenv("CONTEXT_TIERS"))
+    LLM_ROUTER_CHAR_THRESHOLDS = [
+        int(size)
+        for size in parse_list(os.getenv("LLM_ROUTER_CHAR_THRESHOLDS", "2000,8000"))
+    ]
+    LLM_ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+    LLM_ROUTER_LATENCY_SLO = float(os.getenv("LLM_ROUTER_LATENCY_SLO", "0"))
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+    SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+    SESSION_HISTORY_TOKEN_BUDGET = int(
+        os.getenv("SESSION_HISTORY_TOKEN_BUDGET", "4000")
+    )
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0"))
+    CONTEXT_TOKEN_BUDGETS = {
+        name: int(tokens)
+        for name, tokens in parse_mapping(os.getenv("CONTEXT_TOKEN_BUDGETS")).items()
+    }
+    TOKEN_COUNT_EXACT = os.getenv("TOKEN_COUNT_EXACT", "false").lower() == "true"
+    TOKEN_COUNT_MARGIN = float(os.getenv("TOKEN_COUNT_MARGIN", "0.25"))
+    TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "1.0"))
+    TRACE_RING_SIZE = int(os.getenv("TRACE_RING_SIZE", "100"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    LLM_COALESCE_REQUESTS = os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true"
+    LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+    LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.25"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "4"))
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))
+    LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1"))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+    LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.05"))
+    GEMINI_CONTEXT_CACHE_ENABLED = (
+        os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "false").lower() == "true"
+    )
+    GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+    GEMINI_CONTEXT_CACHE_MIN_CHARS = int(
+        os.getenv("GEMINI_CONTEXT_CACHE_MIN_CHARS", "4096")
+    )
+    ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "128"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "512"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+    ADMISSION_RATE_LIMIT = float(os.getenv("ADMISSION_RATE_LIMIT", "0"))
+    ADMISSION_RATE_BURST = float(os.getenv("ADMISSION_RATE_BURST", "20"))
+    CONTEXT_REFRESH_INTERVAL = float(os.getenv("CONTEXT_REFRESH_INTERVAL", "2"))
+    CONTEXT_TEMPLATE_CACHE_SIZE = int(os.getenv("CONTEXT_TEMPLATE_CACHE_SIZE", "256"))
+    CONTEXT_STORE = os.getenv("CONTEXT_STORE", "file").lower()
+    CONTEXT_STORE_PATH = os.getenv("CONTEXT_STORE_PATH", "")
+    CONTEXT_LIST_PAGE_SIZE = int(os.getenv("CONTEXT_LIST_PAGE_SIZE", "100"))
+    CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+    CHAT_BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", "100"))
+
+    RESPONSE_CACHE_ENABLED = (
+        os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    )
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+    RESPONSE_CACHE_MAX_BYTES = int(
+        os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_CACHE_CONTEXT_TTLS = {
+        name: float(ttl)
+        for name, ttl in parse_mapping(os.getenv("RESPONSE_CACHE_CONTEXT_TTLS")).items()
+    }
+
+    SIMILARITY_CACHE_ENABLED = (
+        os.getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true"
+    )
+    SIMILARITY_CACHE_MAX_DISTANCE = int(os.getenv("SIMILARITY_CACHE_MAX_DISTANCE", "3"))
+    SIMILARITY_CACHE_MAX_ENTRIES = int(
+        os.getenv("SIMILARITY_CACHE_MAX_ENTRIES", "100000")
+    )
+    SIMILARITY_CACHE_MAX_BYTES = int(
+        os.getenv("SIMILARITY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
@@ -0,0 +1,278 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+from google.genai import types
+from src.singleflight import SingleFlight
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Handle:
+    """A Gemini cached-content resource created for one system context."""
+
+    __slots__ = ("name", "expires_at", "context_name")
+
+    def __init__(self, name: str, expires_at: float, context_name: str):
+        self.name = name
+        self.expires_at = expires_at
+        self.context_name = context_name
+
+
+class GeminiContextCache:
+    """
+    Manages Gemini server-side cached content for system contexts.
+
+    Large system contexts are uploaded once as a cached-content resource per
+    (model, context hash) and referenced by name in later requests, so the
+    instructions are neither re-sent nor re-processed on every call. Handles
+    are refreshed before their TTL runs out and dropped (and deleted upstream)
+    when the context they were built from changes.
+
+    Any failure to create or refresh a handle is logged and reported as a miss,
+    so callers fall back to sending the instructions inline. Failed contexts are
+    not retried until failure_backoff seconds have passed.
+
+    Attributes:
+        client: The genai client (or a compatible fake) used to manage caches.
+        ttl (int): Lifetime requested for cached content, in seconds.
+        refresh_margin (int): Handles expiring within this many seconds are
+            refreshed before use.
+        min_chars (int): System contexts shorter than this are never cached;
+            Gemini rejects cached content below a minimum token count.
+        failure_backoff (float): Seconds to wait before retrying a context whose
+            cache creation failed.
+    """
+
+    def __init__(
+        self,
+        client,
+        ttl: int = 3600,
+        refresh_margin: int = 300,
+        min_chars: int = 4096,
+        failure_backoff: float = 300,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl // 2)
+        self.min_chars = min_chars
+        self.failure_backoff = failure_backoff
+
+        self._handles: Dict[tuple, _Handle] = {}
+        self._failed_until: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+
+    @staticmethod
+    def key_for(model_name: str, system_context: str) -> tuple:
+        """
+        Build the handle key for a model and system context.
+
+        Args:
+            model_name: The model the cached content is created for
+            system_context: The system context content
+
+        Returns:
+            Tuple of model name and content hash
+        """
+        return model_name, hashlib.sha256(system_context.encode("utf-8")).hexdigest()
+
+    def _usable(self, key: tuple, system_context: str, now: float) -> bool:
+        if len(system_context) < self.min_chars:
+            return False
+        return self._failed_until.get(key, 0) <= now
+
+    def _create_config(self, system_context: str, context_name: str):
+        return types.CreateCachedContentConfig(
+            system_instruction=system_context,
+            ttl=f"{self.ttl}s",
+            display_name=f"context-{context_name or 'inline'}"[:128],
+        )
+
+    def _update_config(self):
+        return types.UpdateCachedContentConfig(ttl=f"{self.ttl}s")
+
+    def _fresh(self, key: tuple, now: float) -> Optional[_Handle]:
+        handle = self._handles.get(key)
+        if handle is not None and handle.expires_at - now > self.refresh_margin:
+            return handle
+        return None
+
+    def _record_failure(self, key: tuple, context_name: str, e: Exception) -> None:
+        self.failures += 1
+        self._failed_until[key] = time.monotonic() + self.failure_backoff
+        logger.warning(
+            f"Context cache unavailable for '{context_name}', sending instructions inline: {e}"
+        )
+
+    def get(
+        self, model_name: str, system_context: str, context_name: str = None
+    ) -> Optional[str]:
+        """
+        Get a cached-content name for a system context, creating it if needed.
+
+        Args:
+            model_name: The model the request will be sent to
+            system_context: The system context content
+            context_name: The machine name of the context, used for invalidation
+
+        Returns:
+            The cached-content resource name, or None to send instructions inline
+        """
+        key = self.key_for(model_name, system_context)
+        now = time.monotonic()
+        if not self._usable(key, system_context, now):
+            return None
+        handle = self._fresh(key, now)
+        if handle is not None:
+            return handle.name
+
+        with self._lock:
+            handle = self._fresh(key, time.monotonic())
+            if handle is not None:
+                return handle.name
+            try:
+                handle = self._handles.get(key)
+                if handle is not None and handle.expires_at > time.monotonic():
+                    try:
+                        self.client.caches.update(
+                            name=handle.name, config=self._update_config()
+                        )
+                        return self._store_refresh(handle)
+                    except Exception as e:
+                        logger.warning(
+                            f"Refreshing cached content {handle.name} failed: {e}"
+                        )
+
+                cached = self.client.caches.create(
+                    model=model_name,
+                    config=self._create_config(system_context, context_name),
+                )
+                return self._store_created(key, cached.name, context_name)
+            except Exception as e:
+                self._record_failure(key, context_name, e)
+                return None
+
+    async def aget(
+        self, model_name: str, system_context: str, context_name: str = None
+    ) -> Optional[str]:
+        """
+        Async variant of get, using the genai async client.
+
+        Concurrent requests for the same context share a single create or
+        refresh call.
+
+        Args:
+            model_name: The model the request will be sent to
+            system_context: The system context content
+            context_name: The machine name of the context, used for invalidation
+
+        Returns:
+            The cached-content resource name, or None to send instructions inline
+        """
+        key = self.key_for(model_name, system_context)
+        now = time.monotonic()
+        if not self._usable(key, system_context, now):
+            return None
+        handle = self._fresh(key, now)
+        if handle is not None:
+            return handle.name
+
+        async def ensure():
+            try:
+                handle = self._handles.get(key)
+                if handle is not None and handle.expires_at > time.monotonic():
+                    try:
+                        await self.client.aio.caches.update(
+                            name=handle.name, config=self._update_config()
+                        )
+                        return self._store_refresh(handle)
+                    except Exception as e:
+                        logger.warning(
+                            f"Refreshing cached content {handle.name} failed: {e}"
+                        )
+
+                cached = await self.client.aio.caches.create(
+                    model=model_name,
+                    config=self._create_config(system_context, context_name),
+                )
+                return self._store_created(key, cached.name, context_name)
+            except Exception as e:
+                self._record_failure(key, context_name, e)
+                return None
+
+        return await self._flights.ado("|".join(key), ensure)
+
+    def _store_refresh(self, handle: _Handle) -> str:
+        handle.expires_at = time.monotonic() + self.ttl
+        self.refreshed += 1
+        return handle.name
+
+    def _store_created(self, key: tuple, name: str, context_name: str) -> str:
+        self._handles[key] = _Handle(name, time.monotonic() + self.ttl, context_name)
+        self._failed_until.pop(key, None)
+        self.created += 1
+        logger.info(f"Created cached content {name} for context '{context_name}'")
+        return name
+
+    def drop(self, model_name: str, system_context: str) -> None:
+        """
+        Forget the handle for a model and system context.
+
+        Used when Gemini rejects a handle, e.g. because it expired server-side.
+
+        Args:
+            model_name: The model the handle was created for
+            system_context: The system context content
+        """
+        self._handles.pop(self.key_for(model_name, system_context), None)
+
+    def invalidate_context(self, context_name: str) -> None:
+        """
+        Drop every handle built from a context and delete it upstream.
+
+        Upstream deletion happens in a background thread and is best effort;
+        anything left behind expires with its TTL.
+
+        Args:
+            context_name: The machine name of the changed context
+        """
+        stale = [
+            key
+            for key, handle in list(self._handles.items())
+            if handle.context_name == context_name
+        ]
+        names = [self._handles.pop(key).name for key in stale if key in self._handles]
+        if not names:
+            return
+
+        logger.info(f"Dropping {len(names)} cached contents for '{context_name}'")
+        threading.Thread(
+            target=self._delete, args=(names,), name="context-cache-delete", daemon=True
+        ).start()
+
+    def _delete(self, names) -> None:
+        for name in names:
+            try:
+                self.client.caches.delete(name=name)
+            except Exception as e:
+                logger.warning(f"Deleting cached content {name} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get context cache counters.
+
+        Returns:
+            Dictionary with handles, created, refreshed and failures
+        """
+        return {
+            "handles": len(self._handles),
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+        }
@@ -1,18 +1,222 @@
+import bisect
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Callable, Collection, List, Dict, Optional, Tuple
 import logging
+from src.config import Config
+from src.context_settings import DEFAULT_SETTINGS, ContextSettings, parse_context
+from src.context_store import ContextStore, StoredContext, content_hash, create_store
+from src.context_template import ContextTemplate
 
 logger = logging.getLogger(__name__)
 
 
-class ContextManager:
-    """Manages system context files in the contexts directory."""
+class ContextPreconditionFailed(Exception):
+    """
+    Raised when a conditional write finds a different version of a context.
+
+    Attributes:
+        current_hash: Hash of the stored version, or None if the context does
+            not exist.
+    """
+
+    def __init__(self, message: str, current_hash: Optional[str] = None):
+        super().__init__(message)
+        self.current_hash = current_hash
+
+
+@dataclass
+class ContextEntry:
+    """
+    In-memory copy of a single context.
+
+    Attributes:
+        machine_name: The machine name of the context (the file stem).
+        file_path: Path of the backing Markdown file, or None if the context
+            is not kept in a file.
+        content: The full content of the context.
+        stamp: The store's change stamp when the context was last read.
+        size: Size of the content in bytes.
+        hash: SHA-256 hex digest of the content.
+        updated_at: When the context was last written, as a Unix timestamp.
+        body: The content without its front-matter, sent as system instructions.
+        settings: Generation settings from the front-matter.
+        template: The body compiled for variable substitution.
+    """
+
+    machine_name: str
+    file_path: Optional[str]
+    content: str
+    stamp: Any
+    size: int
+    hash: str
+    updated_at: float
+    body: str = ""
+    settings: ContextSettings = DEFAULT_SETTINGS
+    template: Optional[ContextTemplate] = None
+
 
-    def __init__(self, contexts_dir: str = "contexts"):
+class ContextManager:
+    """
+    Manages system contexts kept in a context store.
+
+    Contexts are loaded into memory once and served from there, so reads on the
+    request path do not touch the disk. Where they are persisted depends on the
+    store (see CONTEXT_STORE): Markdown files in the contexts directory, or a
+    SQLite database. Changes made through create_context and delete_context
+    update the in-memory copy directly. Changes made by other means (for
+    example files edited on a mounted volume) are picked up by a background
+    watcher that asks the store for changes every refresh_interval seconds.
+
+    Machine names are also kept in a sorted index, so list_contexts pages
+    through them by prefix without sorting or copying every context.
+
+    The SHA-256 hash of a context's content identifies its version. The API
+    uses it as the ETag of the context, and put_context can make a write
+    conditional on the version the client last saw.
+
+    A file may start with YAML front-matter holding generation settings (see
+    ContextSettings). It is parsed once when the file is loaded; requests get
+    the body without it.
+
+    The body may hold "{{ name }}" placeholders (see ContextTemplate), so one
+    file can serve variants that differ only in a few values. It is compiled
+    when the file is loaded and rendered with the variables of each request.
+    """
+
+    def __init__(
+        self,
+        contexts_dir: str = "contexts",
+        refresh_interval: float = None,
+        store: ContextStore = None,
+    ):
         self.contexts_dir = Path(contexts_dir)
         self.contexts_dir.mkdir(exist_ok=True)
-        logger.info(f"Context manager initialized with directory: {self.contexts_dir}")
+        if refresh_interval is None:
+            refresh_interval = Config.CONTEXT_REFRESH_INTERVAL
+        self.refresh_interval = refresh_interval
+        self.store = store if store is not None else create_store(contexts_dir)
+
+        self._entries: Dict[str, ContextEntry] = {}
+        self._names: List[str] = []
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+        self.refresh(force=True)
+        if self.refresh_interval > 0:
+            self._watcher = threading.Thread(
+                target=self._watch, name="context-watcher", daemon=True
+            )
+            self._watcher.start()
+
+        logger.info(
+            f"Context manager initialized with {len(self._entries)} contexts"
+            f" from the {self.store.name} store"
+        )
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback invoked whenever a context changes.
+
+        The callback receives the machine name of a context that was created,
+        rewritten or deleted, whether through this manager or on disk.
+
+        Args:
+            callback: Function accepting the machine name of the changed context
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, machine_name: str) -> None:
+        for callback in self._listeners:
+            try:
+                callback(machine_name)
+            except Exception as e:
+                logger.error(f"Context listener failed for '{machine_name}': {e}")
+
+    def _load_entry(self, stored: StoredContext) -> ContextEntry:
+        content = stored.content
+        try:
+            settings, body = parse_context(content)
+        except ValueError as e:
+            logger.error(
+                f"Ignoring front-matter of context '{stored.machine_name}': {e}"
+            )
+            settings, body = DEFAULT_SETTINGS, content
+        return ContextEntry(
+            machine_name=stored.machine_name,
+            file_path=stored.file_path,
+            content=content,
+            stamp=stored.stamp,
+            size=stored.size,
+            hash=stored.hash,
+            updated_at=stored.updated_at,
+            body=body,
+            settings=settings,
+            template=ContextTemplate(body, Config.CONTEXT_TEMPLATE_CACHE_SIZE),
+        )
+
+    def _put_entry(self, entry: ContextEntry) -> None:
+        if entry.machine_name not in self._entries:
+            bisect.insort(self._names, entry.machine_name)
+        self._entries[entry.machine_name] = entry
+
+    def _drop_entry(self, machine_name: str) -> None:
+        if self._entries.pop(machine_name, None) is not None:
+            index = bisect.bisect_left(self._names, machine_name)
+            del self._names[index]
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Ask the store for changes and reload any changed contexts.
+
+        Only contexts whose change stamp differs from the in-memory copy are
+        read again. Listeners are notified for every context that was added,
+        changed or removed.
+
+        Args:
+            force: Compare every stamp even if the store reports no changes
+        """
+        changed = []
+
+        with self._lock:
+            stamps = self.store.scan(force=force)
+            if stamps is None:
+                return
+
+            for machine_name, stamp in stamps.items():
+                current = self._entries.get(machine_name)
+                if current is not None and current.stamp == stamp:
+                    continue
+                stored = self.store.read(machine_name)
+                if stored is None:
+                    continue
+                self._put_entry(self._load_entry(stored))
+                changed.append(machine_name)
+
+            for machine_name in list(self._entries):
+                if machine_name not in stamps:
+                    self._drop_entry(machine_name)
+                    changed.append(machine_name)
+
+        for machine_name in changed:
+            logger.info(f"Detected change to context '{machine_name}'")
+            self._notify(machine_name)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing contexts: {e}")
+
+    def close(self) -> None:
+        """Stop the background watcher thread and close the store."""
+        self._stop.set()
+        self.store.close()
 
     @staticmethod
     def normalize_name(name: str) -> str:
@@ -36,20 +240,18 @@ class ContextManager:
 
         Args:
             name: The display name for the context
-            content: The context content to store
+            content: The context content to store, optionally starting with
+                front-matter settings
 
         Returns:
             Dictionary with machine_name and message
 
         Raises:
-            ValueError: If name or content is empty
+            ValueError: If name or content is empty, or the front-matter is invalid
         """
         if not name or not name.strip():
             raise ValueError("Context name cannot be empty")
 
-        if not content or not content.strip():
-            raise ValueError("Context content cannot be empty")
-
         machine_name = self.normalize_name(name)
 
         if not machine_name:
@@ -57,33 +259,123 @@ class ContextManager:
                 "Context name must contain at least one alphanumeric character"
             )
 
-        file_path = self.contexts_dir / f"{machine_name}.md"
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
-
-        logger.info(f"Created context '{machine_name}' at {file_path}")
+        self.put_context(machine_name, content)
 
         return {
             "machine_name": machine_name,
             "message": f"Context '{machine_name}' created successfully",
         }
 
-    def list_contexts(self) -> List[Dict[str, str]]:
+    def put_context(
+        self,
+        machine_name: str,
+        content: str,
+        if_match: Collection[str] = None,
+        if_none_match: Collection[str] = None,
+    ) -> Tuple[ContextEntry, bool]:
         """
-        List all available context files.
+        Create or replace a context, optionally only if it is at a known version.
+
+        The conditions are checked against the stored version, not the
+        in-memory copy, so a change made by another process that the watcher
+        has not picked up yet still fails them. Writing the content a context
+        already has does not touch the store or notify listeners.
+
+        Args:
+            machine_name: The machine name of the context
+            content: The context content to store, optionally starting with
+                front-matter settings
+            if_match: Only write if the stored version has one of these hashes;
+                "*" matches any existing version
+            if_none_match: Only write if the stored version has none of these
+                hashes; "*" matches any existing version, so it only allows
+                creating the context
 
         Returns:
-            List of dictionaries containing machine_name and file_path for each context
+            The context entry and whether the content changed
+
+        Raises:
+            ValueError: If content is empty, or the front-matter is invalid
+            ContextPreconditionFailed: If a condition does not hold
         """
-        contexts = []
+        if not content or not parse_context(content)[1].strip():
+            raise ValueError("Context content cannot be empty")
 
-        for file_path in self.contexts_dir.glob("*.md"):
-            machine_name = file_path.stem
-            contexts.append({"machine_name": machine_name, "file_path": str(file_path)})
+        with self._lock:
+            current = self._entries.get(machine_name)
+            if if_match is not None or if_none_match is not None:
+                stored = self.store.read(machine_name)
+                current_hash = stored.hash if stored is not None else None
+                if if_match is not None and not (
+                    current_hash is not None
+                    and ("*" in if_match or current_hash in if_match)
+                ):
+                    raise ContextPreconditionFailed(
+                        f"Context '{machine_name}' does not match If-Match",
+                        current_hash,
+                    )
+                if if_none_match is not None and (
+                    current_hash is not None
+                    and ("*" in if_none_match or current_hash in if_none_match)
+                ):
+                    raise ContextPreconditionFailed(
+                        f"Context '{machine_name}' matches If-None-Match",
+                        current_hash,
+                    )
+                if current is not None and current.hash != current_hash:
+                    current = None
+
+            if current is not None and current.hash == content_hash(content):
+                return current, False
+
+            entry = self._load_entry(self.store.write(machine_name, content))
+            self._put_entry(entry)
+
+        logger.info(f"Saved context '{machine_name}' in the {self.store.name} store")
+        self._notify(machine_name)
+        return entry, True
+
+    def list_contexts(
+        self, prefix: str = "", cursor: str = None, limit: int = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List available contexts, sorted by machine name.
 
-        logger.info(f"Found {len(contexts)} contexts")
-        return contexts
+        Args:
+            prefix: Only list contexts whose machine name starts with this
+            cursor: Only list contexts after this machine name, as returned in
+                the previous page
+            limit: Maximum number of contexts to list; None for all
+
+        Returns:
+            The page of contexts, as dictionaries with the machine_name,
+            file_path, size, hash and updated_at of each, and the cursor of
+            the next page (None on the last page)
+        """
+        with self._lock:
+            start = bisect.bisect_left(self._names, prefix)
+            if cursor is not None:
+                start = max(start, bisect.bisect_right(self._names, cursor))
+            end = len(self._names)
+            if prefix:
+                end = bisect.bisect_left(self._names, prefix + "\U0010ffff", start)
+            stop = end if limit is None else min(end, start + limit)
+            entries = [self._entries[name] for name in self._names[start:stop]]
+
+        contexts = [
+            {
+                "machine_name": entry.machine_name,
+                "file_path": entry.file_path,
+                "size": entry.size,
+                "hash": entry.hash,
+                "updated_at": entry.updated_at,
+            }
+            for entry in entries
+        ]
+        next_cursor = entries[-1].machine_name if entries and stop < end else None
+
+        logger.info(f"Listed {len(contexts)} contexts")
+        return contexts, next_cursor
 
     def delete_context(self, machine_name: str) -> Dict[str, str]:
         """
@@ -98,30 +390,72 @@ class ContextManager:
         Raises:
             FileNotFoundError: If the context file doesn't exist
         """
-        file_path = self.contexts_dir / f"{machine_name}.md"
-
-        if not file_path.exists():
-            raise FileNotFoundError(f"Context '{machine_name}' not found")
+        with self._lock:
+            existed = self.store.delete(machine_name)
+            if not existed and machine_name not in self._entries:
+                raise FileNotFoundError(f"Context '{machine_name}' not found")
+            self._drop_entry(machine_name)
 
-        file_path.unlink()
-        logger.info(f"Deleted context '{machine_name}' from {file_path}")
+        logger.info(
+            f"Deleted context '{machine_name}' from the {self.store.name} store"
+        )
+        self._notify(machine_name)
 
         return {"message": f"Context '{machine_name}' deleted successfully"}
 
-    def get_context_content(self, machine_name: str) -> Optional[str]:
+    def get_context_content(
+        self, machine_name: str, variables: Dict[str, str] = None
+    ) -> Optional[str]:
         """
-        Read the content of a context file.
+        Get the content of a context file.
+
+        The content is served from memory; no disk access happens here.
+        Placeholders are filled in from variables, and the rendered text is
+        memoized per set of values.
 
         Args:
             machine_name: The machine name of the context to read
+            variables: Values for the placeholders of the context
 
         Returns:
-            The content of the context file, or None if not found
-        """
-        file_path = self.contexts_dir / f"{machine_name}.md"
+            The rendered content of the context file without its front-matter,
+            or None if not found
 
-        if not file_path.exists():
+        Raises:
+            ValueError: If a placeholder has neither a value nor a default
+        """
+        entry = self._entries.get(machine_name)
+        if entry is None:
             return None
+        return entry.template.render(variables)
+
+    def get_context(self, machine_name: str) -> Optional[ContextEntry]:
+        """
+        Get the in-memory copy of a context, with its content and metadata.
+
+        Args:
+            machine_name: The machine name of the context
+
+        Returns:
+            The context entry, or None if not found
+        """
+        return self._entries.get(machine_name)
+
+    def get_context_settings(self, machine_name: str) -> ContextSettings:
+        """
+        Get the generation settings of a context.
+
+        Args:
+            machine_name: The machine name of the context
+
+        Returns:
+            The settings from the context's front-matter; defaults if the
+            context has none or does not exist
+        """
+        entry = self._entries.get(machine_name)
+        if entry is None:
+            return DEFAULT_SETTINGS
+        return entry.settings
+
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
+context_manager = ContextManager()
@@ -0,0 +1,201 @@
+import re
+from dataclasses import dataclass, fields
+from functools import cached_property
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.S | re.M)
+
+
+def _parse_scalar(value: str) -> Any:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "~", ""):
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split YAML front-matter from the body of a context file.
+
+    Supports the flat subset of YAML used by context settings: "key: value"
+    pairs with string, number and boolean scalars, inline lists ("[a, b]")
+    and block lists ("- a" lines below an empty key). Lines starting with "#"
+    are comments.
+
+    Args:
+        text: The full content of the file
+
+    Returns:
+        The front-matter as a dictionary (empty without front-matter) and the
+        body that follows it
+
+    Raises:
+        ValueError: If a front-matter line cannot be parsed
+    """
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text
+
+    data: Dict[str, Any] = {}
+    list_key = None
+    for number, raw in enumerate(match.group(1).splitlines(), start=2):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("- ") and list_key:
+            data[list_key].append(_parse_scalar(line[2:].strip()))
+            continue
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip() or raw[0].isspace():
+            raise ValueError(f"Invalid front-matter on line {number}: '{raw}'")
+        key, value = key.strip(), value.strip()
+        list_key = None
+        if not value:
+            data[key] = []
+            list_key = key
+        elif value.startswith("[") and value.endswith("]"):
+            items = value[1:-1].split(",")
+            data[key] = [_parse_scalar(item.strip()) for item in items if item.strip()]
+        else:
+            data[key] = _parse_scalar(value)
+
+    return data, text[match.end() :]
+
+
+@dataclass(frozen=True)
+class ContextSettings:
+    """
+    Generation settings of a system context, read from its front-matter.
+
+    Unset fields (None) leave the backend's defaults in place.
+
+    Attributes:
+        max_output_tokens: Maximum tokens the model may generate.
+        temperature: Sampling temperature.
+        top_p: Nucleus sampling probability mass.
+        stop_sequences: Sequences that end generation when produced.
+        thinking_budget: Tokens the model may spend thinking; 0 disables
+            thinking on models that allow it.
+        model: Model used unless the request forces one.
+        backend: Backend answering requests, overriding CONTEXT_BACKENDS.
+        max_sentences: Sentences after which generation is stopped, unless the
+            request sets its own limit.
+        max_chars: Characters after which generation is stopped, unless the
+            request sets its own limit.
+    """
+
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    stop_sequences: Optional[Tuple[str, ...]] = None
+    thinking_budget: Optional[int] = None
+    model: Optional[str] = None
+    backend: Optional[str] = None
+    max_sentences: Optional[int] = None
+    max_chars: Optional[int] = None
+
+    @classmethod
+    def from_front_matter(cls, data: Dict[str, Any]) -> "ContextSettings":
+        """
+        Build settings from parsed front-matter.
+
+        Args:
+            data: The front-matter dictionary
+
+        Returns:
+            The settings
+
+        Raises:
+            ValueError: If a key is unknown or a value has the wrong type
+        """
+        values = {}
+        for field in fields(cls):
+            if field.name not in data or data[field.name] is None:
+                continue
+            value = data[field.name]
+            try:
+                if field.name == "stop_sequences":
+                    if isinstance(value, str):
+                        value = [value]
+                    if not isinstance(value, list):
+                        raise TypeError
+                    value = tuple(str(item) for item in value)
+                elif field.name in (
+                    "max_output_tokens",
+                    "thinking_budget",
+                    "max_sentences",
+                    "max_chars",
+                ):
+                    if isinstance(value, bool) or not isinstance(value, int):
+                        raise TypeError
+                elif field.name in ("temperature", "top_p"):
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise TypeError
+                    value = float(value)
+                else:
+                    value = str(value)
+            except TypeError:
+                raise ValueError(f"Invalid value for '{field.name}': {value!r}")
+            values[field.name] = value
+
+        unknown = set(data) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown context settings: {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+    @cached_property
+    def generation(self) -> Optional[Dict[str, Any]]:
+        """
+        The settings that shape generation, for a backend to apply.
+
+        Built once per settings object. Holds the set fields among
+        max_output_tokens, temperature, top_p, stop_sequences and
+        thinking_budget, or is None when none is set.
+        """
+        generation = {}
+        for name in (
+            "max_output_tokens",
+            "temperature",
+            "top_p",
+            "stop_sequences",
+            "thinking_budget",
+        ):
+            value = getattr(self, name)
+            if value is not None:
+                generation[name] = list(value) if name == "stop_sequences" else value
+        return generation or None
+
+
+DEFAULT_SETTINGS = ContextSettings()
+
+
+def parse_context(text: str) -> Tuple[ContextSettings, str]:
+    """
+    Parse a context file into its settings and body.
+
+    Args:
+        text: The full content of the file
+
+    Returns:
+        The settings from the front-matter and the body sent as system
+        instructions
+
+    Raises:
+        ValueError: If the front-matter is invalid
+    """
+    data, body = parse_front_matter(text)
+    if not data:
+        return DEFAULT_SETTINGS, body
+    return ContextSettings.from_front_matter(data), body
@@ -0,0 +1,352 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """
+    Hash the content of a context.
+
+    Args:
+        content: The full content of the context
+
+    Returns:
+        The SHA-256 hex digest of the UTF-8 encoded content
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class StoredContext:
+    """
+    A context as read from a store.
+
+    Attributes:
+        machine_name: The machine name of the context.
+        content: The full content, including any front-matter.
+        stamp: Opaque value that changes whenever the stored context changes,
+            as reported by ContextStore.scan.
+        size: Size of the content in bytes.
+        hash: SHA-256 hex digest of the content.
+        updated_at: When the context was last written, as a Unix timestamp.
+        file_path: Path of the backing file, or None if it is not a file.
+    """
+
+    machine_name: str
+    content: str
+    stamp: object
+    size: int
+    hash: str
+    updated_at: float
+    file_path: Optional[str] = None
+
+
+class ContextStore(ABC):
+    """
+    Base class of the places contexts are kept.
+
+    ContextManager keeps every context in memory and uses a store to load
+    them, to persist changes made through the API and to detect changes made
+    by other processes. Subclasses must implement scan, read, write and delete.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def scan(self, force: bool = False) -> Optional[Dict[str, object]]:
+        """
+        List the stamp of every stored context.
+
+        Args:
+            force: List the stamps even if nothing seems to have changed
+
+        Returns:
+            Mapping of machine name to stamp, or None if nothing changed since
+            the previous scan other than through this store
+        """
+
+    @abstractmethod
+    def read(self, machine_name: str) -> Optional[StoredContext]:
+        """
+        Read one context.
+
+        Args:
+            machine_name: The machine name of the context
+
+        Returns:
+            The stored context, or None if it does not exist
+        """
+
+    @abstractmethod
+    def write(self, machine_name: str, content: str) -> StoredContext:
+        """
+        Create or replace a context atomically.
+
+        Readers see either the old or the new content, never a partial write.
+
+        Args:
+            machine_name: The machine name of the context
+            content: The full content to store
+
+        Returns:
+            The stored context
+        """
+
+    @abstractmethod
+    def delete(self, machine_name: str) -> bool:
+        """
+        Delete a context.
+
+        Args:
+            machine_name: The machine name of the context
+
+        Returns:
+            Whether the context existed
+        """
+
+    def close(self) -> None:
+        """Release the resources held by the store."""
+
+
+class FileContextStore(ContextStore):
+    """
+    Keeps each context as a Markdown file named after it in a directory.
+
+    This is the original layout of the contexts/ volume, so files can still be
+    edited by hand. Writes go to a temporary file that is then renamed over the
+    context, which makes them atomic.
+
+    Attributes:
+        directory (Path): The directory holding the .md files.
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, machine_name: str) -> Path:
+        return self.directory / f"{machine_name}.md"
+
+    def scan(self, force: bool = False) -> Optional[Dict[str, object]]:
+        stamps = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".md") or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                stamps[entry.name[:-3]] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _stored(self, machine_name: str, content: str, path: Path) -> StoredContext:
+        stat = path.stat()
+        return StoredContext(
+            machine_name=machine_name,
+            content=content,
+            stamp=(stat.st_mtime_ns, stat.st_size),
+            size=stat.st_size,
+            hash=content_hash(content),
+            updated_at=stat.st_mtime,
+            file_path=str(path),
+        )
+
+    def read(self, machine_name: str) -> Optional[StoredContext]:
+        path = self._path(machine_name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            return self._stored(machine_name, content, path)
+        except FileNotFoundError:
+            return None
+
+    def write(self, machine_name: str, content: str) -> StoredContext:
+        path = self._path(machine_name)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{machine_name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return self._stored(machine_name, content, path)
+
+    def delete(self, machine_name: str) -> bool:
+        try:
+            self._path(machine_name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class SQLiteContextStore(ContextStore):
+    """
+    Keeps contexts in a SQLite database in WAL mode.
+
+    Suited to tens of thousands of contexts: each one is read by its primary
+    key instead of opening a file, and checking for changes made by other
+    processes costs one PRAGMA data_version call while nothing changed,
+    instead of a stat of every file. Every write is its own transaction.
+
+    Attributes:
+        path (Path): The database file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=10
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS contexts (
+                machine_name TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self._data_version = None
+
+    def scan(self, force: bool = False) -> Optional[Dict[str, object]]:
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version and not force:
+                return None
+            rows = self._conn.execute("SELECT machine_name, hash FROM contexts")
+            stamps = dict(rows.fetchall())
+            self._data_version = version
+        return stamps
+
+    def read(self, machine_name: str) -> Optional[StoredContext]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, size, hash, updated_at FROM contexts"
+                " WHERE machine_name = ?",
+                (machine_name,),
+            ).fetchone()
+        if row is None:
+            return None
+        content, size, digest, updated_at = row
+        return StoredContext(machine_name, content, digest, size, digest, updated_at)
+
+    def write(self, machine_name: str, content: str) -> StoredContext:
+        digest = content_hash(content)
+        size = len(content.encode("utf-8"))
+        updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO contexts (machine_name, content, size, hash, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (machine_name) DO UPDATE SET
+                    content = excluded.content,
+                    size = excluded.size,
+                    hash = excluded.hash,
+                    updated_at = excluded.updated_at
+                """,
+                (machine_name, content, size, digest, updated_at),
+            )
+        return StoredContext(machine_name, content, digest, size, digest, updated_at)
+
+    def delete(self, machine_name: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM contexts WHERE machine_name = ?", (machine_name,)
+            )
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def import_directory(
+    store: ContextStore, directory: str, overwrite: bool = False
+) -> Dict[str, int]:
+    """
+    Copy the .md context files of a directory into a store.
+
+    Args:
+        store: The store to import into
+        directory: The directory holding the .md files
+        overwrite: Whether contexts that already exist with different content
+            are replaced
+
+    Returns:
+        Counts of imported, unchanged and skipped contexts
+    """
+    source = FileContextStore(directory)
+    existing = store.scan(force=True)
+    counts = {"imported": 0, "unchanged": 0, "skipped": 0}
+    for machine_name in sorted(source.scan()):
+        stored = source.read(machine_name)
+        if stored is None:
+            continue
+        if machine_name in existing:
+            current = store.read(machine_name)
+            if current is not None and current.hash == stored.hash:
+                counts["unchanged"] += 1
+                continue
+            if not overwrite:
+                counts["skipped"] += 1
+                continue
+        store.write(machine_name, stored.content)
+        counts["imported"] += 1
+    return counts
+
+
+def create_store(contexts_dir: str) -> ContextStore:
+    """
+    Create the context store selected by CONTEXT_STORE.
+
+    A new, empty SQLite database is seeded with the .md files of contexts_dir,
+    so switching an existing volume over keeps its contexts.
+
+    Args:
+        contexts_dir: The directory of the file store, and of the .md files
+            imported into a new database
+
+    Returns:
+        The context store
+
+    Raises:
+        ValueError: If CONTEXT_STORE names an unknown store
+    """
+    if Config.CONTEXT_STORE == "file":
+        return FileContextStore(contexts_dir)
+    if Config.CONTEXT_STORE == "sqlite":
+        store = SQLiteContextStore(
+            Config.CONTEXT_STORE_PATH or os.path.join(contexts_dir, "contexts.sqlite3")
+        )
+        if not store.scan(force=True) and os.path.isdir(contexts_dir):
+            counts = import_directory(store, contexts_dir)
+            if counts["imported"]:
+                logger.info(
+                    f"Imported {counts['imported']} context files into {store.path}"
+                )
+        return store
+    raise ValueError(f"Unknown context store: '{Config.CONTEXT_STORE}'")
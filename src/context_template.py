@@ -0,0 +1,154 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "{{ name }}" or "{{ name | default }}". Anything else in double braces is
+# left as it is, so contexts that show such syntax in examples keep working.
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\|([^{}]*))?\}\}")
+
+
+def _default(raw: Optional[str]) -> Optional[str]:
+    if raw is None:
+        return None
+    value = raw.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+class ContextTemplate:
+    """
+    A system context with "{{ name }}" placeholders, compiled once.
+
+    The text is split into literal pieces and placeholders when the context is
+    loaded, so rendering only joins strings. A placeholder may carry a default,
+    as in "{{ bot_name | Assistant }}", used when the request does not set the
+    variable. Rendered texts are memoized per set of values, so repeated
+    requests for the same variant get the same string back and anything keyed
+    by the system context text (response caches, Gemini cached content) still
+    hits.
+
+    Attributes:
+        source (str): The template text.
+        variables (tuple): Names of the placeholders, in order of appearance.
+        defaults (dict): Default value per placeholder that has one.
+        max_entries (int): Maximum number of rendered variants memoized.
+    """
+
+    def __init__(self, source: str, max_entries: int = 256):
+        self.source = source
+        self.max_entries = max_entries
+
+        pieces = []
+        names = []
+        defaults: Dict[str, str] = {}
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            pieces.append(source[position : match.start()])
+            names.append(match.group(1))
+            default = _default(match.group(2))
+            if default is not None:
+                defaults.setdefault(match.group(1), default)
+            position = match.end()
+        pieces.append(source[position:])
+
+        self._pieces: Tuple[str, ...] = tuple(pieces)
+        self._names: Tuple[str, ...] = tuple(names)
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(names))
+        self.defaults = defaults
+
+        self._rendered: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def is_static(self) -> bool:
+        """Whether the text has no placeholders and renders as it is."""
+        return not self._names
+
+    def missing(self, variables: Dict[str, str] = None) -> Tuple[str, ...]:
+        """
+        List the placeholders that have neither a value nor a default.
+
+        Args:
+            variables: The values supplied by the request
+
+        Returns:
+            The names of the missing variables, in order of appearance
+        """
+        variables = variables or {}
+        return tuple(
+            name
+            for name in self.variables
+            if name not in variables and name not in self.defaults
+        )
+
+    def render(self, variables: Dict[str, str] = None) -> str:
+        """
+        Render the template with a set of values.
+
+        Values for names the template does not use are ignored, so they do
+        not split the memoized variants.
+
+        Args:
+            variables: The values supplied by the request
+
+        Returns:
+            The rendered text
+
+        Raises:
+            ValueError: If a placeholder has neither a value nor a default
+        """
+        if not self._names:
+            return self.source
+
+        variables = variables or {}
+        missing = self.missing(variables)
+        if missing:
+            raise ValueError(f"Missing context variables: {', '.join(missing)}")
+
+        key = tuple(
+            str(variables[name]) if name in variables else self.defaults[name]
+            for name in self.variables
+        )
+        with self._lock:
+            text = self._rendered.get(key)
+            if text is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+
+        values = dict(zip(self.variables, key))
+        parts = [self._pieces[0]]
+        for name, piece in zip(self._names, self._pieces[1:]):
+            parts.append(values[name])
+            parts.append(piece)
+        text = "".join(parts)
+
+        with self._lock:
+            text = self._rendered.setdefault(key, text)
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get memoization statistics.
+
+        Returns:
+            Dictionary with hits, misses and the number of memoized variants
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._rendered),
+            }
@@ -0,0 +1,111 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# End of a sentence: terminal punctuation, optional closing quotes or brackets,
+# then whitespace. Requiring the whitespace keeps "3.14" and a "." at the end
+# of a chunk from counting before the next chunk shows what follows.
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)")
+
+
+class TextCutoff:
+    """
+    Stops generated text at a sentence or character limit.
+
+    Streamed chunks are fed in as they arrive and the text to pass on is
+    returned. The end of an incomplete word is held back until the next chunk,
+    so the text can always be cut at a clean boundary without retracting
+    anything already passed on. Once a limit is reached, reached is set and
+    the caller should stop generation.
+
+    The sentence limit cuts right after the last allowed sentence. The
+    character limit cuts at the last sentence end within the limit, else at
+    the last whitespace, else at the limit itself. Abbreviations such as
+    "e.g." count as sentence ends.
+
+    Attributes:
+        max_sentences (int): Sentences to keep; 0 or None for no limit.
+        max_chars (int): Characters to keep; 0 or None for no limit.
+        reached (bool): Whether a limit was reached, so generation should stop.
+    """
+
+    def __init__(self, max_sentences: int = None, max_chars: int = None):
+        self.max_sentences = max_sentences or 0
+        self.max_chars = max_chars or 0
+        self.reached = False
+
+        self._received = ""
+        self._emitted = 0
+        self._scanned = 0
+        self._sentences = 0
+
+    @property
+    def text(self) -> str:
+        """The text passed on so far."""
+        return self._received[: self._emitted]
+
+    def _emit(self, end: int) -> str:
+        if end <= self._emitted:
+            return ""
+        piece = self._received[self._emitted : end]
+        self._emitted = end
+        return piece
+
+    def _boundary(self, limit: int) -> int:
+        ends = [
+            match.end()
+            for match in SENTENCE_END.finditer(self._received, self._emitted, limit + 1)
+        ]
+        if ends:
+            return ends[-1]
+        window = self._received[:limit]
+        space = max(window.rfind(" ", self._emitted), window.rfind("\n", self._emitted))
+        return space if space >= 0 else limit
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk of generated text.
+
+        Args:
+            chunk: The next piece of generated text
+
+        Returns:
+            The text that can be passed on, possibly empty
+        """
+        if self.reached:
+            return ""
+        self._received += chunk
+
+        cut = None
+        if self.max_sentences:
+            for match in SENTENCE_END.finditer(self._received, self._scanned):
+                self._scanned = match.end()
+                self._sentences += 1
+                if self._sentences >= self.max_sentences:
+                    cut = match.end()
+                    break
+        if self.max_chars and len(self._received) > self.max_chars:
+            if cut is None or cut > self.max_chars:
+                cut = self._boundary(self.max_chars)
+
+        if cut is not None:
+            self.reached = True
+            return self._emit(cut)
+
+        last_space = max(
+            self._received.rfind(" ", self._emitted),
+            self._received.rfind("\n", self._emitted),
+        )
+        return self._emit(last_space)
+
+    def finish(self) -> str:
+        """
+        End the text when generation completed without reaching a limit.
+
+        Returns:
+            The held-back rest of the text
+        """
+        if self.reached:
+            return ""
+        return self._emit(len(self._received))
@@ -1,49 +1,643 @@
+import asyncio
+import contextlib
+import json
+import time
+from typing import AsyncIterator
 from google import genai
+from google.genai import errors, types
 from src.config import Config
+from src.backends.base import GenerationResult, LLMBackend
+from src.context_cache import GeminiContextCache
+from src.hedging import HedgePolicy
+from src.metrics import UPSTREAM_DURATION, record_usage
+from src.model_router import ModelRouter
+from src.resilience import CircuitBreaker, RetryPolicy, is_retryable
+from src.response_cache import ResponseCache
+from src.similarity_cache import SimilarityCache
+from src.singleflight import SingleFlight
+from src.tokens import TokenCounter
+from src.tracing import annotate, record_span, span
+from src.upstream_pool import UpstreamKey, UpstreamPool
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Status codes Gemini answers with when a cached-content handle has expired,
+# was deleted or belongs to another project.
+CACHED_CONTENT_REJECTION_CODES = (400, 403, 404)
 
-class GeminiTextService:
+
+def truncate(text, limit=10):
+    """
+    Truncate text to a specified number of words for logging.
+
+    Args:
+        text (str): The text to truncate.
+        limit (int, optional): Maximum number of words to include. Defaults to 10.
+
+    Returns:
+        str: The truncated text with "..." appended if truncated,
+             or "None" if the input text is empty.
+    """
+    if not text:
+        return "None"
+    words = text.split()
+    if len(words) <= limit:
+        return text
+    return " ".join(words[:limit]) + "..."
+
+
+class GeminiTextService(LLMBackend):
     """
     Service class for interacting with Google's Gemini AI API.
 
     This service handles text generation using the Gemini language model.
     It manages API authentication, client initialization, and request formatting.
+    Both a synchronous and an asyncio code path are provided; the async path
+    uses the genai async client and never blocks the event loop.
+
+    A ModelRouter first picks the models for a request from its size, the tier
+    of its system context and live model health. Requests are then spread over
+    a pool of API keys (see UpstreamPool): each attempt goes to the healthiest
+    available key of the first of those models that is not saturated, and
+    retries prefer keys and models not tried yet.
 
     Attributes:
-        api_key (str): The API key for authenticating with Gemini API.
-        client (genai.Client): The initialized Gemini API client.
-        model_name (str): The name of the Gemini model to use for generation.
+        api_key (str): The first API key of the pool.
+        client (genai.Client): The client of the first API key.
+        model_name (str): The primary Gemini model.
+        pool (UpstreamPool): The keys and models requests are balanced over.
+        router (ModelRouter): Chooses the models per request. Cache keys and
+            latency tracking use the chosen model even when a request fails
+            over to another one.
+        max_concurrency (int): Maximum number of in-flight async upstream calls.
+            A value of 0 or less disables the cap.
+        cache (ResponseCache): Exact-match response cache, or None when
+            RESPONSE_CACHE_ENABLED is off.
+        similarity_cache (SimilarityCache): Near-duplicate cache consulted after
+            an exact miss, or None when SIMILARITY_CACHE_ENABLED is off.
+        singleflight (SingleFlight): Coalesces identical in-flight requests into one
+            upstream call, or None when LLM_COALESCE_REQUESTS is off.
+        context_caching (bool): Whether large system contexts are uploaded as
+            server-side cached content, kept per pool key (GEMINI_CONTEXT_CACHE_ENABLED).
+        breaker (CircuitBreaker): Fails calls fast while the upstream is unhealthy.
+        retry (RetryPolicy): Retries transient upstream errors with jittered backoff.
+        request_timeout (float): Time budget of a single request in seconds,
+            including retries. 0 or less means no budget.
+        sessions (SessionStore): Recent turns of server-side conversation sessions.
+        session_token_budget (int): Estimated tokens of session history sent with
+            a request; older turns are left out. 0 or less sends all kept turns.
+        hedging (HedgePolicy): Fires a backup call when the async upstream call is
+            slower than usual, or None when LLM_HEDGE_ENABLED is off.
+        token_counter (TokenCounter): Cached exact token counts from the Gemini
+            count-tokens API, or None when TOKEN_COUNT_EXACT is off.
     """
 
-    def __init__(self):
+    name = "gemini"
+
+    def __init__(self, client=None):
         """
         Initialize the GeminiTextService.
 
-        Loads configuration from the Config class and initializes the Gemini API client.
-        The API key and model name are retrieved from environment variables via Config.
+        Loads configuration from the Config class and initializes one Gemini API
+        client per key of LLM_API_KEYS, combined with the models of LLM_MODELS.
+
+        Args:
+            client (genai.Client, optional): A pre-built client to use as the only
+                key of the pool instead of creating clients from LLM_API_KEYS, e.g.
+                a local fake for testing.
 
         Raises:
             Exception: If the API key is not set or client initialization fails.
         """
-        self.api_key = Config.LLM_API_KEY
-        if not self.api_key:
+        super().__init__()
+        api_keys = Config.LLM_API_KEYS
+        self.api_key = api_keys[0] if api_keys else None
+        if client is not None:
+            clients = [client]
+        elif not api_keys:
             logger.warning("LLM_API_KEY not found. GeminiTextService calls will fail.")
-            self.client = None
+            clients = []
         else:
-            self.client = genai.Client(api_key=self.api_key)
-        self.model_name = Config.LLM_MODEL
+            http_options = (
+                types.HttpOptions(base_url=Config.LLM_BASE_URL)
+                if Config.LLM_BASE_URL
+                else None
+            )
+            clients = [
+                genai.Client(api_key=key, http_options=http_options) for key in api_keys
+            ]
+        self.client = clients[0] if clients else None
+        self.model_name = Config.LLM_MODELS[0]
+        models = list(
+            dict.fromkeys(Config.LLM_MODELS + list(Config.LLM_MODEL_TIERS.values()))
+        )
+        self.pool = UpstreamPool(
+            [UpstreamKey(f"key-{i + 1}", c) for i, c in enumerate(clients)],
+            models,
+            bench_seconds=Config.LLM_POOL_BENCH_SECONDS,
+            max_in_flight=Config.LLM_POOL_MAX_IN_FLIGHT,
+        )
+        self.router = ModelRouter(
+            self.pool,
+            tiers=Config.LLM_MODEL_TIERS,
+            context_tiers=Config.CONTEXT_TIERS,
+            char_thresholds=Config.LLM_ROUTER_CHAR_THRESHOLDS,
+            max_error_rate=Config.LLM_ROUTER_MAX_ERROR_RATE,
+            latency_slo=Config.LLM_ROUTER_LATENCY_SLO,
+        )
+        self.max_concurrency = Config.LLM_MAX_CONCURRENCY
+        self._upstream_slots = (
+            asyncio.Semaphore(self.max_concurrency)
+            if self.max_concurrency > 0
+            else None
+        )
+        self.cache = None
+        if Config.RESPONSE_CACHE_ENABLED:
+            self.cache = ResponseCache(
+                max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+                max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+                default_ttl=Config.RESPONSE_CACHE_TTL,
+                context_ttls=Config.RESPONSE_CACHE_CONTEXT_TTLS,
+            )
+        self.similarity_cache = None
+        if Config.SIMILARITY_CACHE_ENABLED:
+            self.similarity_cache = SimilarityCache(
+                max_entries=Config.SIMILARITY_CACHE_MAX_ENTRIES,
+                max_bytes=Config.SIMILARITY_CACHE_MAX_BYTES,
+                default_ttl=Config.RESPONSE_CACHE_TTL,
+                context_ttls=Config.RESPONSE_CACHE_CONTEXT_TTLS,
+                max_distance=Config.SIMILARITY_CACHE_MAX_DISTANCE,
+            )
+        self.singleflight = SingleFlight() if Config.LLM_COALESCE_REQUESTS else None
+        self.context_caching = Config.GEMINI_CONTEXT_CACHE_ENABLED
+        if self.context_caching:
+            for key in self.pool.keys:
+                key.context_cache = GeminiContextCache(
+                    key.client,
+                    ttl=Config.GEMINI_CONTEXT_CACHE_TTL,
+                    min_chars=Config.GEMINI_CONTEXT_CACHE_MIN_CHARS,
+                )
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=Config.LLM_BREAKER_RESET_TIMEOUT,
+            half_open_max_calls=Config.LLM_BREAKER_HALF_OPEN_CALLS,
+        )
+        self.retry = RetryPolicy(
+            self.breaker,
+            max_attempts=Config.LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=Config.LLM_RETRY_BASE_DELAY,
+            max_delay=Config.LLM_RETRY_MAX_DELAY,
+        )
+        self.request_timeout = Config.LLM_REQUEST_TIMEOUT
+        self.hedging = None
+        if Config.LLM_HEDGE_ENABLED:
+            self.hedging = HedgePolicy(
+                quantile=Config.LLM_HEDGE_QUANTILE,
+                budget=Config.LLM_HEDGE_BUDGET,
+                min_delay=Config.LLM_HEDGE_MIN_DELAY,
+            )
+        self.token_counter = None
+        if Config.TOKEN_COUNT_EXACT and self.client:
+            self.token_counter = TokenCounter(
+                self._count_tokens, max_entries=Config.TOKEN_COUNT_CACHE_SIZE
+            )
+
+    @property
+    def models(self) -> list:
+        """Models of the upstream pool, in failover order."""
+        return self.pool.models
+
+    async def _count_tokens(self, text: str, model: str = None) -> int:
+        with span("count_tokens"):
+            response = await self.client.aio.models.count_tokens(
+                model=model or self.model_name, contents=text
+            )
+        return response.total_tokens
+
+    async def acount_tokens(self, text: str, model: str = None) -> int:
+        """
+        Count the input tokens of a text with the model's tokenizer.
+
+        Uses the Gemini count-tokens API through a cache when TOKEN_COUNT_EXACT
+        is on, and the local estimate otherwise.
+
+        Args:
+            text (str): The text to count.
+            model (str, optional): The model the text is sent to. Defaults to
+                the primary model.
+
+        Returns:
+            int: The token count.
+        """
+        if self.token_counter is None:
+            return await super().acount_tokens(text, model)
+        return await self.token_counter.acount(text, model)
+
+    def invalidate_context(self, context_name: str) -> None:
+        """
+        Drop cached responses and cached-content handles for a system context.
+
+        Registered as a ContextManager listener so that editing or deleting a
+        context never serves answers produced by its previous content.
+
+        Args:
+            context_name (str): The machine name of the changed context.
+        """
+        if self.cache:
+            self.cache.invalidate_context(context_name)
+        if self.similarity_cache:
+            self.similarity_cache.invalidate_context(context_name)
+        for key in self.pool.keys:
+            if key.context_cache:
+                key.context_cache.invalidate_context(context_name)
+
+    @staticmethod
+    def _cache_scope(system_context: str, generation: dict = None) -> str:
+        """
+        Combine a system context with its generation settings for cache keys.
+
+        Settings such as max_output_tokens change the response, so requests
+        that differ only in them must not share cache entries or coalesce.
+
+        Returns:
+            str: The system context, followed by the settings if there are any.
+        """
+        if not generation:
+            return system_context
+        settings = json.dumps(generation, sort_keys=True)
+        return f"{system_context or ''}\x00{settings}"
+
+    def _cache_lookup(
+        self,
+        text: str,
+        context: str,
+        system_context: str,
+        use_cache: bool,
+        model_name: str,
+        generation: dict = None,
+    ):
+        """
+        Look up a request in the exact and near-duplicate response caches.
+
+        Returns:
+            tuple: The cache keys as an (exact, similar) pair, either of which is
+                None when that tier does not apply, and the cached response text
+                (None on a miss).
+        """
+        if not use_cache:
+            return (None, None), None
+
+        exact_key = similar_key = None
+        system_context = self._cache_scope(system_context, generation)
+        if self.cache:
+            exact_key = ResponseCache.make_key(
+                model_name, system_context, context, text
+            )
+            cached = self.cache.get(exact_key)
+            if cached is not None:
+                logger.info(f"Serving cached response for text: '{truncate(text)}'")
+                return (exact_key, None), cached
+
+        if self.similarity_cache:
+            scope = SimilarityCache.make_scope(model_name, system_context, context)
+            similar_key = self.similarity_cache.make_key(scope, text)
+            if similar_key is not None:
+                cached = self.similarity_cache.get(similar_key)
+                if cached is not None:
+                    logger.info(
+                        f"Serving near-duplicate cached response for text: '{truncate(text)}'"
+                    )
+                    return (exact_key, similar_key), cached
+
+        return (exact_key, similar_key), None
+
+    def _cache_store(self, keys: tuple, response_text: str, context_name: str) -> None:
+        if not response_text:
+            return
+        exact_key, similar_key = keys
+        if exact_key:
+            self.cache.set(exact_key, response_text, context_name)
+        if similar_key:
+            self.similarity_cache.set(similar_key, response_text, context_name)
+
+    def _prepare_request(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        history: list = None,
+        generation: dict = None,
+    ):
+        """
+        Build the prompt and generation config for a request.
+
+        Args:
+            text (str): The main input text.
+            context (str, optional): Additional context to prepend to the text.
+            system_context (str, optional): System-level instructions for the model.
+            history (list, optional): Earlier session turns to send before the
+                prompt. Defaults to None.
+            generation (dict, optional): Generation settings of the system
+                context; thinking_budget becomes a thinking_config. Defaults to None.
+
+        Returns:
+            tuple: The prompt (a string, or a list of contents when there is
+                history) and the generation config dictionary.
+
+        Raises:
+            ValueError: If the Gemini API client is not initialized.
+        """
+        prompt = self._build_prompt(text, context)
+        if history:
+            prompt = [
+                {"role": turn.role, "parts": [{"text": turn.text}]} for turn in history
+            ] + [{"role": "user", "parts": [{"text": prompt}]}]
+
+        logger.info(
+            f"Generating response for text: '{truncate(text)}' with system context: '{truncate(system_context)}'"
+        )
+
+        gen_config = {"response_modalities": ["TEXT"]}
+        if system_context:
+            gen_config["system_instruction"] = system_context
+        for name, value in (generation or {}).items():
+            if name == "thinking_budget":
+                gen_config["thinking_config"] = {"thinking_budget": value}
+            else:
+                gen_config[name] = value
+
+        if not self.client:
+            raise ValueError(
+                "Gemini API client is not initialized. Please set LLM_API_KEY."
+            )
+
+        return prompt, gen_config
+
+    @staticmethod
+    def _with_cached_content(gen_config: dict, handle: str) -> dict:
+        """
+        Swap inline system instructions for a cached-content reference.
+
+        Args:
+            gen_config (dict): The generation config built by _prepare_request.
+            handle (str): The cached-content resource name, or None.
+
+        Returns:
+            dict: A new config referencing the handle, or gen_config unchanged
+                when there is no handle.
+        """
+        if not handle:
+            return gen_config
+        config = {k: v for k, v in gen_config.items() if k != "system_instruction"}
+        config["cached_content"] = handle
+        return config
+
+    def _resolve_config(
+        self, endpoint, gen_config: dict, system_context: str, system_context_name: str
+    ) -> dict:
+        context_cache = endpoint.key.context_cache
+        if not context_cache or not system_context:
+            return gen_config
+        with span("context_cache"):
+            handle = context_cache.get(
+                endpoint.model_name, system_context, system_context_name
+            )
+        return self._with_cached_content(gen_config, handle)
+
+    async def _aresolve_config(
+        self, endpoint, gen_config: dict, system_context: str, system_context_name: str
+    ) -> dict:
+        context_cache = endpoint.key.context_cache
+        if not context_cache or not system_context:
+            return gen_config
+        with span("context_cache"):
+            handle = await context_cache.aget(
+                endpoint.model_name, system_context, system_context_name
+            )
+        return self._with_cached_content(gen_config, handle)
+
+    def _handle_rejected(
+        self,
+        endpoint,
+        config: dict,
+        gen_config: dict,
+        system_context: str,
+        e: Exception,
+    ) -> bool:
+        """
+        Check whether a failed call should be retried with inline instructions.
+
+        Gemini rejects references to cached content that has expired, been
+        deleted or is not accessible with 400, 403 or 404 errors that mention
+        the cached content. Only then is the handle dropped and the caller
+        retries once with the original inline config. Any other error, such
+        as a 429, is left to the retry and pool logic.
+
+        Returns:
+            bool: True if the call used a cached-content handle that was rejected.
+        """
+        if config is gen_config or not isinstance(e, errors.ClientError):
+            return False
+        if getattr(e, "code", None) not in CACHED_CONTENT_REJECTION_CODES:
+            return False
+        message = str(e).lower().replace("_", "").replace(" ", "")
+        if "cachedcontent" not in message:
+            return False
+        logger.warning(
+            f"Cached content {config['cached_content']} rejected, retrying inline: {e}"
+        )
+        endpoint.key.context_cache.drop(endpoint.model_name, system_context)
+        return True
+
+    def _deadline(self):
+        """
+        Get the monotonic deadline of a request starting now.
+
+        Returns:
+            float: The deadline, or None when LLM_REQUEST_TIMEOUT is disabled.
+        """
+        if self.request_timeout <= 0:
+            return None
+        return time.monotonic() + self.request_timeout
+
+    def _release(self, endpoint, started: float, error: Exception = None) -> None:
+        transient = error is not None and is_retryable(error)
+        self.pool.release(endpoint, started, error, transient)
+        UPSTREAM_DURATION.observe(
+            time.monotonic() - started,
+            model=endpoint.model_name,
+            outcome="error" if error is not None else "ok",
+        )
+
+    def _generate_content(
+        self,
+        prompt: str,
+        gen_config: dict,
+        system_context: str,
+        system_context_name: str,
+        tried: list,
+        models: list = None,
+    ):
+        """
+        Perform one blocking upstream call on the best available pool endpoint.
+
+        Falls back to inline instructions if a cached-content handle is rejected.
+
+        Returns:
+            tuple: The response and the endpoint that produced it.
+        """
+        with span("upstream"):
+            endpoint = self.pool.acquire(tried, models)
+            tried.append(endpoint)
+            annotate(model=endpoint.model_name, key=endpoint.key.label)
+            started = time.monotonic()
+            try:
+                client = endpoint.key.client
+                config = self._resolve_config(
+                    endpoint, gen_config, system_context, system_context_name
+                )
+                try:
+                    response = client.models.generate_content(
+                        model=endpoint.model_name, contents=prompt, config=config
+                    )
+                except Exception as e:
+                    if not self._handle_rejected(
+                        endpoint, config, gen_config, system_context, e
+                    ):
+                        raise
+                    response = client.models.generate_content(
+                        model=endpoint.model_name, contents=prompt, config=gen_config
+                    )
+            except Exception as e:
+                annotate(error=type(e).__name__)
+                self._release(endpoint, started, e)
+                raise
+            self._release(endpoint, started)
+            return response, endpoint
+
+    async def _agenerate_content(
+        self,
+        prompt: str,
+        gen_config: dict,
+        system_context: str,
+        system_context_name: str,
+        tried: list,
+        models: list = None,
+    ):
+        """
+        Perform one async upstream call while holding an upstream slot.
+
+        The call goes to the best available pool endpoint of models not in
+        tried, and falls back to inline instructions if a cached-content handle is rejected.
+
+        Returns:
+            tuple: The response and the endpoint that produced it.
+        """
+        async with self._upstream_slot():
+            with span("upstream"):
+                endpoint = self.pool.acquire(tried, models)
+                tried.append(endpoint)
+                annotate(model=endpoint.model_name, key=endpoint.key.label)
+                started = time.monotonic()
+                try:
+                    client = endpoint.key.client
+                    config = await self._aresolve_config(
+                        endpoint, gen_config, system_context, system_context_name
+                    )
+                    try:
+                        response = await client.aio.models.generate_content(
+                            model=endpoint.model_name, contents=prompt, config=config
+                        )
+                    except Exception as e:
+                        if not self._handle_rejected(
+                            endpoint, config, gen_config, system_context, e
+                        ):
+                            raise
+                        response = await client.aio.models.generate_content(
+                            model=endpoint.model_name,
+                            contents=prompt,
+                            config=gen_config,
+                        )
+                except Exception as e:
+                    annotate(error=type(e).__name__)
+                    self._release(endpoint, started, e)
+                    raise
+                except BaseException:
+                    self.pool.abandon(endpoint)
+                    raise
+                self._release(endpoint, started)
+                return response, endpoint
+
+    async def _aopen_stream(
+        self,
+        prompt: str,
+        gen_config: dict,
+        system_context: str,
+        system_context_name: str,
+        tried: list,
+        models: list = None,
+    ):
+        """
+        Open an upstream response stream on the best available pool endpoint.
+
+        Falls back to inline instructions if a cached-content handle is rejected.
+        The endpoint stays in flight until the caller releases it.
+
+        Returns:
+            tuple: The stream, the endpoint serving it and the start time.
+        """
+        with span("upstream", stream="open"):
+            endpoint = self.pool.acquire(tried, models)
+            tried.append(endpoint)
+            annotate(model=endpoint.model_name, key=endpoint.key.label)
+            started = time.monotonic()
+            try:
+                client = endpoint.key.client
+                config = await self._aresolve_config(
+                    endpoint, gen_config, system_context, system_context_name
+                )
+                try:
+                    stream = await client.aio.models.generate_content_stream(
+                        model=endpoint.model_name, contents=prompt, config=config
+                    )
+                except Exception as e:
+                    if not self._handle_rejected(
+                        endpoint, config, gen_config, system_context, e
+                    ):
+                        raise
+                    stream = await client.aio.models.generate_content_stream(
+                        model=endpoint.model_name, contents=prompt, config=gen_config
+                    )
+            except Exception as e:
+                annotate(error=type(e).__name__)
+                self._release(endpoint, started, e)
+                raise
+            except BaseException:
+                self.pool.abandon(endpoint)
+                raise
+            return stream, endpoint, started
 
     def generate_response(
-        self, text: str, context: str = None, system_context: str = None
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
     ) -> str:
         """
         Generate a text response using the Gemini AI model.
 
         This method sends a prompt to the Gemini API and returns the generated text.
         It supports optional context and system instructions to guide the response.
+        The call blocks the current thread; use agenerate_response from async code.
+        Transient upstream errors are retried with jittered backoff within the
+        LLM_REQUEST_TIMEOUT budget, and calls fail fast while the circuit breaker
+        is open.
 
         Args:
             text (str): The main input text or question to generate a response for.
@@ -57,10 +651,30 @@ class GeminiTextService:
                 This sets the behavior, personality, or constraints for the AI.
                 Loaded from context files when specified. Defaults to None.
 
+            system_context_name (str, optional): Machine name of the system context.
+                Used for per-context cache TTLs and invalidation. Defaults to None.
+
+            use_cache (bool, optional): Set to False to skip the response caches for
+                this request. Defaults to True.
+
+            model (str, optional): Model to use, bypassing model routing and
+                failover. Must be one of the pool's models. Defaults to None.
+
+            session_id (str, optional): Server-side conversation session. Recent
+                turns of the session, trimmed to SESSION_HISTORY_TOKEN_BUDGET, are
+                sent before the prompt and the new exchange is appended to it.
+                Session requests skip the response caches and coalescing.
+                Defaults to None.
+
+            generation (dict, optional): Generation settings of the system context
+                from its front-matter, e.g. max_output_tokens or temperature.
+                Defaults to None.
+
         Returns:
             str: The generated text response from the Gemini model.
 
         Raises:
+            CircuitOpenError: If the circuit breaker is open.
             Exception: If the API request fails or returns an error.
 
         Example:
@@ -73,44 +687,351 @@ class GeminiTextService:
             >>> print(response)
             "The weather in San Francisco is typically mild..."
         """
-        prompt = f"{context}\n{text}" if context else text
+        route = self.router.route(text, context, system_context_name, model)
+        with span("cache"):
+            cache_keys, cached = self._cache_lookup(
+                text,
+                context,
+                system_context,
+                use_cache and not session_id,
+                route.models[0],
+                generation,
+            )
+        if cached is not None:
+            return cached
 
-        def truncate(text, limit=10):
-            """
-            Truncate text to a specified number of words for logging.
+        history = self._session_history(session_id)
+        prompt, gen_config = self._prepare_request(
+            text, context, system_context, history, generation
+        )
 
-            Args:
-                text (str): The text to truncate.
-                limit (int, optional): Maximum number of words to include. Defaults to 10.
+        deadline = self._deadline()
 
-            Returns:
-                str: The truncated text with "..." appended if truncated,
-                     or "None" if the input text is empty.
-            """
-            if not text:
-                return "None"
-            words = text.split()
-            if len(words) <= limit:
-                return text
-            return " ".join(words[:limit]) + "..."
+        def call():
+            tried = []
+            response, endpoint = self.retry.call(
+                lambda: self._generate_content(
+                    prompt,
+                    gen_config,
+                    system_context,
+                    system_context_name,
+                    tried,
+                    route.models,
+                ),
+                deadline,
+            )
+            record_usage(
+                getattr(response, "usage_metadata", None),
+                endpoint.model_name,
+                system_context_name,
+            )
+            self._cache_store(cache_keys, response.text, system_context_name)
+            self._session_record(session_id, text, context, response.text)
+            return response.text
 
-        logger.info(
-            f"Generating response for text: '{truncate(text)}' with system context: '{truncate(system_context)}'"
+        if self.singleflight is None or session_id:
+            return call()
+        key = ResponseCache.make_key(
+            route.models[0],
+            self._cache_scope(system_context, generation),
+            context,
+            text,
         )
+        return self.singleflight.do(key, call)
 
-        gen_config = {"response_modalities": ["TEXT"]}
-        if system_context:
-            gen_config["system_instruction"] = system_context
+    async def agenerate(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+    ) -> GenerationResult:
+        """
+        Asynchronously generate a text response using the Gemini AI model.
 
-        try:
-            if not self.client:
-                raise ValueError(
-                    "Gemini API client is not initialized. Please set LLM_API_KEY."
+        Behaves like generate_response, but awaits the genai async client
+        (client.aio) so the event loop stays free while the upstream call is
+        in flight. The number of concurrent upstream calls is capped by
+        LLM_MAX_CONCURRENCY; excess callers wait for a free slot. Identical
+        requests arriving while one is in flight share its upstream call.
+        Retries and the circuit breaker apply as for generate_response, and each
+        attempt is cancelled once the request's time budget runs out. With
+        hedging enabled, an attempt slower than the model's observed latency
+        quantile gets an identical backup call; the first to finish wins.
+
+        Args:
+            text (str): The main input text or question to generate a response for.
+            context (str, optional): Additional context to prepend to the text.
+                Defaults to None.
+            system_context (str, optional): System-level instructions for the model.
+                Defaults to None.
+            system_context_name (str, optional): Machine name of the system context.
+                Defaults to None.
+            use_cache (bool, optional): Set to False to skip the response caches.
+                Defaults to True.
+            model (str, optional): Model to use, bypassing model routing.
+                Defaults to None.
+            session_id (str, optional): Conversation session to continue.
+                Defaults to None.
+            generation (dict, optional): Generation settings of the system
+                context. Defaults to None.
+
+        Returns:
+            GenerationResult: The generated text, with the model and key that
+                produced it.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            Exception: If the API request fails or returns an error.
+
+        Example:
+            >>> service = GeminiTextService()
+            >>> result = await service.agenerate(text="Hello!")
+            >>> result.model, result.attempts
+            ('gemini-2.5-flash-lite', 1)
+        """
+        started = time.monotonic()
+        route = self.router.route(text, context, system_context_name, model)
+        with span("cache"):
+            cache_keys, cached = self._cache_lookup(
+                text,
+                context,
+                system_context,
+                use_cache and not session_id,
+                route.models[0],
+                generation,
+            )
+        if cached is not None:
+            return GenerationResult(
+                cached,
+                backend=self.name,
+                tier=route.tier,
+                cached=True,
+                latency_ms=round((time.monotonic() - started) * 1000, 3),
+            )
+
+        history = self._session_history(session_id)
+        prompt, gen_config = self._prepare_request(
+            text, context, system_context, history, generation
+        )
+
+        deadline = self._deadline()
+
+        async def call():
+            tried = []
+
+            def attempt():
+                return self._agenerate_content(
+                    prompt,
+                    gen_config,
+                    system_context,
+                    system_context_name,
+                    tried,
+                    route.models,
                 )
 
-            response = self.client.models.generate_content(
-                model=self.model_name, contents=prompt, config=gen_config
+            if self.hedging is not None:
+                hedged = attempt
+
+                def attempt():
+                    return self.hedging.run(route.models[0], hedged)
+
+            response, endpoint = await self.retry.acall(attempt, deadline)
+            record_usage(
+                getattr(response, "usage_metadata", None),
+                endpoint.model_name,
+                system_context_name,
             )
-            return response.text
-        except Exception as e:
-            raise e
+            self._cache_store(cache_keys, response.text, system_context_name)
+            self._session_record(session_id, text, context, response.text)
+            return GenerationResult(
+                response.text,
+                backend=self.name,
+                model=endpoint.model_name,
+                tier=route.tier,
+                api_key=endpoint.key.label,
+                attempts=len(tried),
+                history_turns=len(history),
+                latency_ms=round((time.monotonic() - started) * 1000, 3),
+            )
+
+        if self.singleflight is None or session_id:
+            return await call()
+        key = ResponseCache.make_key(
+            route.models[0],
+            self._cache_scope(system_context, generation),
+            context,
+            text,
+        )
+        return await self.singleflight.ado(key, call)
+
+    async def astream_response(
+        self,
+        text: str,
+        context: str = None,
+        system_context: str = None,
+        system_context_name: str = None,
+        use_cache: bool = True,
+        model: str = None,
+        session_id: str = None,
+        generation: dict = None,
+        result: GenerationResult = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a text response from the Gemini AI model chunk by chunk.
+
+        Uses the genai streaming API so the first tokens can be forwarded to the
+        caller before generation has finished. A cache hit is yielded as a single
+        chunk, and the assembled response is cached once the stream completes.
+        An upstream slot is held for the whole duration of the stream. Streams
+        are not coalesced. Opening the stream is retried like any other call;
+        errors after the first chunk are not.
+
+        Args:
+            text (str): The main input text or question to generate a response for.
+            context (str, optional): Additional context to prepend to the text.
+                Defaults to None.
+            system_context (str, optional): System-level instructions for the model.
+                Defaults to None.
+            system_context_name (str, optional): Machine name of the system context.
+                Defaults to None.
+            use_cache (bool, optional): Set to False to skip the response caches.
+                Defaults to True.
+            model (str, optional): Model to use, bypassing model routing.
+                Defaults to None.
+            session_id (str, optional): Conversation session to continue.
+                Defaults to None.
+            generation (dict, optional): Generation settings of the system
+                context. Defaults to None.
+            result (GenerationResult, optional): Filled in with the assembled text
+                and how it was produced once the stream completes. Defaults to None.
+
+        Yields:
+            str: Successive pieces of the generated text.
+
+        Raises:
+            Exception: If the API request fails or returns an error.
+
+        Example:
+            >>> async for chunk in service.astream_response(text="Hello!"):
+            ...     print(chunk, end="")
+        """
+        started = time.monotonic()
+        route = self.router.route(text, context, system_context_name, model)
+        with span("cache"):
+            cache_keys, cached = self._cache_lookup(
+                text,
+                context,
+                system_context,
+                use_cache and not session_id,
+                route.models[0],
+                generation,
+            )
+        if cached is not None:
+            if result is not None:
+                result.update(
+                    GenerationResult(
+                        cached,
+                        backend=self.name,
+                        tier=route.tier,
+                        cached=True,
+                        latency_ms=round((time.monotonic() - started) * 1000, 3),
+                    )
+                )
+            yield cached
+            return
+
+        history = self._session_history(session_id)
+        prompt, gen_config = self._prepare_request(
+            text, context, system_context, history, generation
+        )
+
+        chunks = []
+        tried = []
+        usage = None
+        async with self._upstream_slot():
+            stream, endpoint, opened = await self.retry.acall(
+                lambda: self._aopen_stream(
+                    prompt,
+                    gen_config,
+                    system_context,
+                    system_context_name,
+                    tried,
+                    route.models,
+                ),
+                self._deadline(),
+            )
+            if result is not None:
+                result.update(
+                    GenerationResult(
+                        backend=self.name,
+                        model=endpoint.model_name,
+                        tier=route.tier,
+                        api_key=endpoint.key.label,
+                        attempts=len(tried),
+                        history_turns=len(history),
+                    )
+                )
+            streamed = time.perf_counter()
+            try:
+                async for response in stream:
+                    usage = getattr(response, "usage_metadata", None) or usage
+                    if response.text:
+                        chunks.append(response.text)
+                        yield response.text
+            except Exception as e:
+                self._release(endpoint, opened, e)
+                raise
+            except BaseException:
+                # Closed early, e.g. at a cutoff: stop the upstream generation.
+                self.pool.abandon(endpoint)
+                with contextlib.suppress(Exception):
+                    await stream.aclose()
+                raise
+            self._release(endpoint, opened)
+            record_span(
+                "stream",
+                streamed,
+                model=endpoint.model_name,
+                key=endpoint.key.label,
+            )
+
+        record_usage(usage, endpoint.model_name, system_context_name)
+        response_text = "".join(chunks)
+        self._cache_store(cache_keys, response_text, system_context_name)
+        self._session_record(session_id, text, context, response_text)
+        if result is not None:
+            result.update(
+                GenerationResult(
+                    response_text,
+                    backend=self.name,
+                    model=endpoint.model_name,
+                    tier=route.tier,
+                    api_key=endpoint.key.label,
+                    attempts=len(tried),
+                    history_turns=len(history),
+                    latency_ms=round((time.monotonic() - started) * 1000, 3),
+                )
+            )
+
+    @contextlib.asynccontextmanager
+    async def _upstream_slot(self):
+        """
+        Hold an upstream slot for the duration of an async upstream call.
+
+        The wait for a free slot is traced as the "queue" stage. Nothing is
+        awaited when the cap is disabled.
+        """
+        if self._upstream_slots is None:
+            yield
+            return
+        with span("queue"):
+            await self._upstream_slots.acquire()
+        try:
+            yield
+        finally:
+            self._upstream_slots.release()
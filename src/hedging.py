@@ -0,0 +1,206 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent call latencies per model.
+
+    Quantiles are recomputed from the window at most every recompute_every
+    samples, so reading the current threshold on the hot path is a dict lookup.
+
+    Attributes:
+        window (int): Number of recent samples kept per model.
+        recompute_every (int): Samples between quantile recomputations.
+    """
+
+    def __init__(self, window: int = 500, recompute_every: int = 20):
+        self.window = window
+        self.recompute_every = recompute_every
+        self._samples: Dict[str, deque] = {}
+        self._pending: Dict[str, int] = {}
+        self._quantiles: Dict[tuple, float] = {}
+
+    def record(self, model_name: str, latency: float) -> None:
+        """
+        Add a latency sample.
+
+        Args:
+            model_name: The model the call went to
+            latency: The call duration in seconds
+        """
+        samples = self._samples.get(model_name)
+        if samples is None:
+            samples = self._samples[model_name] = deque(maxlen=self.window)
+        samples.append(latency)
+        self._pending[model_name] = self._pending.get(model_name, 0) + 1
+
+    def count(self, model_name: str) -> int:
+        """Get the number of samples held for a model."""
+        samples = self._samples.get(model_name)
+        return len(samples) if samples else 0
+
+    def quantile(self, model_name: str, q: float) -> Optional[float]:
+        """
+        Get a latency quantile for a model.
+
+        Args:
+            model_name: The model to look up
+            q: The quantile, between 0 and 1
+
+        Returns:
+            The latency in seconds, or None without samples
+        """
+        key = (model_name, q)
+        cached = self._quantiles.get(key)
+        if (
+            cached is not None
+            and self._pending.get(model_name, 0) < self.recompute_every
+        ):
+            return cached
+
+        samples = self._samples.get(model_name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        self._quantiles[key] = value
+        self._pending[model_name] = 0
+        return value
+
+
+class HedgePolicy:
+    """
+    Hedged requests to cut upstream tail latency.
+
+    The primary call is started right away. If it has not finished after the
+    observed latency quantile for the model (the hedge delay), an identical
+    backup call is started and whichever finishes successfully first wins; the
+    other is cancelled. Hedging is limited by a budget: every call earns
+    `budget` hedge tokens and each hedge spends one, so at most that fraction
+    of calls is hedged over time.
+
+    All state is only touched from the event loop.
+
+    Attributes:
+        quantile (float): Latency quantile used as the hedge delay, e.g. 0.95.
+        budget (float): Maximum fraction of calls that may be hedged.
+        min_delay (float): Lower bound of the hedge delay in seconds.
+        min_samples (int): Samples needed for a model before hedging starts.
+        tracker (LatencyTracker): Source of the per-model latency quantiles.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        budget: float = 0.05,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        tracker: LatencyTracker = None,
+    ):
+        self.quantile = quantile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.tracker = tracker or LatencyTracker()
+
+        self._tokens = 0.0
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+
+    def delay_for(self, model_name: str) -> Optional[float]:
+        """
+        Get the hedge delay for a model.
+
+        Args:
+            model_name: The model the call goes to
+
+        Returns:
+            The delay in seconds, or None while there are too few samples
+        """
+        if self.tracker.count(model_name) < self.min_samples:
+            return None
+        return max(self.min_delay, self.tracker.quantile(model_name, self.quantile))
+
+    def _take_token(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def run(self, model_name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an upstream call, hedging it if it is slow.
+
+        Args:
+            model_name: The model the call goes to
+            fn: Coroutine function performing the call; called again for the hedge
+
+        Returns:
+            The result of the first successful call
+
+        Raises:
+            Exception: The error of the primary call if both calls fail
+        """
+        self.calls += 1
+        self._tokens = min(self._tokens + self.budget, 10.0)
+        started = time.monotonic()
+
+        primary = asyncio.ensure_future(fn())
+        tasks = [primary]
+        try:
+            delay = self.delay_for(model_name)
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+
+            if primary.done() or delay is None or not self._take_token():
+                result = await primary
+                self.tracker.record(model_name, time.monotonic() - started)
+                return result
+
+            self.hedged += 1
+            backup_started = time.monotonic()
+            backup = asyncio.ensure_future(fn())
+            tasks.append(backup)
+            logger.info(f"Hedging slow call to {model_name} after {delay:.3f}s")
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is not None:
+                    # Record the winner's own latency; measuring the backup from
+                    # the primary's start would add the hedge delay to it.
+                    winner_started = started
+                    if winner is backup:
+                        self.wins += 1
+                        winner_started = backup_started
+                    self.tracker.record(model_name, time.monotonic() - winner_started)
+                    return winner.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict:
+        """
+        Get hedging counters.
+
+        Returns:
+            Dictionary with calls, hedged, wins and hedge_rate
+        """
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "wins": self.wins,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+        }
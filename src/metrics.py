@@ -0,0 +1,324 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for metrics with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> Iterable[str]:
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the counter for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the gauge for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge for a label set."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Counts observations in cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for a label set."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), then the sum.
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def _render_value(self, key, state) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+            cumulative += count
+            labels = _format_labels(
+                self.labelnames, key, f'le="{_format_value(bound)}"'
+            )
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(state[-1])}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    A set of metrics rendered together in the Prometheus text format.
+
+    Metric updates take a short uncontended lock and a dict lookup, so they are
+    cheap enough for the request path. Rendering happens only on scrape.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        """Create and register a Counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        """Create and register a Gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a Histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition, ending with a newline
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "chat_http_requests_total",
+    "HTTP requests handled, by method, route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_DURATION = registry.histogram(
+    "chat_http_request_duration_seconds",
+    "Time to handle an HTTP request, including streaming the body.",
+    ("method", "route"),
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "chat_http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ("method",),
+)
+CONTEXT_RESOLUTION = registry.histogram(
+    "chat_context_resolution_duration_seconds",
+    "Time to resolve the system context of a chat request.",
+)
+UPSTREAM_DURATION = registry.histogram(
+    "chat_upstream_request_duration_seconds",
+    "Duration of one upstream model call attempt, by model and outcome.",
+    ("model", "outcome"),
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_IN_FLIGHT = registry.gauge(
+    "chat_upstream_requests_in_flight",
+    "Upstream Gemini calls currently running, by model.",
+    ("model",),
+)
+SERIALIZATION = registry.histogram(
+    "chat_response_serialization_duration_seconds",
+    "Time to serialize a chat response body, by route.",
+    ("route",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+PROMPT_TOKENS = registry.counter(
+    "chat_prompt_tokens_total",
+    "Prompt tokens reported by the backend's usage metadata.",
+    ("model", "system_context"),
+)
+RESPONSE_TOKENS = registry.counter(
+    "chat_response_tokens_total",
+    "Response tokens reported by the backend's usage metadata.",
+    ("model", "system_context"),
+)
+CONTEXT_TRIMMED_TOKENS = registry.counter(
+    "chat_context_trimmed_tokens_total",
+    "Estimated context tokens removed to fit the input token budget, by system context.",
+    ("system_context",),
+)
+ADMISSION_ACTIVE = registry.gauge(
+    "chat_admission_active_requests",
+    "Requests holding an admission slot.",
+)
+ADMISSION_QUEUED = registry.gauge(
+    "chat_admission_queued_requests",
+    "Requests waiting for an admission slot.",
+)
+
+
+def record_usage(usage_metadata, model_name: str, context_name: str = None) -> None:
+    """
+    Count the tokens of a Gemini response.
+
+    Args:
+        usage_metadata: The usage_metadata of the response, may be None
+        model_name: The model that produced the response
+        context_name: The machine name of the system context
+    """
+    if usage_metadata is None:
+        return
+    record_tokens(
+        getattr(usage_metadata, "prompt_token_count", None),
+        getattr(usage_metadata, "candidates_token_count", None),
+        model_name,
+        context_name,
+    )
+
+
+def record_tokens(
+    prompt: int, response: int, model_name: str, context_name: str = None
+) -> None:
+    """
+    Count the prompt and response tokens of one generation.
+
+    Args:
+        prompt: Prompt tokens, may be None
+        response: Response tokens, may be None
+        model_name: The model that produced the response
+        context_name: The machine name of the system context
+    """
+    labels = {"model": model_name, "system_context": context_name or ""}
+    if prompt:
+        PROMPT_TOKENS.inc(prompt, **labels)
+    if response:
+        RESPONSE_TOKENS.inc(response, **labels)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them per route.
+
+    Requests are labelled with the route template (e.g.
+    /api/v1/contexts/{machine_name}) rather than the raw path, so label
+    cardinality stays bounded; unmatched paths share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec(method=method)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_DURATION.observe(
+                time.perf_counter() - started, method=method, route=path
+            )
+            HTTP_REQUESTS.inc(method=method, route=path, status=status)
@@ -0,0 +1,151 @@
+from typing import Dict, List, Sequence
+from src.upstream_pool import UpstreamPool
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Route:
+    """
+    The models chosen for one request.
+
+    Attributes:
+        tier (str): The tier the request was routed to, or None when routing is
+            disabled or a model was forced.
+        models (List[str]): Models to try, preferred first, then failover order.
+    """
+
+    __slots__ = ("tier", "models")
+
+    def __init__(self, tier: str, models: List[str]):
+        self.tier = tier
+        self.models = models
+
+
+class ModelRouter:
+    """
+    Picks a model per request from cheap request features and live model health.
+
+    Tiers are ordered from cheapest and fastest to strongest. A request starts
+    at the tier declared for its system context (the first tier if none), and
+    moves one tier up for every character threshold its text and context
+    exceed. The chosen tier is then checked against the upstream pool: if its
+    model is saturated, benched, failing more often than max_error_rate or
+    slower than latency_slo, the next tier up that is healthy is used instead.
+    Other models remain available as failover targets.
+
+    Attributes:
+        pool (UpstreamPool): Source of per-model health.
+        tiers (List[tuple]): (tier name, model) pairs, cheapest first.
+        context_tiers (Dict[str, str]): Declared tier per context machine name.
+        char_thresholds (List[int]): Prompt sizes, in characters, at which a
+            request moves up one tier.
+        max_error_rate (float): Error rate above which a model is skipped.
+        latency_slo (float): Latency in seconds above which a model is skipped.
+            0 or less disables the check.
+    """
+
+    def __init__(
+        self,
+        pool: UpstreamPool,
+        tiers: Dict[str, str] = None,
+        context_tiers: Dict[str, str] = None,
+        char_thresholds: Sequence[int] = (2000, 8000),
+        max_error_rate: float = 0.5,
+        latency_slo: float = 0,
+    ):
+        self.pool = pool
+        self.tiers = list((tiers or {}).items())
+        self.context_tiers = dict(context_tiers or {})
+        self.char_thresholds = sorted(char_thresholds)
+        self.max_error_rate = max_error_rate
+        self.latency_slo = latency_slo
+
+        self._tier_index = {name: i for i, (name, _) in enumerate(self.tiers)}
+        self.routed = {name: 0 for name, _ in self.tiers}
+        self.escalations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any tiers are configured."""
+        return bool(self.tiers)
+
+    def base_tier(self, text: str, context: str = None, context_name: str = None):
+        """
+        Get the tier index a request needs, before health checks.
+
+        Args:
+            text: The request text
+            context: The request context
+            context_name: The machine name of the system context
+
+        Returns:
+            The index into tiers
+        """
+        index = self._tier_index.get(self.context_tiers.get(context_name), 0)
+        size = len(text) + len(context or "")
+        index += sum(1 for threshold in self.char_thresholds if size > threshold)
+        return min(index, len(self.tiers) - 1)
+
+    def _healthy(self, model_name: str) -> bool:
+        health = self.pool.model_health(model_name)
+        if not health["available"] or health["error_rate"] > self.max_error_rate:
+            return False
+        latency = health["latency"]
+        return self.latency_slo <= 0 or latency is None or latency <= self.latency_slo
+
+    def route(
+        self,
+        text: str,
+        context: str = None,
+        context_name: str = None,
+        model: str = None,
+    ) -> Route:
+        """
+        Choose the models for a request.
+
+        Args:
+            text: The request text
+            context: The request context
+            context_name: The machine name of the system context
+            model: A model to force, bypassing routing and failover
+
+        Returns:
+            The chosen tier and the models to try, in order
+        """
+        if model:
+            return Route(None, [model])
+        if not self.tiers:
+            return Route(None, list(self.pool.models))
+
+        base = self.base_tier(text, context, context_name)
+        chosen = next(
+            (
+                i
+                for i in range(base, len(self.tiers))
+                if self._healthy(self.tiers[i][1])
+            ),
+            base,
+        )
+        if chosen != base:
+            self.escalations += 1
+            logger.info(
+                f"Model {self.tiers[base][1]} is unhealthy, routing to {self.tiers[chosen][1]}"
+            )
+
+        name = self.tiers[chosen][0]
+        self.routed[name] += 1
+        order = [m for _, m in self.tiers[chosen:]] + [
+            m for _, m in reversed(self.tiers[:chosen])
+        ]
+        order += [m for m in self.pool.models if m not in order]
+        return Route(name, list(dict.fromkeys(order)))
+
+    def stats(self) -> Dict:
+        """
+        Get routing counters.
+
+        Returns:
+            Dictionary with routed (requests per tier) and escalations
+        """
+        return {"routed": dict(self.routed), "escalations": self.escalations}
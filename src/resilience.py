@@ -0,0 +1,342 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+import httpx
+from google.genai import errors
+from src.tracing import span
+from src.upstream_pool import is_quota_error
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    Classify an upstream error as transient or fatal.
+
+    Rate limiting, server errors, timeouts and connection failures are
+    transient. Anything else, such as invalid requests or authentication
+    failures, will fail the same way again and is fatal.
+
+    Args:
+        exc: The exception raised by the upstream call
+
+    Returns:
+        True if the call may succeed when retried
+    """
+    if isinstance(exc, errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return isinstance(
+        exc,
+        (
+            httpx.TimeoutException,
+            httpx.NetworkError,
+            asyncio.TimeoutError,
+            ConnectionError,
+        ),
+    )
+
+
+def retry_after_hint(exc: Exception) -> float:
+    """
+    Read the Retry-After header of an upstream error response, if any.
+
+    Args:
+        exc: The exception raised by the upstream call
+
+    Returns:
+        The suggested delay in seconds, or 0 when there is none
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return 0
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the upstream while the circuit breaker is open.
+
+    Attributes:
+        retry_after (float): Seconds until the breaker lets a trial call through.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Upstream is unavailable, circuit breaker is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around the upstream client.
+
+    Closed: calls pass through; failure_threshold consecutive transient
+    failures open the breaker. Open: calls fail fast with CircuitOpenError for
+    reset_timeout seconds. Half-open: up to half_open_max_calls trial calls are
+    let through; a success closes the breaker, a failure opens it again.
+
+    Attributes:
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds the breaker stays open before probing.
+        half_open_max_calls (int): Concurrent trial calls allowed while half-open.
+        state (str): "closed", "open" or "half_open".
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all trial
+                slots taken
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(remaining)
+                self.state = self.HALF_OPEN
+                self._trials = 0
+                logger.info("Circuit breaker half-open, probing upstream")
+
+            if self.state == self.HALF_OPEN:
+                if self._trials >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.reset_timeout)
+                self._trials += 1
+
+    def record_success(self) -> None:
+        """Record a call that reached a healthy upstream."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed, upstream recovered")
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def abandon(self) -> None:
+        """Release the trial slot of a call that ended without an upstream verdict."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_failure(self) -> None:
+        """Record a transient upstream failure."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logger.warning(
+                    f"Circuit breaker opened after {self._failures} consecutive failures"
+                )
+
+    def stats(self) -> Dict:
+        """
+        Get breaker state and counters.
+
+        Returns:
+            Dictionary with state, consecutive_failures, opened and rejected
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryPolicy:
+    """
+    Retries transient upstream failures with capped exponential backoff.
+
+    Delays use "full jitter": a random value between 0 and
+    min(max_delay, base_delay * 2 ** attempt), raised to the upstream's
+    Retry-After hint when one is given. Without a deadline the hint is capped
+    at max_delay; with one, no retry is attempted if the delay would run past
+    it. Every attempt goes through the circuit breaker, so retries stop as
+    soon as the breaker opens. Only upstream responses count towards the
+    breaker: a non-retryable error raised locally neither closes nor opens it,
+    and quota errors, which the upstream pool routes around, do not open it.
+
+    Attributes:
+        max_attempts (int): Total attempts per request, including the first.
+        base_delay (float): Backoff base in seconds.
+        max_delay (float): Backoff cap in seconds.
+        breaker (CircuitBreaker): The breaker consulted before every attempt.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4,
+    ):
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def backoff(self, attempt: int, exc: Exception, deadline: float = None) -> float:
+        """
+        Compute the delay before the next attempt.
+
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            exc: The error it failed with
+            deadline: time.monotonic() deadline of the request, if any. Without
+                one, a Retry-After hint is capped at max_delay.
+
+        Returns:
+            The delay in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        hint = retry_after_hint(exc)
+        if deadline is None:
+            hint = min(hint, self.max_delay)
+        return max(delay, hint)
+
+    def _next_delay(self, attempt: int, exc: Exception, deadline: float):
+        """
+        Record the outcome of a failed attempt and decide whether to retry.
+
+        Returns:
+            The delay before retrying, or None to give up
+        """
+        if not is_retryable(exc):
+            if isinstance(exc, errors.APIError):
+                # The upstream answered, so it is healthy; the request was not.
+                self.breaker.record_success()
+            else:
+                self.breaker.abandon()
+            return None
+
+        if is_quota_error(exc):
+            # One key out of quota is not an outage: the pool benches it and
+            # the retry goes to another key, or fails fast once all are benched.
+            self.breaker.abandon()
+        else:
+            self.breaker.record_failure()
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt, exc, deadline)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+
+        self.retries += 1
+        logger.warning(
+            f"Upstream call failed ({exc}), retrying in {delay:.2f}s "
+            f"(attempt {attempt + 2}/{self.max_attempts})"
+        )
+        return delay
+
+    def call(self, fn: Callable[[], Any], deadline: float = None) -> Any:
+        """
+        Run a blocking upstream call with retries.
+
+        Args:
+            fn: Function performing one attempt
+            deadline: time.monotonic() value after which no retry is started
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the breaker rejects an attempt
+            Exception: The error of the last attempt
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+                with span("backoff", attempt=attempt + 1):
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(
+        self, fn: Callable[[], Awaitable[Any]], deadline: float = None
+    ) -> Any:
+        """
+        Run an async upstream call with retries.
+
+        Each attempt is cancelled once the deadline passes, and fails with a
+        timeout.
+
+        Args:
+            fn: Coroutine function performing one attempt
+            deadline: time.monotonic() value bounding the whole call
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the breaker rejects an attempt
+            Exception: The error of the last attempt
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                if deadline is None:
+                    result = await fn()
+                else:
+                    result = await asyncio.wait_for(
+                        fn(), timeout=max(deadline - time.monotonic(), 0)
+                    )
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+                with span("backoff", attempt=attempt + 1):
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,192 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Exact-match cache for generated responses.
+
+    Entries are keyed by a hash of the model name, the resolved system context,
+    the request context and the request text. The cache is an LRU bounded by
+    both the number of entries and the total size of the cached responses.
+    Entries expire after a TTL that can be overridden per system context, and
+    all entries for a system context can be dropped when it changes.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of cached responses, in bytes.
+        default_ttl (float): Lifetime of an entry in seconds.
+        context_ttls (Dict[str, float]): Per-context TTL overrides, keyed by the
+            machine name of the system context. A TTL of 0 disables caching for
+            that context.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 300,
+        context_ttls: Dict[str, float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.context_ttls = dict(context_ttls or {})
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_context: Dict[str, set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        model_name: str, system_context: str = None, context: str = None, text: str = ""
+    ) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            model_name: The model the response is generated with
+            system_context: The resolved system context content
+            context: The request context
+            text: The request text
+
+        Returns:
+            Hex digest identifying the request
+        """
+        system_hash = hashlib.sha256((system_context or "").encode("utf-8")).hexdigest()
+        key = hashlib.sha256()
+        for part in (model_name, system_hash, context or "", text):
+            key.update(part.encode("utf-8"))
+            key.update(b"\x00")
+        return key.hexdigest()
+
+    def ttl_for(self, context_name: str = None) -> float:
+        """
+        Get the TTL applied to entries for a system context.
+
+        Args:
+            context_name: The machine name of the system context
+
+        Returns:
+            The TTL in seconds
+        """
+        return self.context_ttls.get(context_name, self.default_ttl)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: The key built by make_key
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, context_name: str = None) -> None:
+        """
+        Store a response, evicting least recently used entries as needed.
+
+        Args:
+            key: The key built by make_key
+            value: The response text to cache
+            context_name: The machine name of the system context, used for the
+                TTL lookup and for invalidation
+        """
+        ttl = self.ttl_for(context_name)
+        size = len(value.encode("utf-8"))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, time.monotonic() + ttl, size, context_name)
+            self._by_context.setdefault(context_name, set()).add(key)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size, context_name = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._by_context.get(context_name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[context_name]
+
+    def invalidate_context(self, context_name: str) -> int:
+        """
+        Drop every entry cached for a system context.
+
+        Args:
+            context_name: The machine name of the system context
+
+        Returns:
+            The number of entries removed
+        """
+        with self._lock:
+            keys = list(self._by_context.get(context_name, ()))
+            for key in keys:
+                self._remove(key)
+
+        if keys:
+            logger.info(
+                f"Invalidated {len(keys)} cached responses for '{context_name}'"
+            )
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries and bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
@@ -1,24 +1,394 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import asyncio
+import functools
+import json
 import logging
-from src.types.chat import ChatRequest, Message, Output, ChatResponse
-from src.context_manager import ContextManager
+import math
+import time
+from typing import Dict
+import httpx
+from google.genai import errors
+from src.admission import AdmissionController, AdmissionRejected
+from src.config import Config
+from src.types.chat import (
+    ChatRequest,
+    BatchChatRequest,
+    BatchChatItem,
+    BatchChatResponse,
+    Message,
+    Output,
+    ChatResponse,
+    ResponseMetadata,
+    CacheStatsResponse,
+    CacheTierStats,
+    CoalescingStatsResponse,
+    AdmissionStatsResponse,
+    BreakerStats,
+    HedgingStats,
+    UpstreamStatsResponse,
+    UpstreamPoolStats,
+    RoutingStats,
+    SessionStatsResponse,
+    DeleteSessionResponse,
+    BackendInfo,
+    BackendsResponse,
+)
+from src.context_manager import context_manager
+from src.context_settings import ContextSettings
+from src.cutoff import TextCutoff
+from src.backends.base import GenerationResult, LLMBackend
+from src.backends.registry import create_backends
 from src.geminiservice import GeminiTextService
+from src.metrics import CONTEXT_RESOLUTION, CONTEXT_TRIMMED_TOKENS, SERIALIZATION
+from src.resilience import CircuitOpenError, is_retryable, retry_after_hint
+from src.tokens import MARKER_TOKENS, TrimResult, estimate_tokens, trim_middle
+from src.tracing import span
+from src.upstream_pool import PoolExhaustedError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 service = GeminiTextService()
-context_manager = ContextManager()
+backends = create_backends(service)
+context_manager.add_listener(backends.invalidate_context)
+admission = AdmissionController(
+    max_active=Config.ADMISSION_MAX_ACTIVE,
+    max_queue=Config.ADMISSION_MAX_QUEUE,
+    queue_timeout=Config.ADMISSION_QUEUE_TIMEOUT,
+    rate=Config.ADMISSION_RATE_LIMIT,
+    burst=Config.ADMISSION_RATE_BURST,
+)
+
+
+async def admit_request(request: ChatRequest, http_request: Request) -> float:
+    """
+    Wait for an admission slot for a chat request.
+
+    The client is identified by the X-Client-Id header, falling back to the
+    client address. The priority class comes from the request body, then the
+    X-Priority header.
+
+    Args:
+        request (ChatRequest): The chat request.
+        http_request (Request): The underlying HTTP request.
+
+    Returns:
+        float: The admission timestamp, to be passed to admission.release.
+
+    Raises:
+        HTTPException: 429 or 503 with a Retry-After header if the request is
+            rejected.
+    """
+    client_id = http_request.headers.get("x-client-id") or (
+        http_request.client.host if http_request.client else "unknown"
+    )
+    priority = request.priority or http_request.headers.get("x-priority")
+    try:
+        with span("admission", priority=priority or "normal"):
+            return await admission.acquire(client_id, priority)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected request from '{client_id}': {e.detail}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def resolve_system_context(name: str = None, variables: Dict[str, str] = None):
+    """
+    Resolve the system context content requested by a chat request.
+
+    Args:
+        name (str, optional): The system_context of the request.
+        variables (dict, optional): The variables of the request, filled into
+            the placeholders of the context.
+
+    Returns:
+        str: The rendered content of the requested context, or of the "default"
+            context when none was requested. None if no default context exists.
+
+    Raises:
+        HTTPException:
+            - 404: If the requested system_context does not exist
+            - 400: If a placeholder of the context has no value and no default
+    """
+    started = time.perf_counter()
+    try:
+        with span("context", name=name or "default"):
+            try:
+                if not name:
+                    return context_manager.get_context_content("default", variables)
+                system_context = context_manager.get_context_content(name, variables)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Context '{name or 'default'}': {e}",
+                )
+            if system_context is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Context '{name}' not found",
+                )
+            return system_context
+    finally:
+        CONTEXT_RESOLUTION.observe(time.perf_counter() - started)
+
+
+def generation_error(e: Exception) -> HTTPException:
+    """
+    Map an error raised while answering a chat request to an HTTP error.
+
+    By the time an upstream error gets here, retries have run out, so it is
+    reported as an upstream problem rather than a server bug: transient
+    errors become 503 with a Retry-After header (504 for timeouts) and other
+    upstream responses become 502. An open circuit breaker or a pool whose
+    keys are all out of quota also become 503 with a Retry-After header. Anything else is a local error and 500.
+
+    Args:
+        e (Exception): The error.
+
+    Returns:
+        HTTPException: The error to return to the client.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, (CircuitOpenError, PoolExhaustedError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)) or (
+        isinstance(e, errors.APIError) and e.code in (408, 504)
+    ):
+        return HTTPException(
+            status_code=504,
+            detail=f"Upstream timed out: {str(e) or type(e).__name__}",
+        )
+    if is_retryable(e):
+        return HTTPException(
+            status_code=503,
+            detail=f"Upstream unavailable: {e}",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_hint(e))))},
+        )
+    if isinstance(e, (errors.APIError, httpx.HTTPError)):
+        return HTTPException(status_code=502, detail=f"Upstream error: {e}")
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def serialize_response(model: BaseModel, route: str) -> Response:
+    """
+    Serialize a response model to JSON, recording the time it takes.
+
+    Args:
+        model (BaseModel): The response to serialize.
+        route (str): The route template, used as the metric label.
+
+    Returns:
+        Response: An application/json response with the serialized model.
+    """
+    started = time.perf_counter()
+    with span("serialize"):
+        body = model.model_dump_json()
+    SERIALIZATION.observe(time.perf_counter() - started, route=route)
+    return Response(content=body, media_type="application/json")
+
+
+def select_backend(request: ChatRequest, settings: ContextSettings):
+    """
+    Pick the backend and model for a chat request.
+
+    The backend named in the system context's front-matter comes first, then
+    CONTEXT_BACKENDS, then LLM_BACKEND. A model forced by the request must be
+    one of the backend's models; otherwise the context's model is used when
+    the backend has it, and the backend picks one when it does not.
+
+    Args:
+        request (ChatRequest): The chat request.
+        settings (ContextSettings): Settings of the request's system context.
+
+    Returns:
+        tuple: The backend and the model to force, or None to let the backend
+            pick.
+
+    Raises:
+        HTTPException: 400 if the requested model is not one of the backend's models.
+    """
+    name = request.system_context or "default"
+    backend = backends.for_context(name, settings.backend)
+    if request.model:
+        if request.model not in backend.models:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model '{request.model}' is not available",
+            )
+        return backend, request.model
+    if settings.model and settings.model not in backend.models:
+        logger.warning(
+            f"Ignoring model '{settings.model}' of context '{name}': not available"
+        )
+        return backend, None
+    return backend, settings.model
+
+
+def make_cutoff(request: ChatRequest, settings: ContextSettings):
+    """
+    Build the early-termination limits of a chat request.
+
+    A max_sentences or max_chars set on the request overrides the one of its
+    system context; 0 turns the context's limit off.
+
+    Args:
+        request (ChatRequest): The chat request.
+        settings (ContextSettings): Settings of the request's system context.
+
+    Returns:
+        TextCutoff: The limits, or None when no limit applies.
+    """
+    max_sentences = (
+        request.max_sentences
+        if request.max_sentences is not None
+        else settings.max_sentences
+    )
+    max_chars = (
+        request.max_chars if request.max_chars is not None else settings.max_chars
+    )
+    max_sentences, max_chars = max(max_sentences or 0, 0), max(max_chars or 0, 0)
+    if not max_sentences and not max_chars:
+        return None
+    return TextCutoff(max_sentences, max_chars)
+
+
+async def fit_context(request: ChatRequest, backend: LLMBackend, model: str = None):
+    """
+    Fit the context of a chat request to the input token budget.
+
+    The budget of the request's system context (CONTEXT_TOKEN_BUDGETS, then
+    CONTEXT_TOKEN_BUDGET) covers the text and the context. Sizes are estimated
+    locally; a context whose estimate is within TOKEN_COUNT_MARGIN of the
+    budget is counted by the backend, which uses the model's tokenizer when
+    TOKEN_COUNT_EXACT is on. A context that does not fit keeps its first and
+    newest lines and loses the middle.
+
+    Args:
+        request (ChatRequest): The chat request.
+        backend (LLMBackend): The backend answering the request.
+        model (str, optional): The model forced for the request, if any.
+
+    Returns:
+        tuple: The context to send and a TrimResult describing it, or the
+            request context and None when there is no budget.
+
+    Raises:
+        HTTPException: 413 if the text alone exceeds the budget, or leaves too
+            little of it to keep any of the context.
+    """
+    name = request.system_context or "default"
+    budget = Config.CONTEXT_TOKEN_BUDGETS.get(name, Config.CONTEXT_TOKEN_BUDGET)
+    if budget <= 0:
+        return request.context, None
+
+    with span("tokens", budget=budget):
+        text_tokens = estimate_tokens(request.text)
+        if text_tokens >= budget:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request text exceeds the input token budget of {budget} tokens",
+            )
+        available = budget - text_tokens
+        context = request.context or ""
+        if not context:
+            return request.context, TrimResult("", 0)
+
+        estimate = estimate_tokens(context)
+        tokens = estimate
+        if abs(estimate - available) <= available * Config.TOKEN_COUNT_MARGIN:
+            tokens = await backend.acount_tokens(context, model)
+        if tokens <= available:
+            return request.context, TrimResult(context, tokens)
+
+        # trim_middle works on estimates; scale the budget by how far off they are.
+        target = available * estimate // tokens
+        if target <= MARKER_TOKENS:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"Request text leaves no room for the context within the "
+                    f"input token budget of {budget} tokens"
+                ),
+            )
+        fitted = trim_middle(context, target)
+        CONTEXT_TRIMMED_TOKENS.inc(fitted.trimmed_tokens, system_context=name)
+        logger.info(
+            f"Trimmed {fitted.trimmed_lines} lines ({fitted.trimmed_tokens} tokens) "
+            f"of context to fit the budget of '{name}'"
+        )
+        return fitted.text, fitted
+
+
+def build_chat_response(
+    request: ChatRequest, result: GenerationResult, trim: TrimResult = None
+) -> ChatResponse:
+    """
+    Wrap a generation result in a ChatResponse.
+
+    Args:
+        request (ChatRequest): The chat request the text was generated for.
+        result (GenerationResult): The generated text and how it was produced.
+        trim (TrimResult, optional): The context as fitted by fit_context.
+
+    Returns:
+        ChatResponse: The response with a single assistant message and metadata.
+    """
+    return ChatResponse(
+        output=[
+            Output(
+                type="message",
+                role="assistant",
+                system_context=request.system_context,
+                content=Message(text=result.text),
+            )
+        ],
+        metadata=ResponseMetadata(
+            backend=result.backend,
+            model=result.model,
+            tier=result.tier,
+            api_key=result.api_key,
+            attempts=result.attempts,
+            cached=result.cached,
+            latency_ms=result.latency_ms,
+            history_turns=result.history_turns,
+            input_tokens=(
+                estimate_tokens(request.text) + trim.tokens if trim else None
+            ),
+            trimmed_tokens=trim.trimmed_tokens if trim else 0,
+            trimmed_lines=trim.trimmed_lines if trim else 0,
+            truncated=result.truncated,
+        ),
+    )
 
 
 @router.post("", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """
     Generate an AI chat response using the Gemini language model.
 
     This endpoint accepts a text prompt along with optional context and system context,
     then generates a response using the configured Gemini AI model. The system context
     can be loaded from predefined context files to customize the AI's behavior.
+    A context can prefer another backend (CONTEXT_BACKENDS), such as a local
+    OpenAI-compatible server; LLM_BACKEND answers all other requests.
+
+    With an input token budget (CONTEXT_TOKEN_BUDGET), an oversized context is
+    trimmed before the call, keeping its first and newest lines; the metadata
+    reports the input tokens and how much was trimmed.
+
+    Requests pass through admission control first: they may wait in a bounded
+    priority queue, and are rejected quickly with 429 (per-client rate limit)
+    or 503 (overload) and a Retry-After header instead of piling up.
 
     Args:
         request (ChatRequest): The chat request containing:
@@ -26,6 +396,20 @@ async def chat_endpoint(request: ChatRequest):
             - context (str, optional): Additional context to prepend to the text.
             - system_context (str, optional): Machine name of a context file to use
               as system instructions. If not provided, uses "default" context if available.
+            - bypass_cache (bool, optional): Skip the response cache for this request.
+            - priority (str, optional): Admission priority, "high", "normal" or "low".
+            - model (str, optional): Force a model instead of letting the router
+              pick one from the prompt size, context tier and model health.
+            - session_id (str, optional): Continue a server-side conversation;
+              its recent turns are sent along and this exchange is added to it.
+            - max_sentences / max_chars (int, optional): Stop generation once the
+              response reaches this many sentences or characters. The text is
+              cut at a clean boundary, the upstream stream is cancelled and the
+              metadata is marked truncated. Context settings can set defaults.
+            - variables (dict, optional): Values for the "{{ name }}"
+              placeholders of the system context.
+        http_request (Request): The HTTP request, read for the X-Client-Id and
+            X-Priority headers.
 
     Returns:
         ChatResponse: The generated response containing:
@@ -35,11 +419,23 @@ async def chat_endpoint(request: ChatRequest):
                 - system_context (str, optional): The system context used
                 - content (Message): The message content with:
                     - text (str): The generated response text
+            - metadata (ResponseMetadata): The model and pool API key that
+              answered, the number of upstream attempts, whether the response
+              was cached, and the latency
 
     Raises:
         HTTPException:
+            - 400: If the requested model is not configured, or a placeholder
+              of the system context has no value
             - 404: If the specified system_context file is not found
-            - 500: If there's an error generating the response
+            - 413: If the text alone exceeds the input token budget
+            - 429: If the client exceeded its rate limit
+            - 500: If there's an unexpected error generating the response
+            - 502: If the upstream rejected the request
+            - 503: If the service is overloaded, the upstream circuit breaker is
+              open, every API key is out of quota or the upstream stayed
+              unavailable after retries
+            - 504: If the upstream timed out
 
     Example:
         Request:
@@ -63,7 +459,16 @@ async def chat_endpoint(request: ChatRequest):
                             "text": "The capital of France is Paris. It's one of the most famous cities in Europe..."
                         }
                     }
-                ]
+                ],
+                "metadata": {
+                    "backend": "gemini",
+                    "model": "gemini-2.5-flash-lite",
+                    "tier": "fast",
+                    "api_key": "key-1",
+                    "attempts": 1,
+                    "cached": false,
+                    "latency_ms": 412.5
+                }
             }
 
         Error Response (404 Not Found):
@@ -71,36 +476,676 @@ async def chat_endpoint(request: ChatRequest):
                 "detail": "Context 'helpful_tutor' not found"
             }
     """
-    try:
-        system_context = None
+    admitted_at = await admit_request(request, http_request)
 
-        if request.system_context:
-            system_context = context_manager.get_context_content(request.system_context)
-            if system_context is None:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Context '{request.system_context}' not found",
-                )
-        else:
-            system_context = context_manager.get_context_content("default")
+    try:
+        settings = context_manager.get_context_settings(
+            request.system_context or "default"
+        )
+        backend, model = select_backend(request, settings)
+        system_context = resolve_system_context(
+            request.system_context, request.variables
+        )
+        context, trim = await fit_context(request, backend, model)
 
-        response_text = service.generate_response(
+        cutoff = make_cutoff(request, settings)
+        generate = (
+            functools.partial(backend.agenerate_until, cutoff)
+            if cutoff
+            else backend.agenerate
+        )
+        result = await generate(
             text=request.text,
-            context=request.context,
+            context=context,
             system_context=system_context,
+            system_context_name=request.system_context or "default",
+            use_cache=not request.bypass_cache,
+            model=model,
+            session_id=request.session_id,
+            generation=settings.generation,
         )
-        return ChatResponse(
-            output=[
-                Output(
-                    type="message",
-                    role="assistant",
-                    system_context=request.system_context,
-                    content=Message(text=response_text),
-                )
-            ]
+        return serialize_response(
+            build_chat_response(request, result, trim), "/api/v1/chat"
         )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error processing request: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise generation_error(e)
+    finally:
+        admission.release(admitted_at)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Format a single Server-Sent Event.
+
+    Args:
+        event (str): The event name.
+        data (dict): The JSON-serializable event payload.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that holds an admission slot until it is done.
+
+    The slot is released when the response finishes, fails or is cancelled,
+    including when the client disconnects before the body is iterated and the
+    body generator never runs. The upstream chunk iterator, opened before the
+    response was returned, is closed at the same time.
+    """
+
+    def __init__(self, content, admitted_at: float, upstream=None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admitted_at = admitted_at
+        self.upstream = upstream
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release(self.admitted_at)
+            if self.upstream is not None:
+                await self.upstream.aclose()
+
+
+@router.post("/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """
+    Stream an AI chat response as Server-Sent Events.
+
+    Accepts the same ChatRequest as POST /api/v1/chat, resolves the system
+    context, fits the request context to the token budget and applies
+    admission control the same way, but forwards the generated text chunk by
+    chunk as it arrives from Gemini, so clients can start rendering before
+    generation ends.
+
+    The response starts once the first chunk has arrived, so failing to reach
+    the upstream is reported with the same status codes as POST /api/v1/chat
+    rather than as a 200 stream.
+
+    Events:
+        - chunk: {"text": "..."} for every piece of generated text.
+        - done: the assembled ChatResponse with its metadata, sent once after
+          the last chunk.
+        - error: {"detail": "..."} if generation fails after the first chunk.
+
+    Args:
+        request (ChatRequest): The chat request, as for POST /api/v1/chat.
+        http_request (Request): The HTTP request, read for admission headers.
+
+    Returns:
+        StreamingResponse: A text/event-stream response.
+
+    Raises:
+        HTTPException:
+            - 400: If the requested model is not configured, or a placeholder
+              of the system context has no value
+            - 404: If the specified system_context file is not found
+            - 413: If the text alone exceeds the input token budget
+            - 429: If the client exceeded its rate limit
+            - 500: If there's an unexpected error starting the response
+            - 502: If the upstream rejected the request
+            - 503: If the service is overloaded, the upstream circuit breaker is
+              open, every API key is out of quota or the upstream stayed
+              unavailable after retries
+            - 504: If the upstream timed out
+
+    Example:
+        Request:
+            POST /api/v1/chat/stream
+            Content-Type: application/json
+
+            {
+                "text": "What is the capital of France?"
+            }
+
+        Response (200 OK, text/event-stream):
+            event: chunk
+            data: {"text": "The capital of France"}
+
+            event: chunk
+            data: {"text": " is Paris."}
+
+            event: done
+            data: {"output": [{"type": "message", "role": "assistant", ...}]}
+    """
+    admitted_at = await admit_request(request, http_request)
+
+    chunks = None
+    try:
+        settings = context_manager.get_context_settings(
+            request.system_context or "default"
+        )
+        backend, model = select_backend(request, settings)
+        system_context = resolve_system_context(
+            request.system_context, request.variables
+        )
+        context, trim = await fit_context(request, backend, model)
+
+        cutoff = make_cutoff(request, settings)
+        stream = (
+            functools.partial(backend.astream_until, cutoff)
+            if cutoff
+            else backend.astream_response
+        )
+        result = GenerationResult()
+        chunks = stream(
+            text=request.text,
+            context=context,
+            system_context=system_context,
+            system_context_name=request.system_context or "default",
+            use_cache=not request.bypass_cache,
+            model=model,
+            session_id=request.session_id,
+            generation=settings.generation,
+            result=result,
+        )
+        # Wait for the first chunk before sending the 200 and the SSE headers.
+        try:
+            first = await anext(chunks)
+        except StopAsyncIteration:
+            first = None
+    except BaseException as e:
+        admission.release(admitted_at)
+        if chunks is not None:
+            await chunks.aclose()
+        if isinstance(e, HTTPException) or not isinstance(e, Exception):
+            raise
+        logger.error(f"Error preparing stream: {e}")
+        raise generation_error(e)
+
+    async def events():
+        try:
+            if first is not None:
+                yield format_sse("chunk", {"text": first})
+            async for chunk in chunks:
+                yield format_sse("chunk", {"text": chunk})
+
+            response = build_chat_response(request, result, trim)
+            started = time.perf_counter()
+            with span("serialize"):
+                event = format_sse("done", response.model_dump())
+            SERIALIZATION.observe(
+                time.perf_counter() - started, route="/api/v1/chat/stream"
+            )
+            yield event
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return AdmittedStreamingResponse(
+        events(),
+        admitted_at,
+        upstream=chunks,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def batch_context_key(request: ChatRequest) -> tuple:
+    """
+    Build the key under which a batch shares the system context of a request.
+
+    Args:
+        request (ChatRequest): A request of the batch.
+
+    Returns:
+        tuple: The requested context name and its variables.
+    """
+    return request.system_context, tuple(sorted((request.variables or {}).items()))
+
+
+async def run_batch_item(
+    index: int,
+    request: ChatRequest,
+    contexts: dict,
+    slots: asyncio.Semaphore,
+    http_request: Request,
+) -> BatchChatItem:
+    """
+    Answer one request of a batch, capturing failures as a per-item error.
+
+    Each item goes through admission control on its own, so a batch counts
+    against the client's rate limit and waits in the admission queue like the
+    same number of single requests would. Rejected items are reported with
+    their 429 or 503 status.
+
+    Args:
+        index (int): Position of the request in the batch.
+        request (ChatRequest): The request to answer.
+        contexts (dict): System contexts resolved for the batch, keyed by
+            batch_context_key. Values are the content or the HTTPException raised
+            while resolving it.
+        slots (asyncio.Semaphore): Limits concurrent generation within the batch.
+        http_request (Request): The batch HTTP request, read for the client
+            and priority headers.
+
+    Returns:
+        BatchChatItem: The result for this request.
+    """
+    system_context = contexts[batch_context_key(request)]
+    if isinstance(system_context, HTTPException):
+        return BatchChatItem(
+            index=index,
+            status_code=system_context.status_code,
+            error=system_context.detail,
+        )
+
+    try:
+        async with slots:
+            admitted_at = await admit_request(request, http_request)
+            try:
+                settings = context_manager.get_context_settings(
+                    request.system_context or "default"
+                )
+                backend, model = select_backend(request, settings)
+                context, trim = await fit_context(request, backend, model)
+                cutoff = make_cutoff(request, settings)
+                generate = (
+                    functools.partial(backend.agenerate_until, cutoff)
+                    if cutoff
+                    else backend.agenerate
+                )
+                result = await generate(
+                    text=request.text,
+                    context=context,
+                    system_context=system_context,
+                    system_context_name=request.system_context or "default",
+                    use_cache=not request.bypass_cache,
+                    model=model,
+                    session_id=request.session_id,
+                    generation=settings.generation,
+                )
+            finally:
+                admission.release(admitted_at)
+        return BatchChatItem(
+            index=index,
+            status_code=200,
+            response=build_chat_response(request, result, trim),
+        )
+    except HTTPException as e:
+        return BatchChatItem(index=index, status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        logger.error(f"Error processing batch item {index}: {e}")
+        error = generation_error(e)
+        return BatchChatItem(
+            index=index, status_code=error.status_code, error=error.detail
+        )
+
+
+@router.post("/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(
+    batch: BatchChatRequest, http_request: Request, stream: bool = False
+):
+    """
+    Generate AI chat responses for many requests in one call.
+
+    Each system context is resolved once per distinct name and set of
+    variables, and the requests are fanned out to Gemini with at most
+    CHAT_BATCH_CONCURRENCY running at the same time. Every request is admitted
+    separately, so it counts against the client's rate limit and the admission
+    queue. A failing or rejected request does not fail the batch; its error is
+    reported in its own result item instead.
+
+    Args:
+        batch (BatchChatRequest): The requests to answer.
+        http_request (Request): The HTTP request, read for the X-Client-Id and
+            X-Priority headers.
+        stream (bool, optional): Query parameter. When true, results are streamed
+            as newline-delimited JSON (application/x-ndjson), one BatchChatItem per
+            line in completion order. Defaults to false.
+
+    Returns:
+        BatchChatResponse: One result per request, in submission order. When
+            stream is true, a StreamingResponse of BatchChatItem lines instead.
+
+    Raises:
+        HTTPException:
+            - 400: If the batch is empty or larger than CHAT_BATCH_MAX_SIZE
+
+    Example:
+        Request:
+            POST /api/v1/chat/batch
+            Content-Type: application/json
+
+            {
+                "requests": [
+                    {"text": "What is the capital of France?"},
+                    {"text": "Hi", "system_context": "missing"}
+                ]
+            }
+
+        Response (200 OK):
+            {
+                "results": [
+                    {
+                        "index": 0,
+                        "status_code": 200,
+                        "response": {"output": [{"type": "message", ...}]},
+                        "error": null
+                    },
+                    {
+                        "index": 1,
+                        "status_code": 404,
+                        "response": null,
+                        "error": "Context 'missing' not found"
+                    }
+                ]
+            }
+    """
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(batch.requests) > Config.CHAT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch cannot contain more than {Config.CHAT_BATCH_MAX_SIZE} requests",
+        )
+
+    contexts = {}
+    for request in batch.requests:
+        key = batch_context_key(request)
+        if key not in contexts:
+            try:
+                contexts[key] = resolve_system_context(
+                    request.system_context, request.variables
+                )
+            except HTTPException as e:
+                contexts[key] = e
+
+    slots = asyncio.Semaphore(max(Config.CHAT_BATCH_CONCURRENCY, 1))
+    tasks = [
+        asyncio.create_task(
+            run_batch_item(index, request, contexts, slots, http_request)
+        )
+        for index, request in enumerate(batch.requests)
+    ]
+
+    if not stream:
+        return serialize_response(
+            BatchChatResponse(results=await asyncio.gather(*tasks)),
+            "/api/v1/chat/batch",
+        )
+
+    async def lines():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def cache_stats():
+    """
+    Get response cache statistics.
+
+    Returns the hit, miss and eviction counters of the exact-match and the
+    near-duplicate response caches along with their current size. For a
+    disabled tier only "enabled": false is meaningful.
+
+    Returns:
+        CacheStatsResponse: The cache counters per tier.
+
+    Example:
+        Request:
+            GET /api/v1/chat/cache
+
+        Response (200 OK):
+            {
+                "exact": {
+                    "enabled": true,
+                    "hits": 120,
+                    "misses": 30,
+                    "evictions": 0,
+                    "entries": 30,
+                    "bytes": 5120
+                },
+                "similarity": {
+                    "enabled": false,
+                    "hits": 0,
+                    "misses": 0,
+                    "evictions": 0,
+                    "entries": 0,
+                    "bytes": 0
+                }
+            }
+    """
+
+    def tier(cache):
+        if not cache:
+            return CacheTierStats(enabled=False)
+        return CacheTierStats(enabled=True, **cache.stats())
+
+    return CacheStatsResponse(
+        exact=tier(service.cache), similarity=tier(service.similarity_cache)
+    )
+
+
+@router.get("/coalescing", response_model=CoalescingStatsResponse)
+async def coalescing_stats():
+    """
+    Get request coalescing statistics.
+
+    Reports how many upstream calls were made and how many identical
+    concurrent requests were served by sharing an in-flight call.
+
+    Returns:
+        CoalescingStatsResponse: The coalescing counters.
+
+    Example:
+        Request:
+            GET /api/v1/chat/coalescing
+
+        Response (200 OK):
+            {
+                "enabled": true,
+                "calls": 950,
+                "shared": 50,
+                "in_flight": 3
+            }
+    """
+    if not service.singleflight:
+        return CoalescingStatsResponse(enabled=False)
+    return CoalescingStatsResponse(enabled=True, **service.singleflight.stats())
+
+
+@router.get("/admission", response_model=AdmissionStatsResponse)
+async def admission_stats():
+    """
+    Get admission control statistics.
+
+    Reports how many chat requests are being processed and queued (per
+    priority class), how long admitted requests waited, and how many were
+    rejected by rate limiting or load shedding.
+
+    Returns:
+        AdmissionStatsResponse: The admission counters.
+
+    Example:
+        Request:
+            GET /api/v1/chat/admission
+
+        Response (200 OK):
+            {
+                "active": 128,
+                "queued": 12,
+                "queued_by_priority": {"high": 2, "normal": 10, "low": 0},
+                "admitted": 10542,
+                "rate_limited": 17,
+                "shed": 3,
+                "timed_out": 0,
+                "avg_wait_ms": 41.2,
+                "max_wait_ms": 950.0,
+                "avg_service_ms": 870.5
+            }
+    """
+    return AdmissionStatsResponse(**admission.stats())
+
+
+@router.get("/upstream", response_model=UpstreamStatsResponse)
+async def upstream_stats():
+    """
+    Get upstream resilience statistics.
+
+    Reports the circuit breaker state, the number of retries performed, the
+    hedged request counters, the health of every API key and model pair of
+    the upstream pool and the number of requests routed to each model tier.
+
+    Returns:
+        UpstreamStatsResponse: The upstream counters.
+
+    Example:
+        Request:
+            GET /api/v1/chat/upstream
+
+        Response (200 OK):
+            {
+                "breaker": {
+                    "state": "closed",
+                    "consecutive_failures": 0,
+                    "opened": 2,
+                    "rejected": 40
+                },
+                "retries": 118,
+                "hedging": {
+                    "enabled": true,
+                    "calls": 5000,
+                    "hedged": 240,
+                    "wins": 180,
+                    "hedge_rate": 0.048
+                },
+                "pool": {
+                    "failovers": 12,
+                    "endpoints": [
+                        {
+                            "api_key": "key-1",
+                            "model": "gemini-2.5-flash-lite",
+                            "in_flight": 3,
+                            "latency_ms": 402.1,
+                            "error_rate": 0.01,
+                            "benched": false,
+                            "calls": 2480,
+                            "failures": 21,
+                            "times_benched": 1
+                        }
+                    ]
+                },
+                "routing": {
+                    "enabled": true,
+                    "routed": {"fast": 4700, "strong": 300},
+                    "escalations": 4
+                }
+            }
+    """
+    hedging = HedgingStats(enabled=False)
+    if service.hedging:
+        hedging = HedgingStats(enabled=True, **service.hedging.stats())
+    return UpstreamStatsResponse(
+        breaker=BreakerStats(**service.breaker.stats()),
+        retries=service.retry.retries,
+        hedging=hedging,
+        pool=UpstreamPoolStats(**service.pool.stats()),
+        routing=RoutingStats(enabled=service.router.enabled, **service.router.stats()),
+    )
+
+
+@router.get("/backends", response_model=BackendsResponse)
+async def list_backends():
+    """
+    List the text generation backends and which contexts prefer which.
+
+    Returns:
+        BackendsResponse: The default backend, the per-context preferences and
+            the available backends with their models.
+
+    Example:
+        Request:
+            GET /api/v1/chat/backends
+
+        Response (200 OK):
+            {
+                "default": "gemini",
+                "contexts": {"autocomplete": "openai"},
+                "backends": [
+                    {"name": "gemini", "models": ["gemini-2.5-flash-lite"]},
+                    {"name": "openai", "models": ["local"]},
+                    {"name": "echo", "models": ["echo"]}
+                ]
+            }
+    """
+    return BackendsResponse(
+        default=backends.default,
+        contexts=backends.context_backends,
+        backends=[
+            BackendInfo(name=name, models=backend.models)
+            for name, backend in backends.backends.items()
+        ],
+    )
+
+
+@router.get("/sessions", response_model=SessionStatsResponse)
+async def session_stats():
+    """
+    Get conversation session statistics.
+
+    Returns:
+        SessionStatsResponse: The number of sessions, their approximate memory
+            use and the eviction and expiration counters.
+
+    Example:
+        Request:
+            GET /api/v1/chat/sessions
+
+        Response (200 OK):
+            {
+                "sessions": 1520,
+                "bytes": 3145728,
+                "evictions": 0,
+                "expirations": 312
+            }
+    """
+    return SessionStatsResponse(**service.sessions.stats())
+
+
+@router.delete("/sessions/{session_id}", response_model=DeleteSessionResponse)
+async def delete_session(session_id: str):
+    """
+    Forget a conversation session.
+
+    Args:
+        session_id (str): The session to delete.
+
+    Returns:
+        DeleteSessionResponse: Confirmation of the deletion.
+
+    Raises:
+        HTTPException:
+            - 404: If the session does not exist or has expired
+
+    Example:
+        Request:
+            DELETE /api/v1/chat/sessions/user-42
+
+        Response (200 OK):
+            {
+                "message": "Session 'user-42' deleted successfully"
+            }
+
+        Error Response (404 Not Found):
+            {
+                "detail": "Session 'user-42' not found"
+            }
+    """
+    if not service.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+    return DeleteSessionResponse(message=f"Session '{session_id}' deleted successfully")
@@ -1,59 +1,140 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Optional
 from src.types.context import (
     CreateContextRequest,
     CreateContextResponse,
     ListContextsResponse,
     DeleteContextResponse,
     ContextInfo,
+    ContextResponse,
+    PutContextRequest,
+    PutContextResponse,
 )
-from src.context_manager import ContextManager
+from src.config import Config
+from src.context_manager import ContextPreconditionFailed, context_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/contexts", tags=["contexts"])
-context_manager = ContextManager()
+
+MAX_LIST_LIMIT = 1000
+
+
+def format_etag(content_hash: str) -> str:
+    """
+    Format a context hash as a strong ETag.
+
+    Args:
+        content_hash (str): The SHA-256 hex digest of the context content.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return f'"{content_hash}"'
+
+
+def parse_etags(header: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse an If-Match or If-None-Match header into context hashes.
+
+    Args:
+        header (str, optional): The header value, e.g. '"abc", "def"' or "*".
+
+    Returns:
+        List[str]: The hashes (or "*"), or None if the header was not sent.
+    """
+    if header is None:
+        return None
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag:
+            tags.append(tag)
+    return tags
 
 
 @router.get("", response_model=ListContextsResponse)
-async def list_contexts():
+async def list_contexts(
+    prefix: str = "", cursor: Optional[str] = None, limit: Optional[int] = None
+):
     """
-    List all available context files.
+    List available contexts, optionally one page at a time.
+
+    This endpoint retrieves the contexts kept in the context store, sorted by
+    machine name. Each context contains system instructions that can be used to
+    customize the AI's behavior in chat responses. Without limit and cursor
+    every matching context is returned in one response. With either of them
+    the list is paged; pages are read from an in-memory index, so paging stays
+    fast with tens of thousands of contexts.
 
-    This endpoint retrieves all context files stored in the contexts directory.
-    Each context file contains system instructions that can be used to customize
-    the AI's behavior in chat responses.
+    Args:
+        prefix (str, optional): Query parameter. Only list contexts whose machine
+            name starts with this prefix.
+        cursor (str, optional): Query parameter. The next_cursor of the previous
+            page; listing continues after it.
+        limit (int, optional): Query parameter. Maximum number of contexts per
+            page, up to 1000. Defaults to CONTEXT_LIST_PAGE_SIZE when a cursor
+            is given, and to no limit otherwise.
 
     Returns:
         ListContextsResponse: Response containing:
             - contexts (List[ContextInfo]): List of context information, each containing:
                 - machine_name (str): The normalized machine name of the context
-                - file_path (str): The absolute path to the context file
+                - file_path (str, optional): The path to the context file, if any
+                - size (int): Size of the content in bytes
+                - hash (str): SHA-256 hex digest of the content
+                - updated_at (float): When the context was last written
+            - next_cursor (str, optional): Cursor of the next page, or null on
+              the last page and when the list is not paged
 
     Raises:
-        HTTPException: 500 error if there's an issue reading the contexts directory
+        HTTPException:
+            - 400: If limit is not between 1 and 1000
+            - 500: If there's an issue reading the contexts
 
     Example:
         Request:
-            GET /api/v1/contexts
+            GET /api/v1/contexts?prefix=guild_&limit=2
 
         Response (200 OK):
             {
                 "contexts": [
                     {
-                        "machine_name": "default",
-                        "file_path": "/app/contexts/default.md"
+                        "machine_name": "guild_1001",
+                        "file_path": "/app/contexts/guild_1001.md",
+                        "size": 512,
+                        "hash": "3f2a...",
+                        "updated_at": 1760688000.0
                     },
                     {
-                        "machine_name": "helpful_tutor",
-                        "file_path": "/app/contexts/helpful_tutor.md"
+                        "machine_name": "guild_1002",
+                        "file_path": "/app/contexts/guild_1002.md",
+                        "size": 498,
+                        "hash": "b71c...",
+                        "updated_at": 1760688000.0
                     }
-                ]
+                ],
+                "next_cursor": "guild_1002"
             }
     """
+    if limit is None and cursor is not None:
+        limit = Config.CONTEXT_LIST_PAGE_SIZE
+    if limit is not None and not 1 <= limit <= MAX_LIST_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_LIST_LIMIT}",
+        )
+
     try:
-        contexts = context_manager.list_contexts()
-        return ListContextsResponse(contexts=[ContextInfo(**ctx) for ctx in contexts])
+        contexts, next_cursor = context_manager.list_contexts(prefix, cursor, limit)
+        return ListContextsResponse(
+            contexts=[ContextInfo(**ctx) for ctx in contexts],
+            next_cursor=next_cursor,
+        )
     except Exception as e:
         logger.error(f"Error listing contexts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -66,8 +147,9 @@ async def create_context(request: CreateContextRequest):
 
     This endpoint creates a new system context file that can be used to customize
     the AI's behavior. The context name is automatically normalized to a machine-friendly
-    format (lowercase with underscores), and the content is saved as a Markdown file
-    in the contexts directory.
+    format (lowercase with underscores), and the content is saved in the context
+    store (a Markdown file in the contexts directory by default), atomically
+    replacing any existing context of the same name.
 
     Args:
         request (CreateContextRequest): The context creation request containing:
@@ -83,7 +165,8 @@ async def create_context(request: CreateContextRequest):
 
     Raises:
         HTTPException:
-            - 400: If name or content is empty, or name contains no alphanumeric characters
+            - 400: If name or content is empty, name contains no alphanumeric characters,
+              or the front-matter is invalid
             - 500: If there's an error writing the context file
 
     Example:
@@ -120,12 +203,195 @@ async def create_context(request: CreateContextRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{machine_name}", response_model=ContextResponse)
+async def get_context(machine_name: str, http_request: Request, response: Response):
+    """
+    Get a context with its content and metadata.
+
+    The context is served from memory. The hash of its content is sent as the
+    ETag header, so clients that keep a copy can poll with If-None-Match and
+    only download contexts that changed.
+
+    Args:
+        machine_name (str): The machine name of the context.
+        http_request (Request): The HTTP request, read for the If-None-Match
+            header. A matching ETag (or "*") returns 304 without a body.
+        response (Response): The response, to set the ETag header on.
+
+    Returns:
+        ContextResponse: Response containing:
+            - machine_name (str): The machine name of the context
+            - file_path (str, optional): The path to the context file, if any
+            - size (int): Size of the content in bytes
+            - hash (str): SHA-256 hex digest of the content
+            - updated_at (float): When the context was last written
+            - content (str): The full content, including any front-matter
+
+    Raises:
+        HTTPException:
+            - 404: If the context doesn't exist
+
+    Example:
+        Request:
+            GET /api/v1/contexts/helpful_tutor
+            If-None-Match: "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+
+        Response (304 Not Modified):
+            ETag: "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+
+        Response (200 OK), when the context changed:
+            ETag: "b5bb9d8014a0f9b1d61e21e796d78dccdf1352f23cd32812f4850b878ae4944c"
+
+            {
+                "machine_name": "helpful_tutor",
+                "file_path": "/app/contexts/helpful_tutor.md",
+                "size": 80,
+                "hash": "b5bb9d8014a0f9b1d61e21e796d78dccdf1352f23cd32812f4850b878ae4944c",
+                "updated_at": 1760688000.0,
+                "content": "You are a patient tutor who explains concepts with examples."
+            }
+    """
+    entry = context_manager.get_context(machine_name)
+    if entry is None:
+        raise HTTPException(
+            status_code=404, detail=f"Context '{machine_name}' not found"
+        )
+
+    etag = format_etag(entry.hash)
+    if_none_match = parse_etags(http_request.headers.get("if-none-match"))
+    if if_none_match is not None and (
+        "*" in if_none_match or entry.hash in if_none_match
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return ContextResponse(
+        machine_name=entry.machine_name,
+        file_path=entry.file_path,
+        size=entry.size,
+        hash=entry.hash,
+        updated_at=entry.updated_at,
+        content=entry.content,
+    )
+
+
+@router.put("/{machine_name}", response_model=PutContextResponse)
+async def put_context(
+    machine_name: str,
+    request: PutContextRequest,
+    http_request: Request,
+    response: Response,
+):
+    """
+    Create or replace a context by its machine name.
+
+    Unlike POST /api/v1/contexts, the machine name is given as is and must
+    already be normalized. Writes can be made conditional on the version the
+    client last saw, to avoid overwriting a change made by someone else in the
+    meantime. Content identical to the stored version is not written again.
+
+    Args:
+        machine_name (str): The machine name of the context, lowercase letters,
+            digits and underscores (e.g. "helpful_tutor").
+        request (PutContextRequest): The request containing:
+            - content (str): The full context content, optionally starting with
+              front-matter settings.
+        http_request (Request): The HTTP request, read for the conditional
+            headers:
+            - If-Match: Only write if the stored version has one of these
+              ETags; "*" requires the context to exist.
+            - If-None-Match: Only write if the stored version has none of
+              these ETags; "*" only allows creating the context.
+        response (Response): The response, to set the ETag header on.
+
+    Returns:
+        PutContextResponse: Response containing the machine_name, file_path,
+            size, hash and updated_at of the stored version, whether the
+            content changed, and a message. The hash is also sent as the ETag
+            header.
+
+    Raises:
+        HTTPException:
+            - 400: If the machine name is not normalized, the content is empty
+              or the front-matter is invalid
+            - 412: If a conditional header does not match the stored version;
+              the ETag header then holds the current version, if any
+            - 500: If there's an error writing the context
+
+    Example:
+        Request:
+            PUT /api/v1/contexts/helpful_tutor
+            Content-Type: application/json
+            If-Match: "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+
+            {
+                "content": "You are a patient tutor who explains concepts with examples."
+            }
+
+        Response (200 OK):
+            ETag: "b5bb9d8014a0f9b1d61e21e796d78dccdf1352f23cd32812f4850b878ae4944c"
+
+            {
+                "machine_name": "helpful_tutor",
+                "file_path": "/app/contexts/helpful_tutor.md",
+                "size": 80,
+                "hash": "b5bb9d8014a0f9b1d61e21e796d78dccdf1352f23cd32812f4850b878ae4944c",
+                "updated_at": 1760688000.0,
+                "changed": true,
+                "message": "Context 'helpful_tutor' saved successfully"
+            }
+
+        Error Response (412 Precondition Failed):
+            {
+                "detail": "Context 'helpful_tutor' does not match If-Match"
+            }
+    """
+    normalized = context_manager.normalize_name(machine_name)
+    if normalized != machine_name:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Machine name must be normalized, e.g. '{normalized}'",
+        )
+
+    try:
+        entry, changed = context_manager.put_context(
+            machine_name,
+            request.content,
+            if_match=parse_etags(http_request.headers.get("if-match")),
+            if_none_match=parse_etags(http_request.headers.get("if-none-match")),
+        )
+    except ValueError as e:
+        logger.error(f"Validation error saving context: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except ContextPreconditionFailed as e:
+        headers = {"ETag": format_etag(e.current_hash)} if e.current_hash else None
+        raise HTTPException(status_code=412, detail=str(e), headers=headers)
+    except Exception as e:
+        logger.error(f"Error saving context: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response.headers["ETag"] = format_etag(entry.hash)
+    return PutContextResponse(
+        machine_name=entry.machine_name,
+        file_path=entry.file_path,
+        size=entry.size,
+        hash=entry.hash,
+        updated_at=entry.updated_at,
+        changed=changed,
+        message=(
+            f"Context '{machine_name}' saved successfully"
+            if changed
+            else f"Context '{machine_name}' is unchanged"
+        ),
+    )
+
+
 @router.delete("/{machine_name}", response_model=DeleteContextResponse)
 async def delete_context(machine_name: str):
     """
     Delete a context file by its machine name.
 
-    This endpoint permanently removes a context file from the contexts directory.
+    This endpoint permanently removes a context from the context store.
     The machine name must match exactly (lowercase with underscores).
 
     Args:
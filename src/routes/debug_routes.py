@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Query
+import logging
+from src.tracing import trace_log
+from src.types.debug import TraceListResponse, TraceRecord
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/traces", response_model=TraceListResponse)
+async def list_traces(limit: int = Query(default=20, ge=1)):
+    """
+    List recent slow request traces.
+
+    Requests taking at least TRACE_SLOW_THRESHOLD seconds are kept in a bounded
+    in-memory ring of TRACE_RING_SIZE traces, so this endpoint shows where the
+    time of recent slow requests went without an external collector.
+
+    Args:
+        limit (int): Maximum number of traces to return. Defaults to 20.
+
+    Returns:
+        TraceListResponse: The threshold, the number of slow traces recorded since
+            startup and the kept traces, most recent first.
+
+    Example:
+        Request:
+            GET /debug/traces?limit=1
+
+        Response (200 OK):
+            {
+                "threshold": 1.0,
+                "recorded": 14,
+                "traces": [
+                    {
+                        "trace_id": "9f86d081884c7d65",
+                        "method": "POST",
+                        "path": "/api/v1/chat",
+                        "status": 200,
+                        "started_at": 1760700000.12,
+                        "duration_ms": 1842.7,
+                        "server_timing": "context;dur=0.3, upstream;dur=1830.5, total;dur=1842.7",
+                        "root": {...}
+                    }
+                ]
+            }
+    """
+    return TraceListResponse(
+        threshold=trace_log.threshold,
+        recorded=trace_log.recorded,
+        traces=trace_log.list(limit),
+    )
+
+
+@router.get("/traces/{trace_id}", response_model=TraceRecord)
+async def get_trace(trace_id: str):
+    """
+    Get one slow request trace.
+
+    Args:
+        trace_id (str): The ID from the X-Trace-Id header of the response.
+
+    Returns:
+        TraceRecord: The trace with its span tree.
+
+    Raises:
+        HTTPException: 404 error if the request was not slow enough to be kept,
+            or its trace has since been dropped from the ring.
+
+    Example:
+        Request:
+            GET /debug/traces/9f86d081884c7d65
+
+        Response (200 OK):
+            {
+                "trace_id": "9f86d081884c7d65",
+                "method": "POST",
+                "path": "/api/v1/chat",
+                ...
+            }
+    """
+    trace = trace_log.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace '{trace_id}' not found")
+    return trace
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Response
+import logging
+from src.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUED,
+    CONTENT_TYPE,
+    UPSTREAM_IN_FLIGHT,
+    registry,
+)
+from src.routes.chat_routes import admission, service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=Response)
+async def metrics():
+    """
+    Expose service metrics in the Prometheus text format.
+
+    Includes:
+        - chat_http_requests_total and chat_http_request_duration_seconds per
+          method and route template, and chat_http_requests_in_progress.
+        - chat_context_resolution_duration_seconds for system context lookups.
+        - chat_upstream_request_duration_seconds per model and outcome, and
+          chat_upstream_requests_in_flight per model.
+        - chat_response_serialization_duration_seconds per route.
+        - chat_prompt_tokens_total and chat_response_tokens_total per model and
+          system context, from the Gemini usage metadata.
+        - chat_admission_active_requests and chat_admission_queued_requests.
+
+    Gauges derived from service state are sampled at scrape time, so they add
+    nothing to the request path.
+
+    Returns:
+        Response: The metrics as text/plain; version=0.0.4.
+
+    Example:
+        Request:
+            GET /metrics
+
+        Response (200 OK):
+            # HELP chat_http_requests_total HTTP requests handled, by method, route template and status code.
+            # TYPE chat_http_requests_total counter
+            chat_http_requests_total{method="POST",route="/api/v1/chat",status="200"} 1027
+            ...
+    """
+    in_flight = dict.fromkeys(service.pool.models, 0)
+    for endpoint in service.pool.endpoints:
+        in_flight[endpoint.model_name] += endpoint.in_flight
+    for model, count in in_flight.items():
+        UPSTREAM_IN_FLIGHT.set(count, model=model)
+
+    stats = admission.stats()
+    ADMISSION_ACTIVE.set(stats["active"])
+    ADMISSION_QUEUED.set(stats["queued"])
+
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
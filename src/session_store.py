@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+from src.tokens import estimate_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-object overhead charged against the memory cap on top of the text size.
+TURN_OVERHEAD = 64
+SESSION_OVERHEAD = 256
+
+
+class Turn:
+    """
+    One message of a conversation.
+
+    Attributes:
+        role (str): "user" or "model", as expected by Gemini contents.
+        text (str): The message text.
+        tokens (int): Estimated token count of the text.
+    """
+
+    __slots__ = ("role", "text", "tokens")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self.tokens = estimate_tokens(text)
+
+    @property
+    def size(self) -> int:
+        """Approximate memory used by the turn, in bytes."""
+        return len(self.text) + TURN_OVERHEAD
+
+
+class _Session:
+    """The recent turns of one conversation."""
+
+    __slots__ = ("turns", "size", "updated")
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.size = SESSION_OVERHEAD
+        self.updated = time.monotonic()
+
+
+class SessionStore:
+    """
+    In-process store of recent conversation turns, keyed by session ID.
+
+    Each session keeps at most max_turns turns in a ring buffer; older turns
+    fall off as new ones arrive. Sessions are kept in LRU order and the least
+    recently used ones are evicted when the store exceeds max_sessions or its
+    approximate memory use exceeds max_bytes. Sessions idle for longer than
+    idle_ttl are dropped as well.
+
+    Attributes:
+        max_turns (int): Turns kept per session.
+        max_sessions (int): Maximum number of sessions kept.
+        max_bytes (int): Approximate memory cap over all sessions, in bytes.
+        idle_ttl (float): Seconds after which an unused session expires.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 20,
+        max_sessions: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 3600,
+    ):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+        self.expirations = 0
+
+    def history(self, session_id: str, token_budget: int = 0) -> List[Turn]:
+        """
+        Get the recent turns of a session, oldest first.
+
+        Args:
+            session_id: The session to look up
+            token_budget: If positive, only the most recent turns whose
+                estimated tokens fit the budget are returned
+
+        Returns:
+            The turns, or an empty list for an unknown or expired session
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            session.updated = time.monotonic()
+            turns = list(session.turns)
+        return self.trim(turns, token_budget)
+
+    @staticmethod
+    def trim(turns: List[Turn], token_budget: int) -> List[Turn]:
+        """
+        Keep the most recent turns that fit a token budget.
+
+        The kept history always starts with a user turn, as Gemini expects.
+
+        Args:
+            turns: The turns, oldest first
+            token_budget: Maximum total estimated tokens; 0 or less keeps all
+                turns the ring buffer still holds
+
+        Returns:
+            The kept turns, oldest first
+        """
+        start = 0
+        if token_budget > 0:
+            used = 0
+            start = len(turns)
+            while start > 0 and used + turns[start - 1].tokens <= token_budget:
+                start -= 1
+                used += turns[start].tokens
+        while start < len(turns) and turns[start].role != "user":
+            start += 1
+        return turns[start:]
+
+    def append(self, session_id: str, *turns: Turn) -> None:
+        """
+        Add turns to a session, creating it if needed.
+
+        Args:
+            session_id: The session to add to
+            turns: The turns, oldest first
+        """
+        with self._lock:
+            now = time.monotonic()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_turns)
+                self._bytes += session.size
+            else:
+                self._sessions.move_to_end(session_id)
+
+            for turn in turns:
+                if len(session.turns) == session.turns.maxlen:
+                    dropped = session.turns[0].size
+                    session.size -= dropped
+                    self._bytes -= dropped
+                session.turns.append(turn)
+                session.size += turn.size
+                self._bytes += turn.size
+            session.updated = now
+
+            while self._sessions and (
+                len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._sessions)))
+                self.evictions += 1
+            self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.updated <= self.idle_ttl:
+                return
+            self._remove(session_id)
+            self.expirations += 1
+
+    def _remove(self, session_id: str) -> None:
+        self._bytes -= self._sessions.pop(session_id).size
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Forget a session.
+
+        Args:
+            session_id: The session to delete
+
+        Returns:
+            True if the session existed
+        """
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get session store counters.
+
+        Returns:
+            Dictionary with sessions, bytes, evictions and expirations
+        """
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,371 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# SimHash counts, for every bit position, the features that have the bit set.
+# The counts of the 8 bits of a byte are kept in 32-bit lanes of one integer:
+# _BYTE_LANES[v] has a 1 in the lane of every bit set in the byte value v.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_BYTE_LANES = [
+    sum(((value >> bit) & 1) << (bit * _LANE_BITS) for bit in range(8))
+    for value in range(256)
+]
+
+# Phrases that carry no meaning for the answer when they open or close a prompt.
+FILLER_PHRASES = [
+    ("thank", "you"),
+    ("please",),
+    ("pls",),
+    ("plz",),
+    ("kindly",),
+    ("thanks",),
+    ("thx",),
+    ("ty",),
+]
+
+
+class SimilarityCache:
+    """
+    Near-duplicate cache for generated responses.
+
+    Prompts are normalized (case, accents, punctuation, emoji and leading or
+    trailing filler words such as "please" are removed) and fingerprinted with
+    a 64-bit SimHash. Fingerprints are indexed LSH-style: the 64 bits are split
+    into max_distance + 1 bands, so any two fingerprints within max_distance
+    bits of each other share at least one identical band. A lookup therefore
+    only inspects the few entries in the matching band buckets, which keeps it
+    well under a millisecond even with a million entries.
+
+    The index is scoped: only prompts sent with the same model, system context
+    and request context can match each other. Like ResponseCache, it is an LRU
+    bounded by entry count and total response size, with per-context TTLs.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of cached responses, in bytes.
+        default_ttl (float): Lifetime of an entry in seconds.
+        context_ttls (Dict[str, float]): Per-context TTL overrides.
+        max_distance (int): Largest Hamming distance between fingerprints that
+            still counts as a hit. 0 only matches identical normalized prompts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 300,
+        context_ttls: Dict[str, float] = None,
+        max_distance: int = 3,
+    ):
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(
+                f"max_distance must be between 0 and {FINGERPRINT_BITS - 1}"
+            )
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.context_ttls = dict(context_ttls or {})
+        self.max_distance = max_distance
+
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands = [
+            (
+                i * width,
+                (1 << (width if i < bands - 1 else FINGERPRINT_BITS - i * width)) - 1,
+            )
+            for i in range(bands)
+        ]
+
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._buckets: Dict[tuple, set] = {}
+        self._by_fingerprint: Dict[tuple, int] = {}
+        self._by_context: Dict[str, set] = {}
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_prompt(text: str) -> str:
+        """
+        Normalize free text for near-duplicate matching.
+
+        Lowercases, strips accents, replaces everything that is not a letter or
+        digit (punctuation, emoji, symbols) with a single space and removes
+        filler words from the start and end of the prompt.
+
+        Args:
+            text: The prompt text
+
+        Returns:
+            The normalized prompt, possibly empty
+        """
+        text = unicodedata.normalize("NFKD", text.lower())
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        words = re.sub(r"[\W_]+", " ", text).split()
+
+        stripped = True
+        while words and stripped:
+            stripped = False
+            for phrase in FILLER_PHRASES:
+                n = len(phrase)
+                if tuple(words[-n:]) == phrase:
+                    del words[-n:]
+                    stripped = True
+                elif tuple(words[:n]) == phrase:
+                    del words[:n]
+                    stripped = True
+        return " ".join(words)
+
+    @staticmethod
+    def fingerprint(normalized: str) -> int:
+        """
+        Compute the 64-bit SimHash of a normalized prompt.
+
+        Word unigrams and bigrams are used as features, so word order matters
+        but a single changed word only moves a few bits.
+
+        Args:
+            normalized: Output of normalize_prompt
+
+        Returns:
+            The fingerprint as an unsigned integer
+        """
+        words = normalized.split()
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        hashes = {
+            feature: hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            for feature in set(features)
+        }
+        digests = b"".join(map(hashes.__getitem__, features))
+
+        # Instead of looping over the 64 bits of every feature, count how often
+        # each value occurs at each byte position of the big-endian digests and
+        # add up the bit counts of the at most 256 distinct values per position.
+        value = 0
+        for position in range(FINGERPRINT_BITS // 8):
+            lanes = sum(
+                _BYTE_LANES[byte] * count
+                for byte, count in Counter(digests[position::8]).items()
+            )
+            shift = FINGERPRINT_BITS - 8 * (position + 1)
+            for bit in range(8):
+                # Set where more features have the bit set than not.
+                if ((lanes >> (bit * _LANE_BITS)) & _LANE_MASK) * 2 > len(features):
+                    value |= 1 << (shift + bit)
+        return value
+
+    @staticmethod
+    def make_scope(
+        model_name: str, system_context: str = None, context: str = None
+    ) -> str:
+        """
+        Build the scope a prompt is matched within.
+
+        Args:
+            model_name: The model the response is generated with
+            system_context: The resolved system context content
+            context: The request context
+
+        Returns:
+            Hex digest identifying the scope
+        """
+        scope = hashlib.sha256()
+        for part in (model_name, system_context or "", context or ""):
+            scope.update(part.encode("utf-8"))
+            scope.update(b"\x00")
+        return scope.hexdigest()
+
+    def make_key(self, scope: str, text: str) -> Optional[Tuple[str, int]]:
+        """
+        Build the lookup key for a prompt.
+
+        Args:
+            scope: The scope built by make_scope
+            text: The prompt text
+
+        Returns:
+            Tuple of scope and fingerprint, or None if the prompt normalizes to
+            nothing and cannot be matched
+        """
+        normalized = self.normalize_prompt(text)
+        if not normalized:
+            return None
+        return scope, self.fingerprint(normalized)
+
+    def ttl_for(self, context_name: str = None) -> float:
+        """
+        Get the TTL applied to entries for a system context.
+
+        Args:
+            context_name: The machine name of the system context
+
+        Returns:
+            The TTL in seconds
+        """
+        return self.context_ttls.get(context_name, self.default_ttl)
+
+    def get(self, key: Tuple[str, int]) -> Optional[str]:
+        """
+        Find a cached response for a similar prompt.
+
+        Args:
+            key: The key built by make_key
+
+        Returns:
+            The response of the closest match within max_distance, or None
+        """
+        scope, fp = key
+        now = time.monotonic()
+        best_id, best_distance = None, self.max_distance + 1
+
+        with self._lock:
+            entry_id = self._by_fingerprint.get(key)
+            if entry_id is not None:
+                best_id, best_distance = entry_id, 0
+            else:
+                for index, (shift, mask) in enumerate(self._bands):
+                    bucket = self._buckets.get((scope, index, (fp >> shift) & mask))
+                    if not bucket:
+                        continue
+                    for candidate in bucket:
+                        distance = (self._entries[candidate][1] ^ fp).bit_count()
+                        if distance < best_distance:
+                            best_id, best_distance = candidate, distance
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_id]
+            if entry[4] <= now:
+                self._remove(best_id)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key: Tuple[str, int], value: str, context_name: str = None) -> None:
+        """
+        Store a response under a prompt fingerprint.
+
+        Args:
+            key: The key built by make_key
+            value: The response text to cache
+            context_name: The machine name of the system context
+        """
+        ttl = self.ttl_for(context_name)
+        size = len(value.encode("utf-8"))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        scope, fp = key
+        with self._lock:
+            existing = self._by_fingerprint.get(key)
+            if existing is not None:
+                self._remove(existing)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (
+                scope,
+                fp,
+                value,
+                size,
+                time.monotonic() + ttl,
+                context_name,
+            )
+            self._by_fingerprint[key] = entry_id
+            self._by_context.setdefault(context_name, set()).add(entry_id)
+            for index, (shift, mask) in enumerate(self._bands):
+                self._buckets.setdefault(
+                    (scope, index, (fp >> shift) & mask), set()
+                ).add(entry_id)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id: int) -> None:
+        scope, fp, _, size, _, context_name = self._entries.pop(entry_id)
+        self._bytes -= size
+        self._by_fingerprint.pop((scope, fp), None)
+
+        for index, (shift, mask) in enumerate(self._bands):
+            bucket_key = (scope, index, (fp >> shift) & mask)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+        ids = self._by_context.get(context_name)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_context[context_name]
+
+    def invalidate_context(self, context_name: str) -> int:
+        """
+        Drop every entry cached for a system context.
+
+        Args:
+            context_name: The machine name of the system context
+
+        Returns:
+            The number of entries removed
+        """
+        with self._lock:
+            ids = list(self._by_context.get(context_name, ()))
+            for entry_id in ids:
+                self._remove(entry_id)
+
+        if ids:
+            logger.info(
+                f"Invalidated {len(ids)} similar responses for '{context_name}'"
+            )
+        return len(ids)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._by_fingerprint.clear()
+            self._by_context.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries and bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
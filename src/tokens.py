@@ -0,0 +1,188 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Estimated tokens reserved for the marker line that replaces trimmed lines.
+MARKER_TOKENS = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without calling a tokenizer.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        Roughly one token per four characters, at least 1
+    """
+    return len(text) // 4 + 1
+
+
+class TrimResult:
+    """
+    A text fitted to a token budget.
+
+    Attributes:
+        text (str): The text to send, trimmed or not.
+        tokens (int): Estimated tokens of text.
+        trimmed_tokens (int): Estimated tokens removed, 0 if nothing was trimmed.
+        trimmed_lines (int): Lines removed, 0 if nothing was trimmed.
+    """
+
+    __slots__ = ("text", "tokens", "trimmed_tokens", "trimmed_lines")
+
+    def __init__(
+        self, text: str, tokens: int, trimmed_tokens: int = 0, trimmed_lines: int = 0
+    ):
+        self.text = text
+        self.tokens = tokens
+        self.trimmed_tokens = trimmed_tokens
+        self.trimmed_lines = trimmed_lines
+
+    @property
+    def trimmed(self) -> bool:
+        """Whether anything was removed."""
+        return self.trimmed_tokens > 0
+
+
+def trim_middle(text: str, max_tokens: int, head_share: float = 0.1) -> TrimResult:
+    """
+    Fit a text to a token budget by dropping lines from its middle.
+
+    Channel dumps and logs carry their most relevant content at the end, so the
+    newest lines are kept. The first lines, which usually say what the text is,
+    are kept up to head_share of the budget. The dropped lines are replaced by
+    a single marker line. A last line that alone exceeds the budget is cut to
+    its final characters.
+
+    Args:
+        text: The text to fit
+        max_tokens: The budget in estimated tokens; 0 or less keeps everything
+        head_share: Share of the budget kept for the first lines
+
+    Returns:
+        The fitted text, with how much was removed
+    """
+    tokens = estimate_tokens(text)
+    if max_tokens <= 0 or tokens <= max_tokens:
+        return TrimResult(text, tokens)
+
+    lines = text.split("\n")
+    costs = [len(line) // 4 + 1 for line in lines]
+    available = max(1, max_tokens - MARKER_TOKENS)
+
+    head_budget = int(available * head_share)
+    head = 0
+    used = 0
+    while head < len(lines) and used + costs[head] <= head_budget:
+        used += costs[head]
+        head += 1
+
+    tail = len(lines)
+    while tail > head and used + costs[tail - 1] <= available:
+        tail -= 1
+        used += costs[tail]
+
+    kept_tail = lines[tail:]
+    if not kept_tail:
+        # Even the last line does not fit: keep its end.
+        tail = len(lines) - 1
+        kept_tail = [lines[-1][-max(1, (available - used) * 4) :]]
+
+    dropped = tail - head
+    marker = f"[... {dropped} lines trimmed ...]" if dropped else "[...]"
+    fitted = "\n".join(lines[:head] + [marker] + kept_tail)
+    fitted_tokens = estimate_tokens(fitted)
+    return TrimResult(fitted, fitted_tokens, max(1, tokens - fitted_tokens), dropped)
+
+
+class TokenCounter:
+    """
+    LRU cache in front of an exact, remote token count.
+
+    Counting with a model's tokenizer costs an API round trip, so results are
+    cached by a hash of the model and text. A failed count falls back to the
+    local estimate and is not cached.
+
+    Attributes:
+        count (Callable): Coroutine function taking (text, model) and returning
+            the exact token count.
+        max_entries (int): Maximum number of cached counts.
+    """
+
+    def __init__(
+        self,
+        count: Callable[[str, str], Awaitable[int]],
+        max_entries: int = 4096,
+    ):
+        self.count = count
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    @staticmethod
+    def make_key(text: str, model: str = None) -> str:
+        key = hashlib.sha256((model or "").encode("utf-8"))
+        key.update(b"\x00")
+        key.update(text.encode("utf-8"))
+        return key.hexdigest()
+
+    async def acount(self, text: str, model: str = None) -> int:
+        """
+        Count the tokens of a text, from the cache when possible.
+
+        Args:
+            text: The text to count
+            model: The model whose tokenizer is used
+
+        Returns:
+            The exact token count, or the estimate if counting failed
+        """
+        key = self.make_key(text, model)
+        with self._lock:
+            tokens = self._entries.get(key)
+            if tokens is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+
+        try:
+            tokens = await self.count(text, model)
+        except Exception as e:
+            logger.warning(f"Token count failed, using the estimate: {e}")
+            with self._lock:
+                self.failures += 1
+            return estimate_tokens(text)
+
+        with self._lock:
+            self._entries[key] = tokens
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tokens
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Counts of cached entries, hits, misses and failed counts
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+            }
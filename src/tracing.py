@@ -0,0 +1,268 @@
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from src.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed stage of a request.
+
+    Attributes:
+        name (str): The stage name, e.g. "upstream".
+        start (float): time.perf_counter() value when the stage started.
+        end (float): time.perf_counter() value when it ended, or None while open.
+        attrs (dict): Extra details, e.g. the model of an upstream call.
+        children (List[Span]): Stages nested in this one.
+    """
+
+    __slots__ = ("name", "start", "end", "attrs", "children")
+
+    def __init__(self, name: str, attrs: Dict = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs or {}
+        self.children: List[Span] = []
+
+    @property
+    def duration(self) -> float:
+        """Seconds spent in the stage so far."""
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float = None) -> Dict:
+        """
+        Convert the span tree to plain data.
+
+        Args:
+            origin: perf_counter value start offsets are relative to; defaults
+                to this span's start
+
+        Returns:
+            Dictionary with name, start_ms, duration_ms, attrs and children
+        """
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": {k: str(v) for k, v in self.attrs.items()},
+            "children": [child.to_dict(origin) for child in list(self.children)],
+        }
+
+
+@contextlib.contextmanager
+def span(name: str, /, **attrs):
+    """
+    Time a stage as a child of the current span.
+
+    Outside a traced request this does nothing beyond a context variable
+    lookup. Spans follow asyncio tasks, since tasks copy the context they were
+    created in.
+
+    Args:
+        name: The stage name
+        attrs: Extra details to keep with the span
+
+    Yields:
+        The new span, or None when no trace is active
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start: float, /, **attrs) -> None:
+    """
+    Add a stage that just ended to the current span.
+
+    For stages that cannot be wrapped in span(), such as the body of a stream
+    that is yielded from an async generator.
+
+    Args:
+        name: The stage name
+        start: time.perf_counter() value when the stage started
+        attrs: Extra details to keep with the span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = Span(name, attrs)
+    child.start = start
+    child.end = time.perf_counter()
+    parent.children.append(child)
+
+
+def annotate(**attrs) -> None:
+    """Add details to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def server_timing(root: Span) -> str:
+    """
+    Build a Server-Timing header value from a span tree.
+
+    Durations of spans with the same name are summed over the whole tree, so
+    for example every upstream attempt counts towards "upstream".
+
+    Args:
+        root: The request span
+
+    Returns:
+        The header value, e.g. "context;dur=0.2, upstream;dur=512.3, total;dur=520.1"
+    """
+    totals: Dict[str, float] = {}
+    pending = list(reversed(root.children))
+    while pending:
+        current = pending.pop()
+        totals[current.name] = totals.get(current.name, 0.0) + current.duration
+        pending.extend(reversed(current.children))
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    parts.append(f"total;dur={root.duration * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class TraceLog:
+    """
+    Bounded in-memory ring of slow request traces.
+
+    Only traces at least threshold seconds long are kept; once the ring is full
+    the oldest trace is dropped for each new one.
+
+    Attributes:
+        threshold (float): Minimum request duration in seconds to keep a trace.
+        capacity (int): Maximum number of traces kept.
+    """
+
+    def __init__(self, threshold: float = 1.0, capacity: int = 100):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._traces: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def offer(self, trace_id: str, root: Span, status: int) -> bool:
+        """
+        Keep a finished trace if it was slow.
+
+        Args:
+            trace_id: The request's trace ID
+            root: The finished request span
+            status: The HTTP status code of the response
+
+        Returns:
+            True if the trace was kept
+        """
+        if root.duration < self.threshold:
+            return False
+        record = {
+            "trace_id": trace_id,
+            "method": root.attrs.get("method", ""),
+            "path": root.attrs.get("path", ""),
+            "status": status,
+            "started_at": time.time() - root.duration,
+            "duration_ms": round(root.duration * 1000, 3),
+            "server_timing": server_timing(root),
+            "root": root.to_dict(),
+        }
+        with self._lock:
+            self._traces.append(record)
+            self.recorded += 1
+        logger.info(
+            f"Slow request {record['method']} {record['path']} took "
+            f"{record['duration_ms']}ms (trace {trace_id}): {record['server_timing']}"
+        )
+        return True
+
+    def list(self, limit: int = None) -> List[Dict]:
+        """
+        Get kept traces, most recent first.
+
+        Args:
+            limit: Maximum number of traces to return
+
+        Returns:
+            The trace records
+        """
+        with self._lock:
+            traces = list(reversed(self._traces))
+        return traces[:limit] if limit else traces
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        """
+        Get a kept trace by ID.
+
+        Args:
+            trace_id: The trace ID from the X-Trace-Id response header
+
+        Returns:
+            The trace record, or None if it was not kept or has been dropped
+        """
+        with self._lock:
+            return next((t for t in self._traces if t["trace_id"] == trace_id), None)
+
+
+trace_log = TraceLog(Config.TRACE_SLOW_THRESHOLD, Config.TRACE_RING_SIZE)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing every HTTP request.
+
+    Opens the root span, adds Server-Timing and X-Trace-Id headers to the
+    response, and offers the finished trace to the slow trace log. For
+    streaming responses the header can only cover the stages finished before
+    the body starts; the kept trace covers the whole stream.
+    """
+
+    def __init__(self, app, log: TraceLog = None):
+        self.app = app
+        self.log = log or trace_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = os.urandom(8).hex()
+        root = Span("request", {"method": scope["method"], "path": scope["path"]})
+        token = _current_span.set(root)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(root).encode()))
+                headers.append((b"x-trace-id", trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            root.end = time.perf_counter()
+            _current_span.reset(token)
+            self.log.offer(trace_id, root, status)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 
 
 class ChatRequest(BaseModel):
@@ -22,6 +22,34 @@ class ChatRequest(BaseModel):
             If not provided, the "default" context will be used if available.
             Defaults to None.
 
+        bypass_cache (bool, optional): When true, the response caches are neither
+            read nor written for this request. Defaults to False.
+
+        priority (str, optional): Admission priority class, one of "high",
+            "normal" or "low". Overrides the X-Priority header. Defaults to None,
+            which means the header value or "normal".
+
+        model (str, optional): Forces a model, bypassing model routing and
+            failover. Must be one of the models of the backend answering the
+            request. Defaults to None.
+
+        session_id (str, optional): Continues a server-side conversation. Recent
+            turns of the session are sent along automatically, so the client does
+            not need to repeat them in context. Defaults to None.
+
+        max_sentences (int, optional): Stops generation once the response has
+            this many sentences, cutting right after the last one. Overrides the
+            system context's max_sentences setting. Defaults to None.
+
+        max_chars (int, optional): Stops generation once the response would
+            exceed this many characters, cutting at the last sentence end or
+            word boundary within the limit. Overrides the system context's
+            max_chars setting. Defaults to None.
+
+        variables (dict, optional): Values for the "{{ name }}" placeholders of
+            the system context, e.g. a bot name or server rules. Placeholders
+            without a value fall back to their default. Defaults to None.
+
     Example:
         {
             "text": "What is the capital of France?",
@@ -33,6 +61,13 @@ class ChatRequest(BaseModel):
     text: str
     context: Optional[str] = None
     system_context: Optional[str] = None
+    bypass_cache: bool = False
+    priority: Optional[Literal["high", "normal", "low"]] = None
+    model: Optional[str] = None
+    session_id: Optional[str] = None
+    max_sentences: Optional[int] = None
+    max_chars: Optional[int] = None
+    variables: Optional[Dict[str, str]] = None
 
 
 class Message(BaseModel):
@@ -89,6 +124,62 @@ class Output(BaseModel):
     content: Message
 
 
+class ResponseMetadata(BaseModel):
+    """
+    Details on how a chat response was produced.
+
+    Attributes:
+        backend (str, optional): The backend that answered: "gemini", "openai" or
+            "echo".
+        model (str, optional): The model that generated the response. None when
+            it was served from a response cache.
+        tier (str, optional): The routing tier chosen for the request. None when
+            routing is disabled or a model was forced.
+        api_key (str, optional): Label of the pool API key used, e.g. "key-2".
+            The key itself is never reported. None for cached responses.
+        attempts (int): Upstream attempts made, including retries, failovers
+            and hedged calls.
+        cached (bool): Whether the response was served from a response cache.
+        latency_ms (float): Time spent producing the response, in milliseconds.
+        history_turns (int): Session history turns sent along with the request.
+        input_tokens (int, optional): Tokens of the text and context sent, as
+            estimated or counted before the call. None without a token budget.
+        trimmed_tokens (int): Tokens removed from the context to fit the budget.
+        trimmed_lines (int): Lines removed from the middle of the context.
+        truncated (bool): Whether generation was stopped early at a sentence or
+            character limit.
+
+    Example:
+        {
+            "backend": "gemini",
+            "model": "gemini-2.5-flash-lite",
+            "tier": "fast",
+            "api_key": "key-2",
+            "attempts": 1,
+            "cached": false,
+            "latency_ms": 412.5,
+            "history_turns": 4,
+            "input_tokens": 7950,
+            "trimmed_tokens": 12050,
+            "trimmed_lines": 310,
+            "truncated": false
+        }
+    """
+
+    backend: Optional[str] = None
+    model: Optional[str] = None
+    tier: Optional[str] = None
+    api_key: Optional[str] = None
+    attempts: int = 0
+    cached: bool = False
+    latency_ms: float = 0.0
+    history_turns: int = 0
+    input_tokens: Optional[int] = None
+    trimmed_tokens: int = 0
+    trimmed_lines: int = 0
+    truncated: bool = False
+
+
 class ChatResponse(BaseModel):
     """
     Response model for the chat endpoint.
@@ -101,6 +192,9 @@ class ChatResponse(BaseModel):
             a single message with the AI's response, but structured as a list to
             support potential future multi-message responses.
 
+        metadata (ResponseMetadata, optional): How the response was produced:
+            model, API key, attempts and latency. Defaults to None.
+
     Example:
         {
             "output": [
@@ -112,8 +206,408 @@ class ChatResponse(BaseModel):
                         "text": "The capital of France is Paris."
                     }
                 }
-            ]
+            ],
+            "metadata": {
+                "backend": "gemini",
+                "model": "gemini-2.5-flash-lite",
+                "api_key": "key-1",
+                "attempts": 1,
+                "cached": false,
+                "latency_ms": 412.5
+            }
         }
     """
 
     output: List[Output]
+    metadata: Optional[ResponseMetadata] = None
+
+
+class CacheTierStats(BaseModel):
+    """
+    Counters for a single response cache tier.
+
+    Attributes:
+        enabled (bool): Whether the cache tier is enabled.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that were not in the cache or had expired.
+        evictions (int): Number of entries evicted to respect the size bounds.
+        entries (int): Number of entries currently cached.
+        bytes (int): Total size of the cached responses in bytes.
+
+    Example:
+        {
+            "enabled": true,
+            "hits": 120,
+            "misses": 30,
+            "evictions": 0,
+            "entries": 30,
+            "bytes": 5120
+        }
+    """
+
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class CacheStatsResponse(BaseModel):
+    """
+    Response model for the response cache statistics endpoint.
+
+    Attributes:
+        exact (CacheTierStats): Counters of the exact-match cache.
+        similarity (CacheTierStats): Counters of the near-duplicate cache.
+
+    Example:
+        {
+            "exact": {"enabled": true, "hits": 120, "misses": 30, ...},
+            "similarity": {"enabled": true, "hits": 12, "misses": 18, ...}
+        }
+    """
+
+    exact: CacheTierStats
+    similarity: CacheTierStats
+
+
+class BatchChatRequest(BaseModel):
+    """
+    Request model for the batch chat endpoint.
+
+    Attributes:
+        requests (List[ChatRequest]): The chat requests to answer. Each item is
+            processed exactly as if it had been sent to POST /api/v1/chat.
+
+    Example:
+        {
+            "requests": [
+                {"text": "What is the capital of France?"},
+                {"text": "Summarize this channel.", "system_context": "moderator"}
+            ]
+        }
+    """
+
+    requests: List[ChatRequest]
+
+
+class BatchChatItem(BaseModel):
+    """
+    Result of a single request within a batch.
+
+    Attributes:
+        index (int): Position of the request in the submitted batch.
+
+        status_code (int): The HTTP status the request would have produced on
+            its own, e.g. 200, 404 or 500.
+
+        response (ChatResponse, optional): The chat response when status_code is 200.
+
+        error (str, optional): Error detail when the request failed.
+
+    Example:
+        {
+            "index": 1,
+            "status_code": 404,
+            "response": null,
+            "error": "Context 'moderator' not found"
+        }
+    """
+
+    index: int
+    status_code: int
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+    """
+    Response model for the batch chat endpoint.
+
+    Attributes:
+        results (List[BatchChatItem]): One result per submitted request, in the
+            order the requests were submitted.
+
+    Example:
+        {
+            "results": [
+                {"index": 0, "status_code": 200, "response": {"output": [...]}, "error": null},
+                {"index": 1, "status_code": 404, "response": null, "error": "Context 'moderator' not found"}
+            ]
+        }
+    """
+
+    results: List[BatchChatItem]
+
+
+class CoalescingStatsResponse(BaseModel):
+    """
+    Response model for the request coalescing statistics endpoint.
+
+    Attributes:
+        enabled (bool): Whether identical in-flight requests are coalesced.
+        calls (int): Number of upstream calls actually made.
+        shared (int): Number of requests that reused another request's in-flight
+            upstream call, i.e. upstream calls saved.
+        in_flight (int): Number of distinct calls currently in flight.
+
+    Example:
+        {
+            "enabled": true,
+            "calls": 950,
+            "shared": 50,
+            "in_flight": 3
+        }
+    """
+
+    enabled: bool
+    calls: int = 0
+    shared: int = 0
+    in_flight: int = 0
+
+
+class AdmissionStatsResponse(BaseModel):
+    """
+    Response model for the admission control statistics endpoint.
+
+    Attributes:
+        active (int): Requests currently being processed.
+        queued (int): Requests currently waiting for admission.
+        queued_by_priority (Dict[str, int]): Waiting requests per priority class.
+        admitted (int): Requests admitted since startup.
+        rate_limited (int): Requests rejected with 429 by per-client rate limits.
+        shed (int): Requests rejected with 503 because the queue was full or the
+            estimated wait exceeded the deadline.
+        timed_out (int): Queued requests rejected with 503 after waiting too long.
+        avg_wait_ms (float): Moving average of the queue wait of admitted requests.
+        max_wait_ms (float): Longest queue wait of an admitted request.
+        avg_service_ms (float): Moving average of the time a request holds a slot.
+
+    Example:
+        {
+            "active": 128,
+            "queued": 12,
+            "queued_by_priority": {"high": 2, "normal": 10, "low": 0},
+            "admitted": 10542,
+            "rate_limited": 17,
+            "shed": 3,
+            "timed_out": 0,
+            "avg_wait_ms": 41.2,
+            "max_wait_ms": 950.0,
+            "avg_service_ms": 870.5
+        }
+    """
+
+    active: int
+    queued: int
+    queued_by_priority: Dict[str, int]
+    admitted: int
+    rate_limited: int
+    shed: int
+    timed_out: int
+    avg_wait_ms: float
+    max_wait_ms: float
+    avg_service_ms: float
+
+
+class BreakerStats(BaseModel):
+    """
+    Circuit breaker state and counters.
+
+    Attributes:
+        state (str): "closed", "open" or "half_open".
+        consecutive_failures (int): Transient failures since the last success.
+        opened (int): Number of times the breaker opened.
+        rejected (int): Calls failed fast while the breaker was open.
+    """
+
+    state: str
+    consecutive_failures: int
+    opened: int
+    rejected: int
+
+
+class HedgingStats(BaseModel):
+    """
+    Hedged request counters.
+
+    Attributes:
+        enabled (bool): Whether hedging is enabled.
+        calls (int): Upstream calls made through the hedging policy.
+        hedged (int): Calls for which a backup call was sent.
+        wins (int): Hedged calls where the backup finished first.
+        hedge_rate (float): Fraction of calls that were hedged.
+    """
+
+    enabled: bool
+    calls: int = 0
+    hedged: int = 0
+    wins: int = 0
+    hedge_rate: float = 0.0
+
+
+class UpstreamEndpointStats(BaseModel):
+    """
+    Health of one API key and model pair of the upstream pool.
+
+    Attributes:
+        api_key (str): Label of the API key, e.g. "key-1".
+        model (str): The model name.
+        in_flight (int): Calls currently running.
+        latency_ms (float, optional): EWMA of successful call latency, or None
+            before the first success.
+        error_rate (float): EWMA of the transient failure rate.
+        benched (bool): Whether the pair is skipped after a quota error.
+        calls (int): Calls sent to the pair.
+        failures (int): Transient failures of the pair.
+        times_benched (int): Number of quota errors that benched the pair.
+    """
+
+    api_key: str
+    model: str
+    in_flight: int
+    latency_ms: Optional[float] = None
+    error_rate: float
+    benched: bool
+    calls: int
+    failures: int
+    times_benched: int
+
+
+class UpstreamPoolStats(BaseModel):
+    """
+    Upstream pool statistics.
+
+    Attributes:
+        failovers (int): Calls sent to a secondary model because the models
+            before it were saturated or benched.
+        endpoints (List[UpstreamEndpointStats]): One entry per key and model pair.
+    """
+
+    failovers: int
+    endpoints: List[UpstreamEndpointStats]
+
+
+class RoutingStats(BaseModel):
+    """
+    Model routing counters.
+
+    Attributes:
+        enabled (bool): Whether routing tiers are configured.
+        routed (Dict[str, int]): Requests routed to each tier.
+        escalations (int): Requests moved to a higher tier because the model of
+            the tier they needed was unhealthy.
+    """
+
+    enabled: bool
+    routed: Dict[str, int] = {}
+    escalations: int = 0
+
+
+class UpstreamStatsResponse(BaseModel):
+    """
+    Response model for the upstream resilience statistics endpoint.
+
+    Attributes:
+        breaker (BreakerStats): Circuit breaker state and counters.
+        retries (int): Number of upstream retries performed.
+        hedging (HedgingStats): Hedged request counters.
+        pool (UpstreamPoolStats): Per key and model health and failovers.
+        routing (RoutingStats): Requests per routing tier.
+
+    Example:
+        {
+            "breaker": {"state": "closed", "consecutive_failures": 0, "opened": 2, "rejected": 40},
+            "retries": 118,
+            "hedging": {"enabled": true, "calls": 5000, "hedged": 240, "wins": 180, "hedge_rate": 0.048},
+            "pool": {"failovers": 12, "endpoints": [{"api_key": "key-1", "model": "gemini-2.5-flash-lite", ...}]},
+            "routing": {"enabled": true, "routed": {"fast": 4700, "strong": 300}, "escalations": 4}
+        }
+    """
+
+    breaker: BreakerStats
+    retries: int
+    hedging: HedgingStats
+    pool: UpstreamPoolStats
+    routing: RoutingStats
+
+
+class SessionStatsResponse(BaseModel):
+    """
+    Response model for the session statistics endpoint.
+
+    Attributes:
+        sessions (int): Number of conversation sessions kept.
+        bytes (int): Approximate memory used by all sessions.
+        evictions (int): Sessions evicted to respect the size bounds.
+        expirations (int): Sessions dropped after being idle.
+
+    Example:
+        {
+            "sessions": 1520,
+            "bytes": 3145728,
+            "evictions": 0,
+            "expirations": 312
+        }
+    """
+
+    sessions: int
+    bytes: int
+    evictions: int
+    expirations: int
+
+
+class DeleteSessionResponse(BaseModel):
+    """
+    Response model for session deletion.
+
+    Attributes:
+        message (str): A success message confirming the session was deleted.
+
+    Example:
+        {
+            "message": "Session 'user-42' deleted successfully"
+        }
+    """
+
+    message: str
+
+
+class BackendInfo(BaseModel):
+    """
+    A text generation backend.
+
+    Attributes:
+        name (str): The backend name, as used in LLM_BACKEND and CONTEXT_BACKENDS.
+        models (List[str]): Models a request answered by this backend may force.
+    """
+
+    name: str
+    models: List[str]
+
+
+class BackendsResponse(BaseModel):
+    """
+    Response model for the backend listing endpoint.
+
+    Attributes:
+        default (str): Backend answering contexts without a preference.
+        contexts (Dict[str, str]): Preferred backend per context machine name.
+        backends (List[BackendInfo]): The available backends.
+
+    Example:
+        {
+            "default": "gemini",
+            "contexts": {"autocomplete": "openai"},
+            "backends": [
+                {"name": "gemini", "models": ["gemini-2.5-flash-lite"]},
+                {"name": "openai", "models": ["local"]},
+                {"name": "echo", "models": ["echo"]}
+            ]
+        }
+    """
+
+    default: str
+    contexts: Dict[str, str]
+    backends: List[BackendInfo]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class CreateContextRequest(BaseModel):
@@ -56,24 +56,131 @@ class ContextInfo(BaseModel):
     """
     Information model for a single context.
 
-    This model represents metadata about a context file, used when listing
+    This model represents metadata about a context, used when listing
     available contexts.
 
     Attributes:
         machine_name (str): The normalized machine name of the context.
             This is used to reference the context in API calls.
 
-        file_path (str): The absolute file system path to the context file.
+        file_path (str, optional): The file system path to the context file.
+            None when contexts are kept in the SQLite store.
+
+        size (int): Size of the context content in bytes.
+
+        hash (str): SHA-256 hex digest of the context content.
+
+        updated_at (float): When the context was last written, as a Unix
+            timestamp.
 
     Example:
         {
             "machine_name": "helpful_tutor",
-            "file_path": "/app/contexts/helpful_tutor.md"
+            "file_path": "/app/contexts/helpful_tutor.md",
+            "size": 72,
+            "hash": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+            "updated_at": 1760688000.0
         }
     """
 
     machine_name: str
-    file_path: str
+    file_path: Optional[str] = None
+    size: int
+    hash: str
+    updated_at: float
+
+
+class ContextResponse(ContextInfo):
+    """
+    Response model for fetching a single context.
+
+    This model holds the full content of a context along with its metadata.
+    The hash is also sent as the ETag header of the response.
+
+    Attributes:
+        machine_name (str): The normalized machine name of the context.
+
+        file_path (str, optional): The file system path to the context file.
+            None when contexts are kept in the SQLite store.
+
+        size (int): Size of the context content in bytes.
+
+        hash (str): SHA-256 hex digest of the content, identifying its version.
+
+        updated_at (float): When the context was last written, as a Unix
+            timestamp.
+
+        content (str): The full content of the context, including any
+            front-matter.
+
+    Example:
+        {
+            "machine_name": "helpful_tutor",
+            "file_path": "/app/contexts/helpful_tutor.md",
+            "size": 72,
+            "hash": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+            "updated_at": 1760688000.0,
+            "content": "You are a patient and encouraging tutor who explains concepts clearly."
+        }
+    """
+
+    content: str
+
+
+class PutContextRequest(BaseModel):
+    """
+    Request model for creating or replacing a context by its machine name.
+
+    Attributes:
+        content (str): The full context content to store, optionally starting
+            with front-matter settings. Cannot be empty.
+
+    Example:
+        {
+            "content": "You are a patient and encouraging tutor who explains concepts clearly."
+        }
+    """
+
+    content: str
+
+
+class PutContextResponse(ContextInfo):
+    """
+    Response model for creating or replacing a context by its machine name.
+
+    Attributes:
+        machine_name (str): The machine name of the context.
+
+        file_path (str, optional): The file system path to the context file.
+            None when contexts are kept in the SQLite store.
+
+        size (int): Size of the stored content in bytes.
+
+        hash (str): SHA-256 hex digest of the stored content, also sent as the
+            ETag header.
+
+        updated_at (float): When the context was last written, as a Unix
+            timestamp.
+
+        changed (bool): Whether the content differed from the stored version.
+            An unchanged context is not written again.
+
+        message (str): A message describing the outcome.
+
+    Example:
+        {
+            "machine_name": "helpful_tutor",
+            "file_path": "/app/contexts/helpful_tutor.md",
+            "size": 72,
+            "hash": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+            "updated_at": 1760688000.0,
+            "changed": true,
+            "message": "Context 'helpful_tutor' saved successfully"
+        }
+    """
+
+    changed: bool
+    message: str
 
 
 class ListContextsResponse(BaseModel):
@@ -81,28 +188,33 @@ class ListContextsResponse(BaseModel):
     Response model for listing contexts.
 
     This model defines the structure of the response returned when listing
-    all available context files.
+    available contexts, either all at once or one page at a time.
 
     Attributes:
         contexts (List[ContextInfo]): A list of context information objects,
-            each containing the machine name and file path of a context.
+            each containing the machine name, file path and metadata of a
+            context, sorted by machine name.
+
+        next_cursor (str, optional): The cursor to pass to get the next page,
+            or None on the last page and when the list is not paged.
 
     Example:
         {
             "contexts": [
                 {
                     "machine_name": "default",
-                    "file_path": "/app/contexts/default.md"
-                },
-                {
-                    "machine_name": "helpful_tutor",
-                    "file_path": "/app/contexts/helpful_tutor.md"
+                    "file_path": "/app/contexts/default.md",
+                    "size": 1204,
+                    "hash": "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+                    "updated_at": 1760688000.0
                 }
-            ]
+            ],
+            "next_cursor": null
         }
     """
 
     contexts: List[ContextInfo]
+    next_cursor: Optional[str] = None
 
 
 class DeleteContextResponse(BaseModel):
@@ -0,0 +1,83 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class SpanRecord(BaseModel):
+    """
+    One timed stage of a traced request.
+
+    Attributes:
+        name (str): The stage name, e.g. "context", "upstream" or "serialize".
+        start_ms (float): Start of the stage, in milliseconds after the request started.
+        duration_ms (float): Time spent in the stage, in milliseconds.
+        attrs (Dict[str, str]): Extra details, e.g. the model of an upstream call.
+        children (List[SpanRecord]): Stages nested in this one.
+
+    Example:
+        {
+            "name": "upstream",
+            "start_ms": 1.42,
+            "duration_ms": 1830.5,
+            "attrs": {"model": "gemini-2.5-flash-lite", "key": "key-0"},
+            "children": []
+        }
+    """
+
+    name: str
+    start_ms: float
+    duration_ms: float
+    attrs: Dict[str, str] = {}
+    children: List["SpanRecord"] = []
+
+
+class TraceRecord(BaseModel):
+    """
+    A slow request trace.
+
+    Attributes:
+        trace_id (str): The ID sent in the X-Trace-Id response header.
+        method (str): The HTTP method.
+        path (str): The request path.
+        status (int): The HTTP status code of the response.
+        started_at (float): Unix timestamp of the start of the request.
+        duration_ms (float): Total request duration, in milliseconds.
+        server_timing (str): The stage durations in Server-Timing format,
+            covering the whole request.
+        root (SpanRecord): The request span with its stages.
+
+    Example:
+        {
+            "trace_id": "9f86d081884c7d65",
+            "method": "POST",
+            "path": "/api/v1/chat",
+            "status": 200,
+            "started_at": 1760700000.12,
+            "duration_ms": 1842.7,
+            "server_timing": "context;dur=0.3, upstream;dur=1830.5, total;dur=1842.7",
+            "root": {"name": "request", "start_ms": 0, "duration_ms": 1842.7, ...}
+        }
+    """
+
+    trace_id: str
+    method: str
+    path: str
+    status: int
+    started_at: float
+    duration_ms: float
+    server_timing: str
+    root: SpanRecord
+
+
+class TraceListResponse(BaseModel):
+    """
+    Response model for the slow trace listing.
+
+    Attributes:
+        threshold (float): Request duration in seconds from which traces are kept.
+        recorded (int): Slow traces recorded since startup, including dropped ones.
+        traces (List[TraceRecord]): Kept traces, most recent first.
+    """
+
+    threshold: float
+    recorded: int
+    traces: List[TraceRecord]
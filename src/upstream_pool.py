@@ -0,0 +1,301 @@
+import threading
+import time
+from typing import Dict, List, Sequence
+from google.genai import errors
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_quota_error(exc: Exception) -> bool:
+    """
+    Check whether an upstream error means the API key ran out of quota.
+
+    Args:
+        exc: The exception raised by the upstream call
+
+    Returns:
+        True for 429 RESOURCE_EXHAUSTED responses
+    """
+    return isinstance(exc, errors.APIError) and exc.code == 429
+
+
+class PoolExhaustedError(Exception):
+    """
+    Raised instead of calling the upstream while every endpoint is benched.
+
+    Attributes:
+        retry_after (float): Seconds until the first endpoint comes off the bench.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Every upstream API key is out of quota")
+        self.retry_after = retry_after
+
+
+class UpstreamKey:
+    """
+    One API key of the pool with its client.
+
+    Attributes:
+        label (str): Name reported in metadata and stats, e.g. "key-1". The key
+            itself is never reported.
+        client: The genai client authenticated with the key.
+        context_cache: The GeminiContextCache of this client, if enabled. Cached
+            content belongs to the project of the key that created it.
+    """
+
+    def __init__(self, label: str, client):
+        self.label = label
+        self.client = client
+        self.context_cache = None
+
+
+class UpstreamEndpoint:
+    """
+    A (key, model) pair requests can be sent to, with its health statistics.
+
+    Attributes:
+        key (UpstreamKey): The key the requests are authenticated with.
+        model_name (str): The model the requests are sent to.
+        in_flight (int): Calls currently running.
+        latency (float): EWMA of successful call latency in seconds, or None
+            before the first success.
+        error_rate (float): EWMA of the transient failure rate, between 0 and 1.
+        benched_until (float): time.monotonic() value until which the endpoint
+            is skipped after a quota error.
+    """
+
+    def __init__(self, key: UpstreamKey, model_name: str):
+        self.key = key
+        self.model_name = model_name
+        self.in_flight = 0
+        self.latency = None
+        self.error_rate = 0.0
+        self.benched_until = 0.0
+
+        self.calls = 0
+        self.failures = 0
+        self.benched = 0
+
+    def score(self) -> float:
+        """
+        Get the expected cost of sending one more call here; lower is better.
+
+        Endpoints without a latency sample score as fast, so new or recovered
+        endpoints receive traffic and get measured.
+        """
+        latency = self.latency if self.latency is not None else 0.001
+        return latency * (self.in_flight + 1) / max(1 - self.error_rate, 0.05)
+
+
+class UpstreamPool:
+    """
+    Load-balances upstream calls over several API keys and models.
+
+    Every key is combined with every model. Models are tried in the configured
+    order: a call goes to the endpoint of the first model that has an available
+    endpoint, and among those to the one with the lowest score, based on an
+    EWMA of its latency and error rate and on its current load. An endpoint is
+    unavailable while it is benched after a quota error, or while it has
+    max_in_flight calls running. When every endpoint of a model is unavailable
+    the model counts as saturated and traffic fails over to the next one. If
+    every endpoint is saturated or excluded, the least loaded endpoint that is
+    not benched is used anyway, preferring the earliest model. If every
+    endpoint is benched, calls fail fast with PoolExhaustedError instead of
+    spending more requests on keys known to be out of quota. Callers may pass
+    their own model order per call, e.g. as chosen by the ModelRouter.
+
+    Attributes:
+        keys (List[UpstreamKey]): The API keys, in configuration order.
+        models (List[str]): The models, primary first.
+        endpoints (List[UpstreamEndpoint]): Every (key, model) pair.
+        bench_seconds (float): How long an endpoint is skipped after a quota error.
+        max_in_flight (int): Concurrent calls per endpoint before it counts as
+            saturated. 0 or less means unlimited.
+        alpha (float): Weight of the newest sample in the EWMAs.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[UpstreamKey],
+        models: Sequence[str],
+        bench_seconds: float = 60,
+        max_in_flight: int = 0,
+        alpha: float = 0.2,
+    ):
+        self.keys = list(keys)
+        self.models = list(models)
+        self.bench_seconds = bench_seconds
+        self.max_in_flight = max_in_flight
+        self.alpha = alpha
+        self.endpoints = [
+            UpstreamEndpoint(key, model) for model in self.models for key in self.keys
+        ]
+        self._by_model: Dict[str, List[UpstreamEndpoint]] = {
+            model: [e for e in self.endpoints if e.model_name == model]
+            for model in self.models
+        }
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    @property
+    def primary_model(self) -> str:
+        """The first configured model."""
+        return self.models[0]
+
+    def _available(self, endpoint: UpstreamEndpoint, now: float) -> bool:
+        if endpoint.benched_until > now:
+            return False
+        return self.max_in_flight <= 0 or endpoint.in_flight < self.max_in_flight
+
+    def acquire(
+        self, exclude: Sequence[UpstreamEndpoint] = (), models: Sequence[str] = None
+    ) -> UpstreamEndpoint:
+        """
+        Pick the endpoint for the next call and count it as in flight.
+
+        Args:
+            exclude: Endpoints not to pick if any other is available, e.g. the
+                ones that failed earlier attempts of the same request
+            models: Models to consider, preferred first. Defaults to every
+                model of the pool in configuration order.
+
+        Returns:
+            The chosen endpoint; pass it to release when the call ends
+
+        Raises:
+            PoolExhaustedError: If every endpoint of the models is benched
+        """
+        models = models or self.models
+        now = time.monotonic()
+        with self._lock:
+            chosen = None
+            for index, model in enumerate(models):
+                candidates = [
+                    e
+                    for e in self._by_model[model]
+                    if e not in exclude and self._available(e, now)
+                ]
+                if candidates:
+                    chosen = min(candidates, key=UpstreamEndpoint.score)
+                    if index > 0:
+                        self.failovers += 1
+                    break
+
+            if chosen is None:
+                unbenched = [
+                    (index, e.in_flight, e)
+                    for index, model in enumerate(models)
+                    for e in self._by_model[model]
+                    if e.benched_until <= now
+                ]
+                if not unbenched:
+                    retry_after = min(
+                        e.benched_until
+                        for model in models
+                        for e in self._by_model[model]
+                    )
+                    raise PoolExhaustedError(retry_after - now)
+                chosen = min(unbenched, key=lambda item: item[:2])[2]
+
+            chosen.in_flight += 1
+            chosen.calls += 1
+            return chosen
+
+    def release(
+        self,
+        endpoint: UpstreamEndpoint,
+        started: float,
+        error: Exception = None,
+        transient: bool = False,
+    ) -> None:
+        """
+        Record the outcome of a call picked with acquire.
+
+        Args:
+            endpoint: The endpoint returned by acquire
+            started: time.monotonic() value when the call started
+            error: The exception the call failed with, if any
+            transient: Whether the error is transient; only transient errors
+                count against the endpoint's error rate
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+            failed = error is not None and transient
+            endpoint.error_rate += (float(failed) - endpoint.error_rate) * self.alpha
+            if error is None:
+                latency = time.monotonic() - started
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += (latency - endpoint.latency) * self.alpha
+            elif failed:
+                endpoint.failures += 1
+
+            if error is not None and is_quota_error(error):
+                endpoint.benched_until = time.monotonic() + self.bench_seconds
+                endpoint.benched += 1
+                logger.warning(
+                    f"Benching {endpoint.key.label}/{endpoint.model_name} for "
+                    f"{self.bench_seconds}s after a quota error"
+                )
+
+    def model_health(self, model_name: str) -> Dict:
+        """
+        Get the health of a model over all keys.
+
+        Args:
+            model_name: The model to look up
+
+        Returns:
+            Dictionary with available (some key is neither benched nor
+            saturated), error_rate and latency (the best over the keys; latency
+            is None before the first success)
+        """
+        now = time.monotonic()
+        endpoints = self._by_model.get(model_name, [])
+        latencies = [e.latency for e in endpoints if e.latency is not None]
+        return {
+            "available": any(self._available(e, now) for e in endpoints),
+            "error_rate": min((e.error_rate for e in endpoints), default=1.0),
+            "latency": min(latencies) if latencies else None,
+        }
+
+    def abandon(self, endpoint: UpstreamEndpoint) -> None:
+        """
+        Release an endpoint whose call was cancelled, without recording an outcome.
+
+        Args:
+            endpoint: The endpoint returned by acquire
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def stats(self) -> Dict:
+        """
+        Get per-endpoint health and the failover count.
+
+        Returns:
+            Dictionary with failovers and an endpoints list
+        """
+        now = time.monotonic()
+        return {
+            "failovers": self.failovers,
+            "endpoints": [
+                {
+                    "api_key": e.key.label,
+                    "model": e.model_name,
+                    "in_flight": e.in_flight,
+                    "latency_ms": (
+                        round(e.latency * 1000, 3) if e.latency is not None else None
+                    ),
+                    "error_rate": round(e.error_rate, 4),
+                    "benched": e.benched_until > now,
+                    "calls": e.calls,
+                    "failures": e.failures,
+                    "times_benched": e.benched,
+                }
+                for e in self.endpoints
+            ],
+        }
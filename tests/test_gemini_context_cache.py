@@ -0,0 +1,241 @@
+"""
+Tests of the Gemini cached-content path, against a fake genai client.
+
+    python -m unittest discover -s tests
+"""
+
+import asyncio
+import time
+import types
+import unittest
+from unittest import mock
+from google.genai import errors
+from src.config import Config
+from src.geminiservice import GeminiTextService
+
+MODEL = "gemini-test"
+SYSTEM_CONTEXT = "You are a meticulous assistant. " * 20
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeCaches:
+    """Records cachedContents calls; shared by the sync and async clients."""
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+
+    def create(self, model, config=None):
+        name = f"cachedContents/{len(self.created) + 1}"
+        self.created.append((model, config.system_instruction))
+        return types.SimpleNamespace(name=name)
+
+    def update(self, name, config=None):
+        self.updated.append(name)
+        return types.SimpleNamespace(name=name)
+
+    def delete(self, name, config=None):
+        self.deleted.append(name)
+
+
+class FakeAsyncCaches:
+    def __init__(self, caches: FakeCaches):
+        self.caches = caches
+
+    async def create(self, model, config=None):
+        return self.caches.create(model, config)
+
+    async def update(self, name, config=None):
+        return self.caches.update(name, config)
+
+
+class FakeModels:
+    """
+    Answers generate_content, rejecting cached-content configs with
+    reject_cached when it is set.
+    """
+
+    def __init__(self):
+        self.configs = []
+        self.reject_cached = None
+
+    def _answer(self, config):
+        self.configs.append(dict(config))
+        if self.reject_cached is not None and "cached_content" in config:
+            raise self.reject_cached
+        return FakeResponse(f"answer {len(self.configs)}")
+
+    def generate_content(self, model, contents, config=None):
+        return self._answer(config)
+
+
+class FakeAsyncModels:
+    def __init__(self, models: FakeModels):
+        self.models = models
+
+    async def generate_content(self, model, contents, config=None):
+        return self.models._answer(config)
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+        self.caches = FakeCaches()
+        self.aio = types.SimpleNamespace(
+            models=FakeAsyncModels(self.models),
+            caches=FakeAsyncCaches(self.caches),
+        )
+
+
+def client_error(code: int, message: str, status: str) -> errors.ClientError:
+    return errors.ClientError(
+        code, {"error": {"code": code, "message": message, "status": status}}
+    )
+
+
+class GeminiContextCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        settings = {
+            "GEMINI_CONTEXT_CACHE_ENABLED": True,
+            "GEMINI_CONTEXT_CACHE_MIN_CHARS": 100,
+            "GEMINI_CONTEXT_CACHE_TTL": 3600,
+            "RESPONSE_CACHE_ENABLED": False,
+            "SIMILARITY_CACHE_ENABLED": False,
+            "LLM_COALESCE_REQUESTS": False,
+            "LLM_HEDGE_ENABLED": False,
+            "TOKEN_COUNT_EXACT": False,
+            "LLM_RETRY_MAX_ATTEMPTS": 1,
+            "LLM_MODELS": [MODEL],
+            "LLM_MODEL_TIERS": {},
+        }
+        for name, value in settings.items():
+            patcher = mock.patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = FakeClient()
+        self.service = GeminiTextService(client=self.client)
+        self.context_cache = self.service.pool.keys[0].context_cache
+
+    async def generate(self, system_context: str = SYSTEM_CONTEXT):
+        return await self.service.agenerate(
+            "Hello?", system_context=system_context, system_context_name="tutor"
+        )
+
+    async def test_creates_cached_content_once(self):
+        await self.generate()
+        await self.generate()
+
+        self.assertEqual(self.client.caches.created, [(MODEL, SYSTEM_CONTEXT)])
+        for config in self.client.models.configs:
+            self.assertEqual(config["cached_content"], "cachedContents/1")
+            self.assertNotIn("system_instruction", config)
+
+    async def test_short_context_is_sent_inline(self):
+        await self.generate("Be brief.")
+
+        self.assertEqual(self.client.caches.created, [])
+        self.assertEqual(
+            self.client.models.configs[0]["system_instruction"], "Be brief."
+        )
+
+    async def test_refreshes_handle_before_ttl_runs_out(self):
+        await self.generate()
+        handle = next(iter(self.context_cache._handles.values()))
+        handle.expires_at = time.monotonic() + 1
+
+        await self.generate()
+
+        self.assertEqual(self.client.caches.updated, ["cachedContents/1"])
+        self.assertEqual(len(self.client.caches.created), 1)
+        self.assertGreater(handle.expires_at, time.monotonic() + 3000)
+        self.assertEqual(self.context_cache.stats()["refreshed"], 1)
+
+    async def test_falls_back_inline_when_cached_content_is_rejected(self):
+        rejections = [
+            client_error(400, "Cached content is too old", "INVALID_ARGUMENT"),
+            client_error(403, "CachedContent access denied", "PERMISSION_DENIED"),
+            client_error(404, "CachedContent not found", "NOT_FOUND"),
+        ]
+        for rejection in rejections:
+            with self.subTest(code=rejection.code):
+                await self.generate()
+                self.client.models.reject_cached = rejection
+                self.client.models.configs.clear()
+
+                result = await self.generate()
+
+                self.assertTrue(result.text.startswith("answer"))
+                rejected, inline = self.client.models.configs
+                self.assertIn("cached_content", rejected)
+                self.assertNotIn("cached_content", inline)
+                self.assertEqual(inline["system_instruction"], SYSTEM_CONTEXT)
+                self.assertEqual(self.context_cache.stats()["handles"], 0)
+                self.client.models.reject_cached = None
+
+    def test_sync_path_falls_back_inline(self):
+        self.service.generate_response("Hello?", system_context=SYSTEM_CONTEXT)
+        self.client.models.reject_cached = client_error(
+            404, "CachedContent not found", "NOT_FOUND"
+        )
+
+        text = self.service.generate_response("Hello?", system_context=SYSTEM_CONTEXT)
+
+        self.assertTrue(text.startswith("answer"))
+        self.assertNotIn("cached_content", self.client.models.configs[-1])
+
+    async def test_other_client_errors_do_not_fall_back(self):
+        others = [
+            client_error(
+                400, "Request contains an invalid argument", "INVALID_ARGUMENT"
+            ),
+            client_error(401, "CachedContent requires a valid key", "UNAUTHENTICATED"),
+            client_error(429, "Quota exceeded for cachedContent", "RESOURCE_EXHAUSTED"),
+        ]
+        await self.generate()
+        for error in others:
+            with self.subTest(code=error.code):
+                self.client.models.reject_cached = error
+                self.client.models.configs.clear()
+
+                with self.assertRaises(errors.ClientError):
+                    await self.generate()
+
+                self.assertEqual(len(self.client.models.configs), 1)
+                self.assertEqual(self.context_cache.stats()["handles"], 1)
+                # Give the quota-benched key back for the next case.
+                for endpoint in self.service.pool.endpoints:
+                    endpoint.benched_until = 0
+
+    async def test_context_change_drops_and_deletes_handles(self):
+        await self.generate()
+
+        self.service.invalidate_context("tutor")
+
+        self.assertEqual(self.context_cache.stats()["handles"], 0)
+        for _ in range(100):
+            if self.client.caches.deleted:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.client.caches.deleted, ["cachedContents/1"])
+
+        await self.generate()
+        self.assertEqual(len(self.client.caches.created), 2)
+
+    async def test_other_contexts_keep_their_handles(self):
+        await self.generate()
+
+        self.service.invalidate_context("another")
+
+        self.assertEqual(self.context_cache.stats()["handles"], 1)
+        self.assertEqual(self.client.caches.deleted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()